@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+"""
+Benchmarks of disqus-python against a local fake Disqus API
+
+    $ python benchmarks/run.py --output results.json
+    $ python benchmarks/run.py --quick --only call_latency
+
+Results are written as JSON (to stdout by default): a ``meta`` object
+describing the run and a ``results`` object by benchmark name. Times are in
+seconds and memory in bytes. A benchmark that cannot run here reports an
+``error`` instead.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from disqusapi import (  # noqa: E402
+    DisqusAPI,
+    INTERFACES_PATH,
+    __version__,
+    read_interfaces)
+from disqusapi.metrics import Instrumentation  # noqa: E402
+from disqusapi.paginator import Paginator  # noqa: E402
+from disqusapi.records import RecordFactory  # noqa: E402
+from disqusapi.tests.fakeserver import FakeDisqusServer  # noqa: E402
+from disqusapi import transport, utils  # noqa: E402
+from disqusapi.batch import BatchLookup  # noqa: E402
+
+timer = timeit.default_timer
+BENCHMARKS = []
+
+
+def benchmark(func):
+    BENCHMARKS.append(func)
+    return func
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = int(round(percent / 100.0 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'samples': len(samples),
+        'min': min(samples),
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'max': max(samples),
+        'mean': sum(samples) / len(samples),
+    }
+
+
+def per_call(func, number, repeat):
+    """Seconds per call of func over repeat runs of number calls"""
+    return summarize([
+        timeit.timeit(func, number=number) / number for _ in range(repeat)])
+
+
+@benchmark
+def call_latency(options):
+    """Single posts/list call, on a new connection and a pooled one"""
+    results = {}
+    with FakeDisqusServer(posts=100, latency=options.latency) as server:
+        for name, pool_size in (('new_connection', None), ('pooled', 1)):
+            api = server.client(pool_size=pool_size)
+            api.posts.list(forum='fake')
+            samples = []
+            for _ in range(options.calls):
+                start = timer()
+                api.posts.list(forum='fake')
+                samples.append(timer() - start)
+            results[name] = summarize(samples)
+    return results
+
+
+@benchmark
+def paginator_throughput(options):
+    """Walk of every post, 100 per page, with several client setups"""
+    setups = (
+        ('new_connection', {}, 0),
+        ('pooled', dict(pool_size=1), 0),
+        ('pooled_prefetch', dict(pool_size=2), 2),
+        ('stream', dict(pool_size=1, stream=True), 0),
+        ('records', dict(pool_size=1, records=RecordFactory()), 0),
+        ('compressed', dict(pool_size=1, compress=True), 0),
+        ('compressed_stream', dict(pool_size=1, compress=True, stream=True),
+         0),
+        ('simplejson', dict(pool_size=1, json_backend='simplejson'), 0),
+    )
+    results = {}
+    with FakeDisqusServer(posts=options.posts,
+                          latency=options.latency) as server:
+        for name, client_options, prefetch in setups:
+            api = server.client(**client_options)
+            calls = len(server.requests)
+            start = timer()
+            count = 0
+            for _ in Paginator(api.posts.list, forum='fake', limit=100)(
+                    prefetch=prefetch):
+                count += 1
+            elapsed = timer() - start
+            pages = len(server.requests) - calls
+            results[name] = {
+                'items': count,
+                'pages': pages,
+                'seconds': elapsed,
+                'items_per_second': count / elapsed,
+                'pages_per_second': pages / elapsed,
+            }
+    return results
+
+
+@benchmark
+def fan_out(options):
+    """Concurrent posts/details calls (16 threads) through each transport"""
+    setups = [('new_connection', {}), ('pooled', dict(pool_size=16))]
+    if transport.httpx is not None:
+        setups.append(('http2', None))
+    results = {}
+    latency = options.latency or 0.005
+    with FakeDisqusServer(posts=options.calls, latency=latency) as server:
+        for name, client_options in setups:
+            if client_options is None:
+                client_options = dict(transport=transport.HTTP2Transport(
+                    server.address, scheme='http', max_connections=16))
+            api = server.client(**client_options)
+            start = timer()
+            found = BatchLookup(api, workers=16).posts(
+                range(1, options.calls + 1))
+            elapsed = timer() - start
+            api.make_request.transport.close()
+            results[name] = {
+                'calls': len(found),
+                'seconds': elapsed,
+                'calls_per_second': len(found) / elapsed,
+            }
+    return results
+
+
+@benchmark
+def transfer_size(options):
+    """Bytes received for a page of 100 posts, with and without compression"""
+    results = {}
+    with FakeDisqusServer(posts=100) as server:
+        for name, compress in (('plain', False), ('compressed', True)):
+            calls = []
+            api = server.client(compress=compress, instrument=Instrumentation(
+                after=[calls.append]))
+            api.posts.list(forum='fake', limit=100)
+            call = calls[0]
+            results[name] = {
+                'received': call.received,
+                'decompressed': call.decompressed,
+                'read_seconds': call.timings['read'],
+            }
+    return results
+
+
+@benchmark
+def memory_per_page(options):
+    """Memory kept by decoded pages of 100 posts, as dicts and records"""
+    if tracemalloc is None:
+        raise RuntimeError('tracemalloc is not available')
+    results = {}
+    pages = options.pages
+    with FakeDisqusServer(posts=pages * 100) as server:
+        for name, client_options in (
+                ('dicts', {}), ('records', dict(records=RecordFactory()))):
+            api = server.client(pool_size=1, **client_options)
+            paginator = Paginator(api.posts.list, forum='fake', limit=100)
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            kept = list(paginator)
+            gc.collect()
+            used = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+            results[name] = {
+                'pages': pages,
+                'items': len(kept),
+                'bytes_per_page': used // pages,
+                'bytes_per_item': used // len(kept),
+            }
+            del kept
+    return results
+
+
+@benchmark
+def construction(options):
+    """Interfaces parsing, DisqusAPI construction and resource lookups"""
+    number = options.number
+    DisqusAPI('secret')
+    apis = [DisqusAPI('secret') for _ in range(number)]
+    apis = iter(apis)
+
+    def first_lookup():
+        next(apis).posts.list
+    api = DisqusAPI('secret')
+    api.posts.list
+    return {
+        'read_interfaces': per_call(
+            lambda: read_interfaces(INTERFACES_PATH), 10, options.repeat),
+        'disqusapi_init': per_call(
+            lambda: DisqusAPI('secret'), number, options.repeat),
+        'first_resource_lookup': per_call(first_lookup, number, 1),
+        'resource_lookup': per_call(
+            lambda: api.posts.list, number, options.repeat),
+    }
+
+
+@benchmark
+def signing(options):
+    """MAC signature of a request, with utils functions and a MacSigner"""
+    url = 'https://disqus.com/api/3.0/posts/list.json'
+    params = [('forum', 'disqus'), ('limit', '100'), ('order', 'asc'),
+              ('since', '2014-01-01T00:00:00')]
+
+    def sign():
+        request = utils.get_normalized_request_string(
+            'GET', url, 'nonce', params)
+        utils.get_mac_signature('secret', request)
+    signer = utils.MacSigner('secret')
+    batch = [('GET', url, 'nonce', params)] * 100
+    return {
+        'sign_request': per_call(sign, options.number, options.repeat),
+        'signer_sign': per_call(
+            lambda: signer.sign('GET', url, 'nonce', params),
+            options.number, options.repeat),
+        'signer_sign_many_100': per_call(
+            lambda: signer.sign_many(batch),
+            max(options.number // 100, 1), options.repeat),
+    }
+
+
+def run(options):
+    results = {}
+    for func in BENCHMARKS:
+        if options.only and func.__name__ not in options.only:
+            continue
+        try:
+            results[func.__name__] = func(options)
+        except Exception as error:
+            results[func.__name__] = {
+                'error': '%s: %s' % (type(error).__name__, error)}
+    return {
+        'meta': {
+            'version': __version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'quick': options.quick,
+            'latency': options.latency,
+        },
+        'results': results,
+    }
+
+
+def parse_options(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--output', help='JSON file (stdout by default)')
+    parser.add_argument('--only', action='append', metavar='NAME',
+                        help='run only this benchmark (can be repeated)')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer iterations, for a smoke run')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds the fake server waits per call')
+    options = parser.parse_args(argv)
+    scale = 10 if options.quick else 1
+    options.calls = 200 // scale
+    options.posts = 10000 // scale
+    options.pages = 50 // scale
+    options.number = 10000 // scale
+    options.repeat = 5
+    return options
+
+
+def main(argv=None):
+    options = parse_options(argv)
+    output = json.dumps(run(options), indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, 'w') as target:
+            target.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
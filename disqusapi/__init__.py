@@ -12,15 +12,29 @@ try:
 except:
     __version__ = 'unknown'
 
+import functools
+import marshal
 import os.path
-import simplejson
+import threading
 
-from disqusapi.compat import urlencode, HTTPSConnection
+from disqusapi.compression import (
+    ACCEPT_ENCODING,
+    DECODERS,
+    DecompressingReader)
+from disqusapi.compat import urlencode, HTTPSConnection, MappingProxyType
 from disqusapi.exceptions import (
     InterfaceNotDefined,
     APIError,
     InvalidAccessToken,
-    RateLimitError)
+    RateLimitError,
+    ServerError)
+from disqusapi.jsonlib import DEFAULT_BACKEND, get_backend
+from disqusapi.pool import ConnectionPool
+from disqusapi.ratelimit import parse_headers
+from disqusapi.records import RecordFactory
+from disqusapi.singleflight import SingleFlight
+from disqusapi.transport import ConnectionTransport, PoolTransport
+from disqusapi.utils import get_normalized_params
 
 __all__ = ['DisqusAPI']
 
@@ -82,10 +96,16 @@ class ResourceElement(object):
             self.tree == other.tree
 
     def __getattr__(self, attr):
-        interface = self.interface
-        if attr not in interface:
-            interface[attr] = {}
-        return self._new_element(interface[attr], attr, self.tree)
+        # Not a resource: private names and protocol lookups (copy, pickle)
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        interface = self.interface.get(attr)
+        if interface is None:
+            interface = {}
+        element = self._new_element(interface, attr, self.tree)
+        # Memoize it, next lookups will not reach __getattr__
+        self.__dict__[attr] = element
+        return element
 
     def _new_element(self, interface, node, tree):
         """What to build as a resource in the next step (and how to do it)"""
@@ -109,10 +129,13 @@ class Resource(ResourceElement):
 
     def _validate_arguments(self, kwargs):
         """Validate arguments taking care of queries in the names"""
-        keys = set(key.split(':')[0] for key in kwargs.keys())
-        for required in self.interface.get('required', []):
-            if required not in keys:
-                raise ValueError('Missing required argument: %s' % required)
+        required = self.interface.get('required')
+        if not required:
+            return
+        keys = set(key.split(':')[0] for key in kwargs)
+        if not keys.issuperset(required):
+            missing = [name for name in required if name not in keys]
+            raise ValueError('Missing required argument: %s' % missing[0])
 
     def _validate_method(self, kwargs):
         method = kwargs.pop('method', self.interface.get('method'))
@@ -137,10 +160,83 @@ class DisqusRequest(object):
     }
     host = 'disqus.com'
 
-    def __init__(self, default_params, version, conn=HTTPSConnection):
+    def __init__(self, default_params, version, conn=HTTPSConnection,
+                 pool=None, cache=None, ratelimit=None, retry=None,
+                 stream=False, records=None, singleflight=None,
+                 instrument=None, signer=None, compress=False,
+                 transport=None, json_backend=None):
         self.__defaults = default_params
         self.__version = version
-        self.__conn = conn
+        self.__pool = pool
+        if transport is None:
+            if pool is not None:
+                transport = PoolTransport(pool)
+            else:
+                transport = ConnectionTransport(self.host, conn)
+        self.__transport = transport
+        self.__cache = cache
+        self.__ratelimit = ratelimit
+        self.__retry = retry
+        self.__stream = stream
+        self.__records = records
+        self.__singleflight = singleflight
+        self.__instrument = instrument
+        self.__signer = signer
+        self.__compress = compress
+        self.__json = get_backend(json_backend)
+        if compress:
+            self.headers = dict(self.headers, **{
+                'Accept-Encoding': ACCEPT_ENCODING})
+
+    @property
+    def pool(self):
+        """Keep-alive connection pool, None when disabled"""
+        return self.__pool
+
+    @property
+    def transport(self):
+        """Transport sending the requests"""
+        return self.__transport
+
+    @property
+    def cache(self):
+        """ResponseCache for GET endpoints, None when disabled"""
+        return self.__cache
+
+    @property
+    def ratelimit(self):
+        """RateLimiter pacing the calls, None when disabled"""
+        return self.__ratelimit
+
+    @property
+    def retry(self):
+        """RetryPolicy for transient failures, None when disabled"""
+        return self.__retry
+
+    @property
+    def records(self):
+        """RecordFactory building the results, None for plain dicts"""
+        return self.__records
+
+    @property
+    def singleflight(self):
+        """SingleFlight coalescing identical GET calls, None when disabled"""
+        return self.__singleflight
+
+    @property
+    def instrument(self):
+        """Instrumentation hooks around each call, None when disabled"""
+        return self.__instrument
+
+    @property
+    def signer(self):
+        """MacSigner adding an Authorization header, None when disabled"""
+        return self.__signer
+
+    @property
+    def json_backend(self):
+        """JSONBackend decoding the responses"""
+        return self.__json
 
     def _update_params(self, kwargs):
         for name, value in self.__defaults.items():
@@ -152,8 +248,54 @@ class DisqusRequest(object):
     def __call__(self, method, path, kwargs):
         self._update_params(kwargs)
         params = params_list(kwargs)
+        instrument = self.__instrument
+        if instrument is None:
+            return self._call(method, path, params)
+        call = instrument.start(method, path)
+        try:
+            return self._call(method, path, params, call)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            instrument.finish(call)
+
+    def _call(self, method, path, params, call=None):
+        cache = self.__cache
+        if method != 'GET':
+            result = self._request(method, path, params, call)
+            if cache is not None:
+                cache.invalidate(path)
+            return result
+
+        if cache is not None:
+            result = cache.get(path, params)
+            if call is not None:
+                call.cache = 'miss' if result is None else 'hit'
+            if result is not None:
+                return result
+        # Streamed results can only be iterated once, they are not shared
+        singleflight = self.__singleflight
+        if singleflight is not None and not self.__stream:
+            key = (path, get_normalized_params(params))
+            result = singleflight.do(key, self._get, path, params, call)
+            if call is not None and not call.attempts:
+                # Another thread made the call
+                call.cache = 'coalesced'
+            return result
+        return self._get(path, params, call)
+
+    def _get(self, path, params, call=None):
+        result = self._request('GET', path, params, call)
+        cache = self.__cache
+        if cache is not None and not (
+                self.__stream and isinstance(result, Result)):
+            cache.set(path, params, result)
+        return result
+
+    def _request(self, method, endpoint, params, call=None):
         # Adjust path
-        path = '/api/%s/%s.json' % (self.__version, path)
+        path = '/api/%s/%s.json' % (self.__version, endpoint)
 
         # Adjust data based on the method
         if method == 'GET':
@@ -162,20 +304,113 @@ class DisqusRequest(object):
         else:
             data = urlencode(params)
 
-        conn = self.__conn(self.host)
-        conn.request(method, path, data, self.headers)
-
-        response = conn.getresponse()
+        retry = self.__retry
+        if retry is not None and retry.allows(method):
+            return retry.call(
+                self._fetch, method, endpoint, path, data, call, params)
+        return self._fetch(method, endpoint, path, data, call, params)
+
+    def _fetch(self, method, endpoint, path, data, call=None, params=()):
+        ratelimit = self.__ratelimit
+        if ratelimit is not None:
+            ratelimit.acquire()
+        if call is not None:
+            call.attempts += 1
+            call.sent += len(path) + len(data)
+        headers = self.headers
+        signer = self.__signer
+        if signer is not None:
+            # Signed on every attempt, nonces must not be reused
+            headers = dict(headers, Authorization=signer.authorization(
+                method, 'https://%s%s' % (self.host, path), params))
+        response, release = self._open(method, path, data, call, headers)
+        if call is not None:
+            call.status = response.status
+        if ratelimit is not None:
+            ratelimit.update(*parse_headers(response))
+        build = None
+        if self.__records is not None:
+            build = functools.partial(self.__records, endpoint)
+        read = response.read
+        reader = None
+        if self.__compress:
+            encoding = response.getheader('Content-Encoding') or ''
+            encoding = encoding.strip().lower()
+            if encoding in DECODERS:
+                reader = DecompressingReader(response.read, encoding)
+                read = reader.read
+        if self.__stream and response.status == 200:
+            return self._decode_stream(read, release, build,
+                                       response.status)
+        try:
+            if call is None:
+                body = read()
+            else:
+                body = call.time('read', read)
+                if reader is None:
+                    call.received = (call.received or 0) + len(body)
+                else:
+                    call.received = (call.received or 0) + reader.compressed
+                    call.decompressed = \
+                        (call.decompressed or 0) + reader.decompressed
+        finally:
+            release()
         # Let's coerce it to Python
-        data = simplejson.loads(response.read())
+        loads = self.__json.loads
+        try:
+            if call is None:
+                data = loads(body)
+            else:
+                data = call.time('decode', loads, body)
+        except ValueError:
+            raise ServerError(response.status, body[:200])
 
         if response.status != 200:
             exception_class = self.error_map.get(data['code'], APIError)
-            raise exception_class(data['code'], data['response'])
-
-        if isinstance(data['response'], list):
-            return Result(data['response'], data.get('cursor'))
-        return data['response']
+            error = exception_class(data['code'], data['response'])
+            if isinstance(error, RateLimitError):
+                error.remaining, error.reset = parse_headers(response)
+            raise error
+
+        response = data['response']
+        if isinstance(response, list):
+            if build is not None:
+                response = [build(item) for item in response]
+            return Result(response, data.get('cursor'))
+        if build is not None:
+            return build(response)
+        return response
+
+    def _decode_stream(self, read, release, build=None, status=200):
+        """Decode list responses item by item while they are read"""
+        from disqusapi.stream import EnvelopeParser, StreamResult
+        parser = EnvelopeParser(read)
+        try:
+            streaming = parser.start()
+        except ValueError as error:
+            release()
+            raise ServerError(status, str(error)[:200])
+        except:
+            release()
+            raise
+        if streaming:
+            return StreamResult(parser, release, build)
+        release()
+        response = parser.envelope['response']
+        if build is not None:
+            return build(response)
+        return response
+
+    def _open(self, method, path, data, call=None, headers=None):
+        """
+        Send the request.
+
+        Returns the response and a callable releasing its connection, to be
+        called once the response is read.
+        """
+        if headers is None:
+            headers = self.headers
+        return self.__transport.open(method, path, data, headers, call)
 
 
 def params_list(kwargs):
@@ -188,21 +423,101 @@ def params_list(kwargs):
     return params
 
 
+INTERFACES_PATH = os.path.join(os.path.dirname(__file__), 'interfaces.json')
+_interfaces = None
+_interfaces_lock = threading.Lock()
+
+
 def load_interfaces():
-    return simplejson.loads(open(os.path.join(
-        os.path.dirname(__file__), 'interfaces.json'), 'r').read())
+    """
+    Endpoint registry, shared by every DisqusAPI of the process.
+
+    It is read once, on first use, from interfaces.json or from the marshal
+    cache at ``$DISQUSAPI_INTERFACES_CACHE`` (written when missing or older
+    than the json file). It is read only, with the required arguments of each
+    endpoint as a frozenset.
+    """
+    global _interfaces
+    if _interfaces is None:
+        with _interfaces_lock:
+            if _interfaces is None:
+                _interfaces = freeze(read_interfaces(
+                    INTERFACES_PATH,
+                    os.environ.get('DISQUSAPI_INTERFACES_CACHE')))
+    return _interfaces
+
+
+def read_interfaces(path, cache_path=None):
+    """Parse the interfaces file, using (and refreshing) a marshal cache"""
+    if cache_path:
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+                with open(cache_path, 'rb') as cache:
+                    return marshal.load(cache)
+        except (EnvironmentError, EOFError, ValueError, TypeError):
+            pass
+
+    with open(path, 'r') as source:
+        interfaces = compile_interfaces(DEFAULT_BACKEND.loads(source.read()))
+
+    if cache_path:
+        try:
+            temporary = '%s.%d' % (cache_path, os.getpid())
+            with open(temporary, 'wb') as cache:
+                marshal.dump(interfaces, cache)
+            os.rename(temporary, cache_path)
+        except EnvironmentError:
+            pass
+    return interfaces
+
+
+def compile_interfaces(interfaces):
+    """Precompute what validation needs (required arguments as frozensets)"""
+    compiled = {}
+    for name, value in interfaces.items():
+        if name == 'required':
+            value = frozenset(value)
+        elif isinstance(value, dict):
+            value = compile_interfaces(value)
+        compiled[name] = value
+    return compiled
+
+
+def freeze(interfaces):
+    """Read only view of nested dicts"""
+    return MappingProxyType(dict(
+        (name, freeze(value) if isinstance(value, dict) else value)
+        for name, value in interfaces.items()))
 
 
 class DisqusAPI(ResourceElement):
     def __init__(self, secret_key=None, public_key=None, access_token=None,
-                 version='3.0'):
+                 version='3.0', pool_size=None, cache=None, ratelimit=None,
+                 retry=None, stream=False, records=False, coalesce=False,
+                 instrument=None, signer=None, compress=False,
+                 transport=None, json_backend=None):
         super(DisqusAPI, self).__init__(load_interfaces(), None, ())
 
         default_params = dict(
             api_secret=secret_key,
             api_key=public_key,
             access_token=access_token)
-        self.make_request = DisqusRequest(default_params, version)
+        pool = None
+        if pool_size and transport is None:
+            pool = ConnectionPool(DisqusRequest.host, size=pool_size)
+        self.make_request = DisqusRequest(
+            default_params, version, pool=pool, cache=cache,
+            ratelimit=ratelimit, retry=retry, stream=stream,
+            records=RecordFactory() if records else None,
+            singleflight=SingleFlight() if coalesce else None,
+            instrument=instrument, signer=signer, compress=compress,
+            transport=transport, json_backend=json_backend)
+
+    @property
+    def batch(self):
+        """Batched lookups by id: ``api.batch.threads(ids)``"""
+        from disqusapi.batch import BatchLookup
+        return BatchLookup(self)
 
     def _new_element(self, interface, node, tree):
         return Resource(self.make_request, interface, node, tree)
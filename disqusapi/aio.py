@@ -0,0 +1,90 @@
+"""
+asyncio flavour of DisqusAPI (Python 3.7+)
+
+>>> api = AsyncDisqusAPI('secret_key', concurrency=20)
+>>> threads = await api.threads.list(forum='disqus')
+
+Calls are sent by a blocking DisqusRequest running in a thread pool, so they
+never block the event loop while sharing one keep-alive connection pool,
+validation, error mapping and every other DisqusRequest option.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from disqusapi import DisqusAPI
+from disqusapi.batch import ENDPOINTS, BatchLookup, items
+
+
+class AsyncDisqusRequest(object):
+    """
+    Awaitable wrapper over a DisqusRequest.
+
+    At most ``concurrency`` requests are in flight at once, the rest wait for
+    a free worker.
+    """
+    def __init__(self, request, concurrency=10):
+        self.request = request
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def __eq__(self, other):
+        return self.request == other.request
+
+    async def __call__(self, method, path, kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.request, method, path, kwargs)
+
+    def close(self):
+        """Wait for pending requests and close pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.request.transport.close()
+
+
+class AsyncDisqusAPI(DisqusAPI):
+    """
+    DisqusAPI whose resources return awaitables.
+
+    It can be used as an async context manager to release its threads and
+    connections when done. Other keyword arguments are DisqusAPI options.
+    """
+    def __init__(self, secret_key=None, public_key=None, access_token=None,
+                 version='3.0', concurrency=10, **options):
+        super(AsyncDisqusAPI, self).__init__(
+            secret_key, public_key, access_token, version,
+            pool_size=concurrency, **options)
+        self.make_request = AsyncDisqusRequest(self.make_request, concurrency)
+
+    @property
+    def batch(self):
+        """Batched lookups by id: ``await api.batch.threads(ids)``"""
+        return AsyncBatchLookup(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.make_request.close()
+
+
+class AsyncBatchLookup(BatchLookup):
+    """
+    BatchLookup awaiting the calls of an AsyncDisqusAPI.
+
+    Chunks are fetched concurrently, as many at once as the client allows:
+    ``workers`` is not used.
+    """
+    async def lookup(self, kind, ids, known=None, **params):
+        path, param, chunk_size = ENDPOINTS[kind]
+        found, chunks = self._chunks(kind, ids, known, chunk_size)
+        endpoint = self._endpoint(path)
+        results = await asyncio.gather(*[
+            endpoint(**self._arguments(param, chunk, chunk_size, params))
+            for chunk in chunks])
+        for result in results:
+            for item in items(result):
+                self._found(kind, found, item)
+        return found
@@ -0,0 +1,128 @@
+"""Batched lookups of many objects by id"""
+import threading
+
+from disqusapi import Result
+from disqusapi.paginator import in_background
+
+# Object kind: list endpoint, its id parameter and the ids per call. Kinds
+# without an endpoint accepting several ids are fetched one per call.
+ENDPOINTS = {
+    'threads': ('threads/list', 'thread', 100),
+    'posts': ('posts/details', 'post', 1),
+    'users': ('users/details', 'user', 1),
+    'forums': ('forums/details', 'forum', 1),
+}
+
+
+class BatchLookup(object):
+    """
+    Fetch objects by id in as few calls as possible.
+
+    >>> threads = api.batch.threads(['1', '2', '3'])
+    >>> threads['2']['title']
+
+    Ids are deduplicated and split in chunks as large as the endpoint
+    accepts, chunks are fetched concurrently by ``workers`` threads. Returns a
+    dict by id (as a string), ids a list endpoint did not return are left
+    out. API errors are raised.
+
+    Objects in ``known`` (a dict by id) are not fetched again and end up in
+    the result, as well as those in ``cache`` (a disqusapi.cache backend)
+    which gets the fetched ones.
+    """
+    def __init__(self, api, workers=4, cache=None, cache_ttl=300):
+        self.api = api
+        self.workers = workers
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, kind):
+        if kind not in ENDPOINTS:
+            raise AttributeError(kind)
+
+        def lookup(ids, known=None, **params):
+            return self.lookup(kind, ids, known, **params)
+        return lookup
+
+    def lookup(self, kind, ids, known=None, **params):
+        path, param, chunk_size = ENDPOINTS[kind]
+        found, chunks = self._chunks(kind, ids, known, chunk_size)
+        endpoint = self._endpoint(path)
+        fetches = [self._fetch(endpoint, param, chunk, chunk_size, params)
+                   for chunk in chunks]
+        for item in in_background(fetches, self.workers, self.workers * 100):
+            self._found(kind, found, item)
+        return found
+
+    def _chunks(self, kind, ids, known, chunk_size):
+        """Objects already known by id, and chunks of the ids to fetch"""
+        found = {}
+        missing = []
+        for ident in unique(str(ident) for ident in ids):
+            value = self._known(kind, ident, known)
+            if value is None:
+                missing.append(ident)
+            else:
+                found[ident] = value
+        chunks = [missing[start:start + chunk_size]
+                  for start in range(0, len(missing), chunk_size)]
+        return found, chunks
+
+    def _found(self, kind, found, item):
+        ident = str(item['id'])
+        found[ident] = item
+        if self.cache is not None:
+            self.cache.set(self._key(kind, ident), item, self.cache_ttl)
+
+    def _known(self, kind, ident, known):
+        if known is not None and ident in known:
+            return known[ident]
+        if self.cache is not None:
+            return self.cache.get(self._key(kind, ident))
+        return None
+
+    def _key(self, kind, ident):
+        return 'disqusapi:batch:%s:%s' % (kind, ident)
+
+    def _endpoint(self, path):
+        endpoint = self.api
+        for name in path.split('/'):
+            endpoint = getattr(endpoint, name)
+        return endpoint
+
+    def _arguments(self, param, chunk, chunk_size, params):
+        """Arguments of the call fetching a chunk of ids"""
+        kwargs = dict(params)
+        if chunk_size == 1:
+            kwargs[param] = chunk[0]
+        else:
+            kwargs[param] = chunk
+            kwargs['limit'] = len(chunk)
+        with self._lock:
+            self.calls += 1
+        return kwargs
+
+    def _fetch(self, endpoint, param, chunk, chunk_size, params):
+        """Generator calling the endpoint for a chunk of ids"""
+        result = endpoint(
+            **self._arguments(param, chunk, chunk_size, params))
+        for item in items(result):
+            yield item
+
+
+def items(result):
+    """Objects of a list (a Result) or details call"""
+    if isinstance(result, Result):
+        return list(result)
+    return [result]
+
+
+def unique(values):
+    """Values without repetitions, in order"""
+    seen = set()
+    for value in values:
+        if value not in seen:
+            seen.add(value)
+            yield value
@@ -0,0 +1,162 @@
+"""Response cache for read-only (GET) endpoints"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from disqusapi.utils import get_normalized_params
+
+
+class BaseCache(object):
+    """
+    Cache backend interface.
+
+    Implement it to share cached responses between processes (memcached,
+    redis...). Values are Result objects or plain decoded responses, both
+    can be pickled. ``shared`` backends also hold the generations of the
+    resource families, so an invalidation is seen by every process.
+    """
+    shared = True
+
+    def get(self, key):
+        """Return the cached value or None"""
+        raise NotImplementedError('Implement in your subclass')
+
+    def set(self, key, value, ttl=None):
+        """Cache a value for ttl seconds (forever if None)"""
+        raise NotImplementedError('Implement in your subclass')
+
+    def delete(self, key):
+        raise NotImplementedError('Implement in your subclass')
+
+
+class MemoryCache(BaseCache):
+    """
+    In process LRU cache with per entry expiration.
+
+    Holds up to ``max_entries`` values, evicting the least recently used one
+    when full. Values are returned as they were set, not copies.
+    """
+    shared = False
+
+    def __init__(self, max_entries=1000, clock=time.time):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self._clock():
+                    self._data[key] = entry
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, expires)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses,
+                    evictions=self.evictions, size=len(self._data))
+
+
+class ResponseCache(object):
+    """
+    Caches responses per endpoint and normalized parameters.
+
+    >>> cache = ResponseCache(ttl=60, ttls={'forums/details': 3600})
+    >>> api = DisqusAPI('secret_key', cache=cache)
+
+    Responses are kept ``ttl`` seconds unless ``ttls`` overrides it for an
+    endpoint (``0`` disables caching it). A successful POST invalidates every
+    cached response of its resource family, so ``threads/close`` drops cached
+    ``threads/details`` and ``threads/list`` responses.
+
+    Cached responses are handed out as is (without copying them) by the
+    memory backend: treat them as read-only.
+    """
+    prefix = 'disqusapi'
+
+    def __init__(self, backend=None, ttl=60, ttls=None):
+        if backend is None:
+            backend = MemoryCache()
+        self.backend = backend
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+        # Generations of a backend local to the process, kept out of it
+        self._generations = {}
+
+    def get(self, path, params):
+        value = self.backend.get(self._key(path, params))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, path, params, value):
+        ttl = self.ttls.get(path, self.ttl)
+        if ttl:
+            self.backend.set(self._key(path, params), value, ttl)
+
+    def invalidate(self, path):
+        """Forget the cached responses of the resource family of path"""
+        key = self._generation_key(path)
+        if self.backend.shared:
+            self.backend.delete(key)
+        else:
+            self._generations.pop(key, None)
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses)
+
+    def _generation_key(self, path):
+        return '%s:generation:%s' % (self.prefix, path.split('/')[0])
+
+    def _key(self, path, params):
+        """
+        Key of a response.
+
+        It includes the generation of the resource family, a random token
+        replaced when the family is invalidated (or evicted from a shared
+        backend), so stale entries are never read again. Parameters are
+        hashed to keep keys short and secrets out of the backend.
+        """
+        generation_key = self._generation_key(path)
+        if not self.backend.shared:
+            generation = self._generations.get(generation_key)
+            if generation is None:
+                generation = self._generations.setdefault(
+                    generation_key, uuid.uuid4().hex)
+        else:
+            generation = self.backend.get(generation_key)
+            if generation is None:
+                generation = uuid.uuid4().hex
+                self.backend.set(generation_key, generation)
+        query = '%s?%s' % (path, get_normalized_params(params))
+        digest = hashlib.sha1(query.encode('utf-8')).hexdigest()
+        return '%s:%s:%s' % (self.prefix, generation, digest)
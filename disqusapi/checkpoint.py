@@ -0,0 +1,108 @@
+"""Checkpoint stores for resumable paginations"""
+import json
+import os
+import sqlite3
+import threading
+
+
+class CheckpointStore(object):
+    """
+    Checkpoint store interface.
+
+    States are dicts of JSON serializable values, saved by key.
+    """
+    def load(self, key):
+        """Return the saved state or None"""
+        raise NotImplementedError('Implement in your subclass')
+
+    def save(self, key, state):
+        raise NotImplementedError('Implement in your subclass')
+
+    def clear(self, key):
+        raise NotImplementedError('Implement in your subclass')
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Keeps checkpoints in memory, for tests and short lived processes"""
+    def __init__(self):
+        self.states = {}
+
+    def load(self, key):
+        return self.states.get(key)
+
+    def save(self, key, state):
+        self.states[key] = json.loads(json.dumps(state))
+
+    def clear(self, key):
+        self.states.pop(key, None)
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Keeps every checkpoint in a JSON file.
+
+    The file is replaced atomically on each save, so a crash leaves the
+    previous checkpoint in place.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as source:
+                return json.load(source)
+        except (EnvironmentError, ValueError):
+            return {}
+
+    def _write(self, states):
+        temporary = '%s.%d' % (self.path, os.getpid())
+        with open(temporary, 'w') as target:
+            json.dump(states, target)
+        os.rename(temporary, self.path)
+
+    def load(self, key):
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key, state):
+        with self._lock:
+            states = self._read()
+            states[key] = state
+            self._write(states)
+
+    def clear(self, key):
+        with self._lock:
+            states = self._read()
+            if states.pop(key, None) is not None:
+                self._write(states)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Keeps checkpoints in a SQLite database"""
+    def __init__(self, path):
+        self.path = path
+        self._run('CREATE TABLE IF NOT EXISTS checkpoints '
+                  '(key TEXT PRIMARY KEY, state TEXT NOT NULL)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _run(self, query, *args):
+        db = self._connect()
+        try:
+            with db:
+                return db.execute(query, args).fetchone()
+        finally:
+            db.close()
+
+    def load(self, key):
+        row = self._run('SELECT state FROM checkpoints WHERE key = ?', key)
+        return None if row is None else json.loads(row[0])
+
+    def save(self, key, state):
+        self._run('INSERT OR REPLACE INTO checkpoints (key, state) '
+                  'VALUES (?, ?)', key, json.dumps(state))
+
+    def clear(self, key):
+        self._run('DELETE FROM checkpoints WHERE key = ?', key)
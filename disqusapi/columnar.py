@@ -0,0 +1,359 @@
+"""
+Columnar export of paginated results
+
+>>> from disqusapi.columnar import ColumnarSink, ParquetWriter, POSTS
+>>> sink = ColumnarSink(POSTS, ParquetWriter('posts.parquet', POSTS))
+>>> sink.consume(Paginator(api.posts.list, forum='disqus'))
+
+Items are buffered and converted a column at a time into typed arrays, which
+are handed to the writer every ``chunk_size`` rows. Missing values are nulls:
+typed columns keep a mask of them. Writers need pyarrow
+(``pip install disqus-python[arrow]``), ``ColumnarSink.to_numpy`` needs
+numpy.
+"""
+import calendar
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+# Column type: array typecode (None for strings), numpy dtype, arrow type
+TYPES = {
+    'int': ('q', 'int64', 'int64'),
+    'float': ('d', 'float64', 'float64'),
+    'bool': ('b', 'bool', 'bool_'),
+    'timestamp': ('q', 'datetime64[s]', 'timestamp'),
+    'string': (None, 'object', 'string'),
+}
+
+# Placeholder of missing values in typed arrays, masked as nulls
+MISSING = {'int': 0, 'float': 0.0, 'bool': 0, 'timestamp': 0}
+
+
+def parse_timestamp(value):
+    """Seconds since the epoch of an API date ('2013-01-02T03:04:05')"""
+    if not value:
+        return None
+    return calendar.timegm(time.strptime(value[:19], '%Y-%m-%dT%H:%M:%S'))
+
+
+class Field(object):
+    """
+    A column: its name, type and where to find it in an item.
+
+    ``path`` is a dotted path (``author.id``), the name by default.
+    """
+    def __init__(self, name, type='string', path=None):
+        if type not in TYPES:
+            raise ValueError('Unknown column type: %s' % type)
+        self.name = name
+        self.type = type
+        self.path = tuple((path or name).split('.'))
+
+    def __repr__(self):
+        return '<Field %s: %s>' % (self.name, self.type)
+
+    def extract(self, items):
+        """Column values for a batch of items, None when missing"""
+        path = self.path
+        if len(path) == 1:
+            key = path[0]
+            values = [item.get(key) for item in items]
+        else:
+            values = [_lookup(item, path) for item in items]
+        if self.type == 'timestamp':
+            return [parse_timestamp(value) for value in values]
+        if self.type == 'string':
+            return [None if value is None else _text(value)
+                    for value in values]
+        convert = float if self.type == 'float' else int
+        return [None if value is None else convert(value)
+                for value in values]
+
+
+def _lookup(item, path):
+    for key in path:
+        if not hasattr(item, 'get'):
+            # Not expanded (an id instead of the related object)
+            return item if key == 'id' else None
+        item = item.get(key)
+        if item is None:
+            return None
+    return item
+
+
+def _text(value):
+    return value if isinstance(value, type(u'')) else u'%s' % (value,)
+
+
+POSTS = (
+    Field('id', 'int'),
+    Field('thread', 'int', 'thread.id'),
+    Field('forum', 'string', 'forum.id'),
+    Field('parent', 'int'),
+    Field('author', 'int', 'author.id'),
+    Field('author_username', 'string', 'author.username'),
+    Field('createdAt', 'timestamp'),
+    Field('likes', 'int'),
+    Field('dislikes', 'int'),
+    Field('points', 'int'),
+    Field('isApproved', 'bool'),
+    Field('isDeleted', 'bool'),
+    Field('isSpam', 'bool'),
+    Field('raw_message', 'string'),
+)
+
+THREADS = (
+    Field('id', 'int'),
+    Field('forum', 'string', 'forum.id'),
+    Field('category', 'int', 'category.id'),
+    Field('author', 'int', 'author.id'),
+    Field('title', 'string'),
+    Field('link', 'string'),
+    Field('createdAt', 'timestamp'),
+    Field('posts', 'int'),
+    Field('likes', 'int'),
+    Field('dislikes', 'int'),
+    Field('isClosed', 'bool'),
+    Field('isDeleted', 'bool'),
+)
+
+
+class ColumnarSink(object):
+    """
+    Accumulates items into typed columns.
+
+    Up to ``batch_size`` items wait to be converted; columns are handed to
+    ``writer`` (a callable taking the schema, a dict of columns and a dict
+    of their masks) and cleared every ``chunk_size`` rows, and on ``close``.
+    Without writer the columns just grow.
+
+    Typed columns have a mask, an ``array('b')`` set to 1 where the value is
+    missing (a placeholder in the column). String columns hold None instead.
+    """
+    def __init__(self, schema, writer=None, chunk_size=100000,
+                 batch_size=1000):
+        self.schema = tuple(schema)
+        self.writer = writer
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.rows = 0
+        self.written = 0
+        self._pending = []
+        self._columns, self._masks = self._empty()
+
+    def _empty(self):
+        columns = {}
+        masks = {}
+        for field in self.schema:
+            typecode = TYPES[field.type][0]
+            if typecode is None:
+                columns[field.name] = []
+            else:
+                columns[field.name] = array(typecode)
+                masks[field.name] = array('b')
+        return columns, masks
+
+    def append(self, item):
+        self._pending.append(item)
+        if len(self._pending) >= self.batch_size:
+            self._convert()
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def consume(self, items):
+        """Store every item (a Paginator for instance) and close"""
+        self.extend(items)
+        self.close()
+
+    def _convert(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        for field in self.schema:
+            values = field.extract(pending)
+            mask = self._masks.get(field.name)
+            if mask is None:
+                self._columns[field.name].extend(values)
+            elif None in values:
+                missing = MISSING[field.type]
+                mask.extend([value is None for value in values])
+                self._columns[field.name].extend(
+                    [missing if value is None else value
+                     for value in values])
+            else:
+                mask.frombytes(bytes(bytearray(len(values))))
+                self._columns[field.name].extend(values)
+        self.rows += len(pending)
+        if self.writer is not None and self.rows >= self.chunk_size:
+            self.flush()
+
+    def columns(self):
+        """Columns of the rows not written yet (array.array or list)"""
+        self._convert()
+        return self._columns
+
+    def masks(self):
+        """Masks of the missing values of the typed columns"""
+        self._convert()
+        return self._masks
+
+    def flush(self):
+        """Hand the buffered rows to the writer"""
+        columns = self.columns()
+        if self.rows:
+            self.writer(self.schema, columns, self._masks)
+            self.written += self.rows
+        self.rows = 0
+        self._columns, self._masks = self._empty()
+
+    def close(self):
+        if self.writer is None:
+            self._convert()
+            return
+        self.flush()
+        close = getattr(self.writer, 'close', None)
+        if close is not None:
+            close()
+
+    def to_numpy(self):
+        """
+        Buffered columns as numpy arrays (numeric ones without copies),
+        masked arrays when values are missing.
+        """
+        if numpy is None:
+            raise ImportError('to_numpy requires numpy')
+        return to_numpy(self.schema, self.columns(), self.masks())
+
+
+# numpy dtype matching each array typecode
+RAW_DTYPES = {'q': 'int64', 'd': 'float64', 'b': 'int8'}
+
+
+def to_numpy(schema, columns, masks=None):
+    arrays = {}
+    for field in schema:
+        typecode, dtype, _ = TYPES[field.type]
+        column = columns[field.name]
+        if typecode is None:
+            arrays[field.name] = numpy.array(column, dtype=dtype)
+            continue
+        values = numpy.frombuffer(
+            column, dtype=RAW_DTYPES[typecode]).view(dtype)
+        mask = _numpy_mask(masks, field.name)
+        if mask is not None:
+            values = numpy.ma.masked_array(values, mask=mask)
+        arrays[field.name] = values
+    return arrays
+
+
+def _numpy_mask(masks, name):
+    """Boolean numpy mask of a column, None without missing values"""
+    mask = (masks or {}).get(name)
+    if not mask or not any(mask):
+        return None
+    return numpy.frombuffer(mask, dtype='int8').view('bool')
+
+
+def arrow_schema(schema):
+    if pyarrow is None:
+        raise ImportError('Arrow output requires pyarrow')
+    fields = []
+    for field in schema:
+        arrow_type = TYPES[field.type][2]
+        if arrow_type == 'timestamp':
+            arrow_type = pyarrow.timestamp('s', tz='UTC')
+        else:
+            arrow_type = getattr(pyarrow, arrow_type)()
+        fields.append(pyarrow.field(field.name, arrow_type))
+    return pyarrow.schema(fields)
+
+
+def record_batch(schema, columns, arrow=None, masks=None):
+    """Arrow RecordBatch of the columns, masked values being nulls"""
+    arrow = arrow or arrow_schema(schema)
+    masks = masks or {}
+    if numpy is not None:
+        columns = to_numpy(schema, columns)
+    arrays = []
+    for field, arrow_field in zip(schema, arrow):
+        column = columns[field.name]
+        if numpy is not None:
+            arrays.append(pyarrow.array(
+                column, type=arrow_field.type,
+                mask=_numpy_mask(masks, field.name)))
+            continue
+        if field.type == 'bool':
+            column = [bool(value) for value in column]
+        mask = masks.get(field.name)
+        if mask:
+            column = [None if missing else value
+                      for value, missing in zip(column, mask)]
+        arrays.append(pyarrow.array(list(column), type=arrow_field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=arrow)
+
+
+class ArrowWriter(object):
+    """Base of the writers, converts the columns to record batches"""
+    def __init__(self, schema):
+        self.arrow = arrow_schema(schema)
+
+    def __call__(self, schema, columns, masks=None):
+        self.write(record_batch(schema, columns, self.arrow, masks))
+
+    def write(self, batch):
+        raise NotImplementedError('Implement in your subclass')
+
+    def close(self):
+        pass
+
+
+class RecordBatches(ArrowWriter):
+    """Keeps the record batches in the ``batches`` list"""
+    def __init__(self, schema):
+        super(RecordBatches, self).__init__(schema)
+        self.batches = []
+
+    def write(self, batch):
+        self.batches.append(batch)
+
+
+class ParquetWriter(ArrowWriter):
+    """Writes each chunk as a row group of a Parquet file"""
+    def __init__(self, path, schema, **options):
+        super(ParquetWriter, self).__init__(schema)
+        self._writer = pyarrow.parquet.ParquetWriter(
+            path, self.arrow, **options)
+
+    def write(self, batch):
+        self._writer.write_table(pyarrow.Table.from_batches([batch]))
+
+    def close(self):
+        self._writer.close()
+
+
+class FeatherWriter(ArrowWriter):
+    """Writes each chunk as a record batch of a Feather (Arrow IPC) file"""
+    def __init__(self, path, schema):
+        super(FeatherWriter, self).__init__(schema)
+        self._sink = pyarrow.OSFile(path, 'wb')
+        self._writer = pyarrow.ipc.new_file(self._sink, self.arrow)
+
+    def write(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
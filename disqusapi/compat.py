@@ -5,13 +5,38 @@ PY3 = sys.version_info[0] == 3
 
 # URL imports
 if PY3:
-    from urllib.parse import urlencode, urlparse
+    from urllib.parse import parse_qsl, urlencode, urljoin, urlparse
 else:
     from urllib import urlencode
+    from urlparse import parse_qsl, urljoin
     import urlparse
 
 # HTTPlib
 if PY3:
-    from http.client import HTTPSConnection
+    from http.client import HTTPConnection, HTTPException, HTTPSConnection
+    from http.client import RemoteDisconnected
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
 else:
-    from httplib import HTTPSConnection
+    from httplib import HTTPConnection, HTTPException, HTTPSConnection
+    from httplib import BadStatusLine as RemoteDisconnected
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+# Queues
+if PY3:
+    from queue import Empty, Full, Queue
+else:
+    from Queue import Empty, Full, Queue
+
+# String interning
+if PY3:
+    from sys import intern
+else:
+    intern = intern
+
+# Read only dicts
+if sys.version_info >= (3, 3):
+    from types import MappingProxyType
+else:
+    MappingProxyType = dict
@@ -0,0 +1,113 @@
+"""Compressed responses, decompressed while they are read"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class ZlibDecoder(object):
+    def __init__(self, wbits=16 + zlib.MAX_WBITS):
+        self._obj = zlib.decompressobj(wbits)
+
+    @property
+    def pending(self):
+        """Compressed data left over by the last max_length"""
+        return self._obj.unconsumed_tail
+
+    def decompress(self, data, max_length):
+        return self._obj.decompress(data, max_length)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class DeflateDecoder(ZlibDecoder):
+    """Deflate with a zlib header, or raw deflate as some servers send it"""
+    def __init__(self):
+        super(DeflateDecoder, self).__init__(zlib.MAX_WBITS)
+        self._started = False
+
+    def decompress(self, data, max_length):
+        if self._started:
+            return self._obj.decompress(data, max_length)
+        try:
+            result = self._obj.decompress(data, max_length)
+        except zlib.error:
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            result = self._obj.decompress(data, max_length)
+        self._started = True
+        return result
+
+
+class BrotliDecoder(object):
+    pending = b''
+
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data, max_length):
+        return self._obj.process(data)
+
+    def flush(self):
+        return b''
+
+
+# Content-Encoding: decoder, brotli when available
+DECODERS = {'gzip': ZlibDecoder, 'deflate': DeflateDecoder}
+ACCEPT_ENCODING = 'gzip, deflate'
+if brotli is not None:
+    DECODERS['br'] = BrotliDecoder
+    ACCEPT_ENCODING += ', br'
+
+
+class DecompressingReader(object):
+    """
+    Reads and decompresses a response body a chunk at a time.
+
+    >>> reader = DecompressingReader(response.read, 'gzip')
+    >>> parser = EnvelopeParser(reader.read)
+
+    ``read(size)`` returns at most ``size`` decompressed bytes (all of them
+    without size), reading ``chunk_size`` compressed bytes when needed, so
+    neither the whole compressed body nor the whole decompressed one are held
+    unless asked for. ``compressed`` counts the bytes read from the response
+    so far and ``decompressed`` what they gave.
+    """
+    def __init__(self, read, encoding, chunk_size=16384):
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.compressed = 0
+        self.decompressed = 0
+        self._read = read
+        self._decoder = DECODERS[encoding]()
+        self._buffer = b''
+        self._eof = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                chunk = self.read(self.chunk_size)
+                if not chunk:
+                    return b''.join(chunks)
+                chunks.append(chunk)
+        while not self._buffer and not self._eof:
+            self._fill(max(size, self.chunk_size))
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def _fill(self, max_length):
+        decoder = self._decoder
+        data = decoder.pending
+        if not data:
+            data = self._read(self.chunk_size)
+            self.compressed += len(data)
+            if not data:
+                self._eof = True
+                self._buffer = decoder.flush()
+                self.decompressed += len(self._buffer)
+                return
+        self._buffer = decoder.decompress(data, max_length)
+        self.decompressed += len(self._buffer)
@@ -17,4 +17,16 @@ class InvalidAccessToken(APIError):
 
 
 class RateLimitError(APIError):
+    # Calls left and unix timestamp of the reset, when the API reported them
+    remaining = None
+    reset = None
+
+
+class ServerError(APIError):
+    """The API answered with something that is not a JSON response"""
+    pass
+
+
+class ExportError(APIError):
+    """A forum export failed, or its dump could not be downloaded"""
     pass
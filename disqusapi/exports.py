@@ -0,0 +1,287 @@
+"""
+Whole forum exports (exports.exportForum)
+
+>>> export = ForumExport(api, 'disqus')
+>>> for kind, item in export.items():
+...     if kind == 'post':
+...         print(item['id'], item['author']['name'])
+
+The export is started, its status polled with a growing interval until its
+dump is ready, and the gzipped XML dump is downloaded and parsed while it is
+read: memory use does not depend on the size of the forum. Items are dicts
+shaped like the API ones (a subset of their fields, as found in the dump).
+"""
+import time
+
+from disqusapi.compat import HTTPConnection, HTTPSConnection, urljoin, urlparse
+from disqusapi.compression import DecompressingReader
+from disqusapi.exceptions import ExportError
+
+try:
+    from xml.etree import cElementTree as ElementTree
+except ImportError:  # pragma: no cover
+    from xml.etree import ElementTree
+
+DISQUS = '{http://disqus.com}'
+INTERNALS = '{http://disqus.com/disqus-internals}'
+DSQ_ID = INTERNALS + 'id'
+
+READY = ('complete', 'completed', 'done')
+FAILED = ('failed', 'error')
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+def _text(element, name):
+    child = element.find(DISQUS + name)
+    if child is None or child.text is None:
+        return None
+    return child.text
+
+
+def _bool(element, name):
+    return _text(element, name) == 'true'
+
+
+def _date(element, name):
+    value = _text(element, name)
+    if value and value.endswith('Z'):
+        value = value[:-1]
+    return value
+
+
+def _ref(element, name):
+    child = element.find(DISQUS + name)
+    if child is None:
+        return None
+    return child.get(DSQ_ID)
+
+
+def _author(element):
+    author = element.find(DISQUS + 'author')
+    if author is None:
+        return None
+    return {
+        'name': _text(author, 'name'),
+        'username': _text(author, 'username'),
+        'email': _text(author, 'email'),
+        'isAnonymous': _bool(author, 'isAnonymous'),
+    }
+
+
+def parse_category(element):
+    return {
+        'id': element.get(DSQ_ID),
+        'forum': _text(element, 'forum'),
+        'title': _text(element, 'title'),
+        'isDefault': _bool(element, 'isDefault'),
+    }
+
+
+def parse_thread(element):
+    identifier = _text(element, 'id')
+    return {
+        'id': element.get(DSQ_ID),
+        'forum': _text(element, 'forum'),
+        'category': _ref(element, 'category'),
+        'identifiers': [identifier] if identifier else [],
+        'link': _text(element, 'link'),
+        'title': _text(element, 'title'),
+        'message': _text(element, 'message') or '',
+        'createdAt': _date(element, 'createdAt'),
+        'author': _author(element),
+        'ipAddress': _text(element, 'ipAddress'),
+        'isClosed': _bool(element, 'isClosed'),
+        'isDeleted': _bool(element, 'isDeleted'),
+    }
+
+
+def parse_post(element):
+    parent = _ref(element, 'parent')
+    return {
+        'id': element.get(DSQ_ID),
+        'thread': _ref(element, 'thread'),
+        'parent': int(parent) if parent else None,
+        'message': _text(element, 'message') or '',
+        'createdAt': _date(element, 'createdAt'),
+        'author': _author(element),
+        'ipAddress': _text(element, 'ipAddress'),
+        'isDeleted': _bool(element, 'isDeleted'),
+        'isSpam': _bool(element, 'isSpam'),
+    }
+
+
+PARSERS = {
+    DISQUS + 'category': ('category', parse_category),
+    DISQUS + 'thread': ('thread', parse_thread),
+    DISQUS + 'post': ('post', parse_post),
+}
+
+
+def parse_dump(source):
+    """
+    Yield (kind, item) for each category, thread and post of an XML dump.
+
+    ``source`` is a file name or a file like object. Elements are dropped
+    once parsed, so memory use stays constant.
+    """
+    root = None
+    depth = 0
+    for event, element in ElementTree.iterparse(source, ('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            depth += 1
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+        parser = PARSERS.get(element.tag)
+        if parser is not None:
+            yield parser[0], parser[1](element)
+        # Forget the parsed elements
+        root.clear()
+
+
+class ForumExport(object):
+    """
+    Drives an export of a forum.
+
+    ``start`` asks for the export (exports.exportForum), ``wait`` polls
+    ``status_endpoint`` (called with ``export``, the id of the export, and
+    ``method``) every ``interval`` seconds, growing by ``backoff`` up to
+    ``max_interval``, until its status is ready and it has a ``url``.
+    ExportError is raised when it fails or is not ready after ``timeout``
+    seconds. exportForum only starts exports: set ``status_endpoint`` to how
+    your account gets their status.
+
+    The dump is read ``chunk_size`` bytes at a time through ``conn`` (by
+    default an HTTP(S)Connection to the host of its url), following
+    redirects.
+    """
+    def __init__(self, api, forum, status_endpoint='exports/details',
+                 method='GET', interval=5, backoff=2, max_interval=300,
+                 timeout=86400, chunk_size=65536, conn=None,
+                 clock=time.time, sleep=time.sleep):
+        self.api = api
+        self.forum = forum
+        self.status_endpoint = status_endpoint
+        self.method = method
+        self.interval = interval
+        self.backoff = backoff
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.conn = conn
+        self.export = None
+        self.url = None
+        self.polls = 0
+        self._clock = clock
+        self._sleep = sleep
+
+    def _endpoint(self, path):
+        endpoint = self.api
+        for name in path.split('/'):
+            endpoint = getattr(endpoint, name)
+        return endpoint
+
+    def start(self):
+        """Ask for the export, returns what the API answered"""
+        result = self.api.exports.exportForum(forum=self.forum)
+        self.export = getattr(result, 'response', result)
+        return self.export
+
+    def status(self):
+        """Current state of the export"""
+        self.polls += 1
+        result = self._endpoint(self.status_endpoint)(
+            export=self.export['id'], method=self.method)
+        self.export = getattr(result, 'response', result)
+        return self.export
+
+    def _ready(self, export):
+        status = '%s' % (export.get('status') or '',)
+        if status.lower() in FAILED:
+            raise ExportError(
+                None, 'Export %s failed: %s' % (export.get('id'), status))
+        return status.lower() in READY and bool(export.get('url'))
+
+    def wait(self):
+        """Poll the status until the dump is ready, returns its url"""
+        if self.export is None:
+            self.start()
+        deadline = self._clock() + self.timeout
+        interval = self.interval
+        export = self.export
+        while not self._ready(export):
+            if self._clock() + interval > deadline:
+                raise ExportError(None, 'Export %s not ready after %s seconds'
+                                  % (export.get('id'), self.timeout))
+            self._sleep(interval)
+            interval = min(interval * self.backoff, self.max_interval)
+            export = self.status()
+        return export['url']
+
+    def open(self, url=None, redirects=5):
+        """Response to the download of the dump"""
+        url = url or self.wait()
+        for _ in range(redirects + 1):
+            parts = urlparse(url)
+            if self.conn is not None:
+                conn = self.conn(parts.netloc)
+            elif parts.scheme == 'http':
+                conn = HTTPConnection(parts.netloc)
+            else:
+                conn = HTTPSConnection(parts.netloc)
+            path = parts.path or '/'
+            if parts.query:
+                path = '%s?%s' % (path, parts.query)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            location = response.getheader('Location')
+            if response.status in REDIRECTS and location:
+                response.read()
+                conn.close()
+                url = urljoin(url, location)
+                continue
+            if response.status != 200:
+                conn.close()
+                raise ExportError(
+                    response.status, 'Could not download %s' % url)
+            self.url = url
+            return response
+        raise ExportError(None, 'Too many redirects downloading the dump')
+
+    def chunks(self, url=None):
+        """Yield the dump as it is downloaded"""
+        response = self.open(url)
+        try:
+            while True:
+                chunk = response.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            response.close()
+
+    def save(self, path, url=None):
+        """Write the (compressed) dump to a file, returns its size"""
+        size = 0
+        with open(path, 'wb') as target:
+            for chunk in self.chunks(url):
+                target.write(chunk)
+                size += len(chunk)
+        return size
+
+    def items(self, url=None):
+        """Yield (kind, item) while the dump is downloaded"""
+        response = self.open(url)
+        try:
+            source = response
+            if urlparse(self.url).path.endswith('.gz') or \
+                    response.getheader('Content-Encoding') == 'gzip':
+                source = DecompressingReader(
+                    response.read, 'gzip', self.chunk_size)
+            for item in parse_dump(source):
+                yield item
+        finally:
+            response.close()
@@ -0,0 +1,80 @@
+"""
+JSON codecs decoding API responses
+
+>>> api = DisqusAPI('secret_key', json_backend='simplejson')
+
+The fastest installed codec is used by default: orjson, ujson, simplejson
+(a dependency) or the standard library json.
+"""
+import json
+
+import simplejson
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JSONBackend(object):
+    """
+    A JSON codec.
+
+    ``loads`` takes bytes or text and raises ValueError on invalid
+    documents, ``dumps`` returns UTF-8 encoded bytes.
+    """
+    def __init__(self, name, loads, dumps):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return '<JSONBackend %s>' % self.name
+
+
+def _encoded(dumps, **options):
+    return lambda value: dumps(value, **options).encode('utf-8')
+
+
+BACKENDS = {
+    'simplejson': JSONBackend(
+        'simplejson', simplejson.loads,
+        _encoded(simplejson.dumps, ensure_ascii=False)),
+    'json': JSONBackend(
+        'json', json.loads, _encoded(json.dumps, ensure_ascii=False)),
+}
+if ujson is not None:
+    BACKENDS['ujson'] = JSONBackend(
+        'ujson', ujson.loads, _encoded(ujson.dumps, ensure_ascii=False))
+if orjson is not None:
+    BACKENDS['orjson'] = JSONBackend('orjson', orjson.loads, orjson.dumps)
+
+# Fastest first
+PREFERENCE = ('orjson', 'ujson', 'simplejson', 'json')
+
+
+def get_backend(backend=None):
+    """
+    The backend named, the fastest installed one by default.
+
+    Anything else with ``loads`` and ``dumps`` (a JSONBackend) is returned
+    as is.
+    """
+    if backend is None:
+        for name in PREFERENCE:
+            if name in BACKENDS:
+                return BACKENDS[name]
+    if not isinstance(backend, str):
+        return backend
+    try:
+        return BACKENDS[backend]
+    except KeyError:
+        raise ValueError('JSON backend not installed: %s' % backend)
+
+
+DEFAULT_BACKEND = get_backend()
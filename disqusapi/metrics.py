@@ -0,0 +1,250 @@
+"""
+Instrumentation of API calls
+
+>>> latency = LatencyHistograms()
+>>> rate = Throughput()
+>>> api = DisqusAPI('secret_key', instrument=Instrumentation(
+...     after=[latency, rate, LoggingExporter()]))
+>>> api.posts.list(forum='disqus')
+>>> latency.percentiles('posts/list')
+{50: 0.21, 95: 0.35, 99: 0.6}
+>>> print(prometheus_text(latency, rate))
+
+Hooks are callables getting the ``Call`` being made: ``before`` hooks when it
+starts, ``after`` hooks once it is done (or failed). Without instrumentation
+the client does not time anything.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+# Phases of a call, in order
+PHASES = ('connect', 'send', 'first_byte', 'read', 'decode')
+
+
+class Call(object):
+    """
+    What happened during an API call.
+
+    ``timings`` holds the seconds spent in each phase, summed over the
+    attempts: ``connect`` (only for new connections), ``send``,
+    ``first_byte`` (waiting for the status line and headers), ``read`` and
+    ``decode``. Streamed responses are read and decoded while iterated, after
+    the call is done, so those are not timed and ``received`` is None.
+
+    ``sent`` and ``received`` are in bytes (url and body sent, body read),
+    ``decompressed`` is the size of compressed bodies once decompressed
+    (None when there were none), ``cache`` is 'hit', 'miss', 'coalesced'
+    (the result of an identical call in flight) or None without cache,
+    ``error`` the exception raised if any.
+    """
+    def __init__(self, method, path, clock=time.time):
+        self.method = method
+        self.path = path
+        self.status = None
+        self.timings = dict.fromkeys(PHASES, 0.0)
+        self.sent = 0
+        self.received = None
+        self.decompressed = None
+        self.attempts = 0
+        self.cache = None
+        self.error = None
+        self.elapsed = None
+        self._clock = clock
+        self.started = clock()
+
+    def __repr__(self):
+        return '<Call %s %s: %s>' % (self.method, self.path, self.status)
+
+    @property
+    def retries(self):
+        return max(self.attempts - 1, 0)
+
+    def time(self, phase, func, *args):
+        """Call func adding its duration to the phase"""
+        start = self._clock()
+        try:
+            return func(*args)
+        finally:
+            self.timings[phase] += self._clock() - start
+
+    def send(self, conn, method, path, data, headers):
+        """Send the request through conn, returns the response"""
+        if getattr(conn, 'sock', True) is None:
+            self.time('connect', conn.connect)
+        self.time('send', conn.request, method, path, data, headers)
+        return self.time('first_byte', conn.getresponse)
+
+    def finish(self):
+        self.elapsed = self._clock() - self.started
+
+
+class Instrumentation(object):
+    """Runs the hooks around each call of a client"""
+    def __init__(self, before=(), after=(), clock=time.time):
+        self.before = list(before)
+        self.after = list(after)
+        self._clock = clock
+
+    def start(self, method, path):
+        call = Call(method, path, self._clock)
+        for hook in self.before:
+            hook(call)
+        return call
+
+    def finish(self, call):
+        call.finish()
+        for hook in self.after:
+            hook(call)
+
+
+class Histogram(object):
+    """
+    Log bucketed histogram of positive values.
+
+    Buckets grow by ``factor``, so percentiles are off by less than that
+    ratio, using constant memory whatever the number of values.
+    """
+    def __init__(self, factor=1.1, minimum=1e-4):
+        self.factor = factor
+        self.minimum = minimum
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._log_factor = math.log(factor)
+        self._buckets = {}
+
+    def add(self, value):
+        if value <= self.minimum:
+            index = 0
+        else:
+            index = int(math.ceil(
+                math.log(value / self.minimum) / self._log_factor))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """Upper bound of the values below the percentile, None when empty"""
+        if not self.count:
+            return None
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                break
+        return min(self.minimum * self.factor ** index, self.max)
+
+
+class LatencyHistograms(object):
+    """After hook keeping a latency histogram per endpoint"""
+    percents = (50, 95, 99)
+
+    def __init__(self, factor=1.1):
+        self.factor = factor
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, call):
+        with self._lock:
+            histogram = self.histograms.get(call.path)
+            if histogram is None:
+                histogram = self.histograms[call.path] = Histogram(
+                    self.factor)
+            histogram.add(call.elapsed)
+
+    def percentiles(self, path):
+        """Latency percentiles (p50, p95 and p99) of an endpoint"""
+        with self._lock:
+            histogram = self.histograms.get(path)
+            if histogram is None:
+                return None
+            return dict((percent, histogram.percentile(percent))
+                        for percent in self.percents)
+
+    def summary(self):
+        """Percentiles of every endpoint"""
+        return dict((path, self.percentiles(path))
+                    for path in sorted(self.histograms))
+
+
+class Throughput(object):
+    """After hook counting calls, and calls per second over ``window``"""
+    def __init__(self, window=60, clock=time.time):
+        self.window = window
+        self.calls = 0
+        self.errors = 0
+        self._clock = clock
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def __call__(self, call):
+        with self._lock:
+            self.calls += 1
+            if call.error is not None:
+                self.errors += 1
+            self._recent.append(self._clock())
+            self._expire()
+
+    def _expire(self):
+        oldest = self._clock() - self.window
+        while self._recent and self._recent[0] < oldest:
+            self._recent.popleft()
+
+    def rate(self):
+        """Calls per second over the last window"""
+        with self._lock:
+            self._expire()
+            return len(self._recent) / float(self.window)
+
+
+class LoggingExporter(object):
+    """After hook logging a line per call"""
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('disqusapi')
+        self.level = level
+
+    def __call__(self, call):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self.logger.log(
+            self.level,
+            '%s %s status=%s elapsed=%.4f %s sent=%s received=%s '
+            'decompressed=%s retries=%s cache=%s%s',
+            call.method, call.path, call.status, call.elapsed,
+            ' '.join('%s=%.4f' % (phase, call.timings[phase])
+                     for phase in PHASES),
+            call.sent, call.received, call.decompressed, call.retries,
+            call.cache,
+            '' if call.error is None else ' error=%r' % (call.error,))
+
+
+def prometheus_text(latency=None, throughput=None, prefix='disqusapi'):
+    """Prometheus text format dump of the aggregators"""
+    lines = []
+    if latency is not None:
+        name = '%s_call_seconds' % prefix
+        lines.append('# TYPE %s summary' % name)
+        with latency._lock:
+            histograms = sorted(latency.histograms.items())
+            for path, histogram in histograms:
+                for percent in latency.percents:
+                    lines.append('%s{endpoint="%s",quantile="%s"} %r' % (
+                        name, path, percent / 100.0,
+                        histogram.percentile(percent)))
+                lines.append('%s_sum{endpoint="%s"} %r' % (
+                    name, path, histogram.total))
+                lines.append('%s_count{endpoint="%s"} %d' % (
+                    name, path, histogram.count))
+    if throughput is not None:
+        lines.append('# TYPE %s_calls_total counter' % prefix)
+        lines.append('%s_calls_total %d' % (prefix, throughput.calls))
+        lines.append('# TYPE %s_errors_total counter' % prefix)
+        lines.append('%s_errors_total %d' % (prefix, throughput.errors))
+        lines.append('# TYPE %s_calls_per_second gauge' % prefix)
+        lines.append('%s_calls_per_second %r' % (prefix, throughput.rate()))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,411 @@
+"""
+Local SQLite mirror of threads and posts
+
+>>> mirror = Mirror('disqus.db')
+>>> mirror.refresh(api, 'disqus')
+>>> api = DisqusAPI('secret_key', cache=MirrorCache(mirror, max_age=300))
+>>> api.threads.list(forum='disqus')
+
+``refresh`` fetches the threads and posts of a forum created since the last
+refresh (the first one fetches everything) and upserts them. While the forum
+was refreshed less than ``max_age`` seconds ago, MirrorCache answers the
+supported list and details calls from the mirror, cursors included; other
+calls (or stale forums) go to the API, and the items they return are upserted
+too.
+"""
+import sqlite3
+import threading
+import time
+
+import simplejson
+
+from disqusapi import Result
+from disqusapi.checkpoint import CheckpointStore
+from disqusapi.records import Record
+from disqusapi.sync import IncrementalSync
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS threads (id INTEGER PRIMARY KEY, '
+    'forum TEXT, author TEXT, created_at TEXT, data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS threads_forum '
+    'ON threads (forum, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS threads_author '
+    'ON threads (author, created_at, id)',
+    'CREATE TABLE IF NOT EXISTS posts (id INTEGER PRIMARY KEY, '
+    'forum TEXT, thread INTEGER, author TEXT, parent INTEGER, '
+    'created_at TEXT, data TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS posts_forum '
+    'ON posts (forum, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS posts_thread '
+    'ON posts (thread, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS posts_author '
+    'ON posts (author, created_at, id)',
+    'CREATE INDEX IF NOT EXISTS posts_parent ON posts (parent, created_at)',
+    'CREATE TABLE IF NOT EXISTS refreshes (kind TEXT, forum TEXT, '
+    'refreshed_at REAL, PRIMARY KEY (kind, forum))',
+    'CREATE TABLE IF NOT EXISTS marks (key TEXT PRIMARY KEY, '
+    'state TEXT NOT NULL)',
+)
+
+KINDS = ('threads', 'posts')
+CURSOR_PREFIX = 'mirror:'
+MAX_LIMIT = 100
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ref(item, name):
+    """Id of a related object, expanded (``related=...``) or not"""
+    value = item.get(name)
+    if isinstance(value, dict):
+        return value.get('id')
+    return value
+
+
+def _plain(item):
+    """Records (``records=True`` clients) as the dicts they were built from"""
+    return item.to_dict() if isinstance(item, Record) else item
+
+
+def _row(kind, item):
+    item = _plain(item)
+    if kind == 'threads':
+        return (int(item['id']), _ref(item, 'forum'), _ref(item, 'author'),
+                item.get('createdAt'), simplejson.dumps(item))
+    return (int(item['id']), _ref(item, 'forum'),
+            _int(_ref(item, 'thread')), _ref(item, 'author'),
+            _int(item.get('parent')), item.get('createdAt'),
+            simplejson.dumps(item))
+
+
+INSERTS = {
+    'threads': 'INSERT OR REPLACE INTO threads (id, forum, author, '
+               'created_at, data) VALUES (?, ?, ?, ?, ?)',
+    'posts': 'INSERT OR REPLACE INTO posts (id, forum, thread, author, '
+             'parent, created_at, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+}
+
+
+def encode_cursor(item):
+    return '%s%s:%s' % (CURSOR_PREFIX, item['id'], item.get('createdAt'))
+
+
+def decode_cursor(cursor):
+    """Id and date of the last item of the previous page"""
+    ident, _, created_at = cursor[len(CURSOR_PREFIX):].partition(':')
+    return int(ident), created_at
+
+
+def since_date(since):
+    """ISO date of a ``since`` parameter (a date or a unix timestamp)"""
+    since = '%s' % (since,)
+    if since.isdigit():
+        return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(int(since)))
+    return since
+
+
+class MirrorMarks(CheckpointStore):
+    """IncrementalSync marks kept in the mirror's database"""
+    def __init__(self, mirror):
+        self.mirror = mirror
+
+    def load(self, key):
+        rows = self.mirror.execute(
+            'SELECT state FROM marks WHERE key = ?', key)
+        return simplejson.loads(rows[0][0]) if rows else None
+
+    def save(self, key, state):
+        self.mirror.execute('INSERT OR REPLACE INTO marks (key, state) '
+                            'VALUES (?, ?)', key, simplejson.dumps(state))
+
+    def clear(self, key):
+        self.mirror.execute('DELETE FROM marks WHERE key = ?', key)
+
+
+class Mirror(object):
+    """
+    Threads and posts in an indexed SQLite database.
+
+    Items are kept as returned by the API, indexed by forum, thread, author,
+    creation date and (posts) parent. One connection is shared by threads,
+    so ``path`` may be ':memory:'.
+    """
+    def __init__(self, path, batch_size=500, clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.marks = MirrorMarks(self)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+
+    def close(self):
+        self._db.close()
+
+    def execute(self, query, *args):
+        """Run a query in its own transaction, returns its rows"""
+        with self._lock, self._db:
+            return self._db.execute(query, args).fetchall()
+
+    def upsert(self, kind, items):
+        """Insert or replace items, returns how many there were"""
+        insert = INSERTS[kind]
+        count = 0
+        batch = []
+        for item in items:
+            batch.append(_row(kind, item))
+            if len(batch) >= self.batch_size:
+                count += self._write(insert, batch)
+                batch = []
+        return count + self._write(insert, batch)
+
+    def _write(self, insert, rows):
+        # Items are pulled (maybe from the API) before taking the lock
+        if rows:
+            with self._lock, self._db:
+                self._db.executemany(insert, rows)
+        return len(rows)
+
+    def refresh(self, api, forum, kinds=KINDS):
+        """
+        Upsert the items created since the last refresh of the forum.
+
+        Returns how many there were by kind. Edits and deletions of items
+        already mirrored are only seen by calls going to the API (or a
+        ``reset`` before the refresh).
+        """
+        started = self._clock()
+        sync = IncrementalSync(api, self.marks)
+        counts = {}
+        for kind in kinds:
+            counts[kind] = self.upsert(
+                kind, sync('%s/list' % kind, forum, limit=MAX_LIMIT))
+            self.execute('INSERT OR REPLACE INTO refreshes '
+                         '(kind, forum, refreshed_at) VALUES (?, ?, ?)',
+                         kind, forum, started)
+        return counts
+
+    def reset(self, forum, kinds=KINDS):
+        """Forget the items of a forum, the next refresh fetches them all"""
+        for kind in kinds:
+            self.execute('DELETE FROM %s WHERE forum = ?' % kind, forum)
+            IncrementalSync(None, self.marks).reset('%s/list' % kind, forum)
+        self.expire(kinds, forum)
+
+    def expire(self, kinds=KINDS, forum=None):
+        """Mark forums (all of them by default) as not fresh"""
+        for kind in kinds:
+            if forum is None:
+                self.execute('DELETE FROM refreshes WHERE kind = ?', kind)
+            else:
+                self.execute('DELETE FROM refreshes WHERE kind = ? '
+                             'AND forum = ?', kind, forum)
+
+    def age(self, kind, forum):
+        """Seconds since the last refresh, None if never refreshed"""
+        rows = self.execute('SELECT refreshed_at FROM refreshes '
+                            'WHERE kind = ? AND forum = ?', kind, forum)
+        return self._clock() - rows[0][0] if rows else None
+
+    def details(self, kind, ident):
+        """An item by id, None when not mirrored"""
+        rows = self.execute(
+            'SELECT data FROM %s WHERE id = ?' % kind, _int(ident))
+        return simplejson.loads(rows[0][0]) if rows else None
+
+    def forum_of(self, kind, ident):
+        """Forum of a mirrored item, None when not mirrored"""
+        rows = self.execute(
+            'SELECT forum FROM %s WHERE id = ?' % kind, _int(ident))
+        return rows[0][0] if rows else None
+
+    def children(self, post):
+        """Direct replies to a post, oldest first"""
+        rows = self.execute('SELECT data FROM posts WHERE parent = ? '
+                            'ORDER BY created_at, id', _int(post))
+        return [simplejson.loads(row[0]) for row in rows]
+
+    def list(self, kind, forum=None, thread=None, author=None, since=None,
+             order='desc', limit=25, cursor=None):
+        """
+        A page of items, newest first unless ``order`` is 'asc'.
+
+        Returns a Result with an API like cursor: its ``id`` (the position
+        of the last item) is the ``cursor`` of the next page.
+        """
+        conditions = []
+        args = []
+        for column, value in (('forum', forum), ('author', author)):
+            if value is not None:
+                conditions.append('%s = ?' % column)
+                args.append(value)
+        if thread is not None:
+            conditions.append('%s = ?' % ('id' if kind == 'threads'
+                                           else 'thread'))
+            args.append(_int(thread))
+        if since is not None:
+            conditions.append('created_at >= ?')
+            args.append(since_date(since))
+        ascending = order == 'asc'
+        if cursor:
+            ident, created_at = decode_cursor(cursor)
+            conditions.append('(created_at %s ? OR (created_at = ? AND '
+                              'id %s ?))' % (('>', '>') if ascending
+                                             else ('<', '<')))
+            args.extend([created_at, created_at, ident])
+        direction = 'ASC' if ascending else 'DESC'
+        query = 'SELECT data FROM %s%s ORDER BY created_at %s, id %s ' \
+                'LIMIT ?' % (kind, ' WHERE ' + ' AND '.join(conditions)
+                             if conditions else '', direction, direction)
+        args.append(limit + 1)
+        rows = self.execute(query, *args)
+        items = [simplejson.loads(row[0]) for row in rows[:limit]]
+        more = len(rows) > limit
+        position = encode_cursor(items[-1]) if items else cursor
+        return Result(items, {
+            'id': position,
+            'next': position if more else None,
+            'prev': None,
+            'hasNext': more,
+            'hasPrev': bool(cursor),
+            'more': more,
+            'total': None,
+        })
+
+
+# Endpoint: kind of items, parameter naming the item of details endpoints
+ENDPOINTS = {
+    'threads/list': ('threads', None),
+    'forums/listThreads': ('threads', None),
+    'posts/list': ('posts', None),
+    'threads/listPosts': ('posts', None),
+    'forums/listPosts': ('posts', None),
+    'threads/details': ('threads', 'thread'),
+    'posts/details': ('posts', 'post'),
+}
+LIST_PARAMS = {
+    'threads': frozenset(['forum', 'thread', 'author', 'since', 'order',
+                          'limit', 'cursor']),
+    'posts': frozenset(['forum', 'thread', 'since', 'order', 'limit',
+                        'cursor']),
+}
+# Default parameters of DisqusAPI, not filters
+AUTH_PARAMS = frozenset(['api_secret', 'api_key', 'access_token'])
+
+
+def _listed(item):
+    """Whether lists show the item by default (not deleted nor spam)"""
+    return not item.get('isDeleted') and not item.get('isSpam') and \
+        item.get('isApproved', True) is not False
+
+
+class MirrorCache(object):
+    """
+    Read-through cache (``DisqusAPI(cache=...)``) answering from a Mirror.
+
+    Calls of the ``ENDPOINTS`` filtering on what is mirrored (forum, thread,
+    author of threads, since) are answered from it when their forum was
+    refreshed less than ``max_age`` seconds ago, or when they follow a
+    cursor it gave. Items returned by the API to calls it could answer (with
+    the default filters of the API) are upserted, unless deleted or spam,
+    and a successful POST on threads or posts marks every forum as not fresh.
+    """
+    def __init__(self, mirror, max_age=300):
+        self.mirror = mirror
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, params):
+        result = self._answer(path, params)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _fresh(self, kind, forum):
+        age = self.mirror.age(kind, forum)
+        return age is not None and age < self.max_age
+
+    def _answer(self, path, params):
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return None
+        kind, detail_param = endpoint
+        args = {}
+        for name, value in params:
+            if name in AUTH_PARAMS:
+                continue
+            if name in args:
+                return None
+            args[name] = value
+
+        mirror = self.mirror
+        if detail_param is not None:
+            ident = args.pop(detail_param, None)
+            if args or _int(ident) is None:
+                return None
+            item = mirror.details(kind, ident)
+            if item is None or not self._fresh(kind, _ref(item, 'forum')):
+                return None
+            return item
+
+        if not LIST_PARAMS[kind].issuperset(args):
+            return None
+        cursor = args.get('cursor')
+        if cursor and not cursor.startswith(CURSOR_PREFIX):
+            return None
+        limit = _int(args.get('limit', 25))
+        if limit is None or not 0 < limit <= MAX_LIMIT or \
+                args.get('order', 'desc') not in ('asc', 'desc'):
+            return None
+        if 'thread' in args and _int(args['thread']) is None:
+            return None
+        forum = args.get('forum')
+        if forum is None and 'thread' in args:
+            forum = mirror.forum_of('threads', args['thread'])
+        if forum is None:
+            return None
+        # Pages after the first one follow the mirror, even once stale
+        if not cursor and not self._fresh(kind, forum):
+            return None
+        return mirror.list(kind, forum, args.get('thread'),
+                           args.get('author'), args.get('since'),
+                           args.get('order', 'desc'), limit, cursor)
+
+    def set(self, path, params, value):
+        endpoint = ENDPOINTS.get(path)
+        if endpoint is None:
+            return
+        kind, detail_param = endpoint
+        allowed = LIST_PARAMS[kind] if detail_param is None \
+            else (detail_param,)
+        # Other filters (include=spam...) return what lists do not show
+        if any(name not in allowed and name not in AUTH_PARAMS
+               for name, _ in params):
+            return
+        response = getattr(value, 'response', value)
+        if isinstance(response, dict):
+            response = [response]
+        if isinstance(response, list):
+            response = [_plain(item) for item in response]
+            self.mirror.upsert(kind, [item for item in response
+                                      if isinstance(item, dict)
+                                      and _int(item.get('id')) is not None
+                                      and _listed(item)])
+
+    def invalidate(self, path):
+        family = path.split('/')[0]
+        if family in KINDS:
+            self.mirror.expire((family,))
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses)
@@ -0,0 +1,235 @@
+"""
+Batched moderation of posts
+
+>>> queue = ModerationQueue(api, callback=print)
+>>> for post in spam_wave:
+...     queue.spam(post['id'], forum=post['forum'])
+>>> results = queue.close()
+>>> failed = [result.post for result in results if not result.ok]
+
+Actions are grouped by action and forum, and each group is sent as one call
+with the ``post`` parameter repeated, instead of a call per post.
+"""
+import logging
+import threading
+import time
+
+from disqusapi.compat import Empty, Queue
+from disqusapi.exceptions import (
+    APIError,
+    InvalidAccessToken,
+    RateLimitError,
+    ServerError)
+
+# Action: most posts per call (highlighting takes a single post)
+ACTIONS = {
+    'approve': 100,
+    'remove': 100,
+    'restore': 100,
+    'spam': 100,
+    'highlight': 1,
+    'unhighlight': 1,
+}
+
+# API errors failing every post of a call alike: missing authentication,
+# invalid or unauthorized key, missing privileges, expired token
+AUTH_ERROR_CODES = frozenset([4, 5, 9, 11, 12, 18])
+
+_STOP = object()
+
+logger = logging.getLogger('disqusapi')
+
+
+class ActionResult(object):
+    """Outcome of an action on a post, ``error`` is None if it succeeded"""
+    def __init__(self, action, post, forum=None, error=None):
+        self.action = action
+        self.post = post
+        self.forum = forum
+        self.error = error
+
+    def __repr__(self):
+        return '<ActionResult %s %s: %s>' % (
+            self.action, self.post, 'ok' if self.ok else repr(self.error))
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ModerationQueue(object):
+    """
+    Queue of moderation actions sent in batches.
+
+    ``queue.remove(ids, forum='disqus')`` (or ``queue.add('remove', ids,
+    forum)``) queues posts in the group of the action and forum; ``forum``
+    only groups (and labels) the actions. A group is flushed once it holds
+    ``batch_size`` posts (at most what the endpoint takes) or its oldest one
+    waited ``max_age`` seconds. Flushes are sent by ``workers`` threads,
+    started by the first action queued, which also flush the groups getting
+    old while idle: give the client a RateLimiter (and a RetryPolicy) to
+    keep them within the rate limit.
+
+    Each post gets an ActionResult, passed to ``callback`` (from the worker
+    threads) and kept in ``results``. When a call fails with an API error
+    other than a rate limit, server or authentication one, its posts are
+    split in halves and retried, so a single bad post only fails itself.
+    """
+    def __init__(self, api, batch_size=100, max_age=5, workers=4,
+                 callback=None, split_failed=True, clock=time.time):
+        self.api = api
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.workers = workers
+        self.callback = callback
+        self.split_failed = split_failed
+        self.results = []
+        self.calls = 0
+        self._clock = clock
+        # (action, forum): post ids and when the first one was queued
+        self._groups = {}
+        self._jobs = Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, action):
+        if action not in ACTIONS:
+            raise AttributeError(action)
+
+        def add(posts, forum=None):
+            return self.add(action, posts, forum)
+        return add
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        """Posts waiting to be flushed"""
+        with self._lock:
+            return sum(len(posts) for posts, _ in self._groups.values())
+
+    def add(self, action, posts, forum=None):
+        """Queue an action on a post id (or several)"""
+        if action not in ACTIONS:
+            raise ValueError('Unknown action: %s' % action)
+        if isinstance(posts, (str, int)) or not hasattr(posts, '__iter__'):
+            posts = [posts]
+        size = min(self.batch_size, ACTIONS[action])
+        key = (action, forum)
+        with self._lock:
+            for post in posts:
+                group = self._groups.get(key)
+                if group is None:
+                    group = self._groups[key] = ([], self._clock())
+                if str(post) not in group[0]:
+                    group[0].append(str(post))
+                if len(group[0]) >= size:
+                    self._submit(key)
+            if not self._threads:
+                # Flushes the groups once old, even if no other comes
+                self._start()
+        self.poll()
+
+    def poll(self):
+        """Flush the groups waiting for ``max_age`` seconds or more"""
+        oldest = self._clock() - self.max_age
+        with self._lock:
+            for key in [key for key, (_, since) in self._groups.items()
+                        if since <= oldest]:
+                self._submit(key)
+
+    def flush(self, wait=True):
+        """Flush every group, waiting until they are sent by default"""
+        with self._lock:
+            for key in list(self._groups):
+                self._submit(key)
+        if wait:
+            self._jobs.join()
+
+    def close(self):
+        """Flush, wait and stop the workers, returns every result"""
+        self.flush()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._jobs.put(_STOP)
+        for thread in threads:
+            thread.join()
+        return self.results
+
+    def _submit(self, key):
+        """Hand a group to the workers (holding the lock)"""
+        posts, _ = self._groups.pop(key)
+        self._jobs.put((key[0], key[1], posts))
+        if len(self._threads) < self.workers:
+            self._start()
+
+    def _start(self):
+        """Start a worker (holding the lock)"""
+        thread = threading.Thread(target=self._work)
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+
+    def _work(self):
+        interval = max(self.max_age / 2.0, 0.01)
+        while True:
+            try:
+                job = self._jobs.get(timeout=interval)
+            except Empty:
+                self.poll()
+                continue
+            try:
+                if job is _STOP:
+                    return
+                self._report(self.send(*job))
+            except Exception:
+                logger.exception('Moderation flush failed')
+            finally:
+                self._jobs.task_done()
+
+    def _report(self, results):
+        with self._lock:
+            self.results.extend(results)
+        if self.callback is not None:
+            for result in results:
+                self.callback(result)
+
+    def send(self, action, forum, posts):
+        """Call the endpoint for the posts, returns their results"""
+        endpoint = getattr(self.api.posts, action)
+        with self._lock:
+            self.calls += 1
+        try:
+            result = endpoint(post=list(posts))
+        except Exception as error:
+            if self.split_failed and len(posts) > 1 and _splittable(error):
+                middle = len(posts) // 2
+                return self.send(action, forum, posts[:middle]) + \
+                    self.send(action, forum, posts[middle:])
+            return [ActionResult(action, post, forum, error)
+                    for post in posts]
+
+        # The API lists the posts it acted on, others failed
+        response = getattr(result, 'response', result)
+        done = None
+        if isinstance(response, list):
+            done = set(str(item['id']) for item in response
+                       if isinstance(item, dict) and 'id' in item)
+        results = []
+        for post in posts:
+            error = None
+            if done is not None and post not in done:
+                error = APIError(None, 'Post %s not in the response' % post)
+            results.append(ActionResult(action, post, forum, error))
+        return results
+
+
+def _splittable(error):
+    """Whether an error may come from some of the posts of a call only"""
+    return isinstance(error, APIError) and not isinstance(
+        error, (RateLimitError, ServerError, InvalidAccessToken)) and \
+        error.code not in AUTH_ERROR_CODES
@@ -1,6 +1,11 @@
 """Cursor and other goodies for DisquisAPI methods"""
-from disqusapi import Result
+import threading
+import time
+
+from disqusapi import Result, params_list
+from disqusapi.compat import Empty, Full, Queue
 from disqusapi.exceptions import RateLimitError
+from disqusapi.utils import get_normalized_params
 
 
 class Paginator(object):
@@ -23,6 +28,29 @@ class Paginator(object):
 
     >>> for result in paginator(silence_limit=True):
     >>>     print(result)
+
+    Or wait for the rate limit to reset when you do:
+
+    >>> for result in paginator(wait_limit=True):
+    >>>     print(result)
+
+    Retry failed pages, resuming from the last cursor:
+
+    >>> from disqusapi.retry import RetryPolicy
+    >>> for result in paginator(retry=RetryPolicy(attempts=5)):
+    >>>     print(result)
+
+    Fetch up to two pages ahead in the background while consuming results:
+
+    >>> for result in paginator(prefetch=2):
+    >>>     print(result)
+
+    Save progress every 10 pages, so a restarted walk goes on from there:
+
+    >>> from disqusapi.checkpoint import FileCheckpointStore
+    >>> store = FileCheckpointStore('checkpoints.json')
+    >>> for result in paginator(checkpoint=store, checkpoint_every=10):
+    >>>     print(result)
     """
 
     def __init__(self, endpoint, **params):
@@ -33,42 +61,155 @@ class Paginator(object):
         for result in self():
             yield result
 
-    def __call__(self, limit=None, silence_limit=False):
+    def __call__(self, limit=None, silence_limit=False, prefetch=0,
+                 wait_limit=False, retry=None, checkpoint=None,
+                 checkpoint_every=1, checkpoint_key=None):
         endpoint = self.endpoint
-        if silence_limit:
+        if retry is not None:
+            endpoint = retrying(endpoint, retry)
+        if wait_limit:
+            endpoint = wait_for_reset(endpoint)
+        elif silence_limit:
             endpoint = ignore_limit(endpoint)
-        endpoint = use_cursor(endpoint)
+        if checkpoint is not None:
+            endpoint = use_checkpoint(
+                endpoint, checkpoint, checkpoint_key or self.checkpoint_key(),
+                checkpoint_every, prefetch)
+        else:
+            endpoint = use_cursor(endpoint, prefetch)
         if limit is not None:
             endpoint = limit_amount(endpoint, limit)
-        for result in endpoint(**self.params):
-            yield result
+        results = endpoint(**self.params)
+        try:
+            for result in results:
+                yield result
+        finally:
+            _close(results)
+
+    def checkpoint_key(self):
+        """Default checkpoint key: the endpoint and its parameters"""
+        name = '/'.join(getattr(self.endpoint, 'tree', ())) or \
+            getattr(self.endpoint, '__name__', 'endpoint')
+        return '%s?%s' % (
+            name, get_normalized_params(params_list(self.params)))
+
+    def resume(self, checkpoint, checkpoint_key=None, **options):
+        """
+        Go on with a walk from its last checkpoint.
+
+        Raises ValueError when there is no checkpoint to resume from.
+        """
+        checkpoint_key = checkpoint_key or self.checkpoint_key()
+        if checkpoint.load(checkpoint_key) is None:
+            raise ValueError('No checkpoint for %s' % checkpoint_key)
+        return self(
+            checkpoint=checkpoint, checkpoint_key=checkpoint_key, **options)
+
+
+def _close(results):
+    """Close results (or pages) left before their end, if they can be"""
+    close = getattr(results, 'close', None)
+    if close is not None:
+        close()
 
 
 def limit_amount(endpoint, limit):
     def wrapped(**kwargs):
         count = 0
-        for result in endpoint(**kwargs):
-            yield result
-            count += 1
-            if limit == count:
-                break
+        results = endpoint(**kwargs)
+        try:
+            for result in results:
+                yield result
+                count += 1
+                if limit == count:
+                    break
+        finally:
+            _close(results)
     return wrapped
 
 
-def use_cursor(endpoint):
+def use_cursor(endpoint, prefetch=0):
     def wrapped(**kwargs):
-        while True:
-            results = endpoint(**kwargs)
-            for result in results:
-                yield result
+        pages = iter_pages(endpoint, **kwargs)
+        if prefetch:
+            pages = in_background([pages], 1, prefetch)
+        results = None
+        try:
+            for results in pages:
+                for result in results:
+                    yield result
+        finally:
+            _close(results)
+            _close(pages)
+    return wrapped
 
-            if results.cursor and results.cursor['more']:
-                kwargs['cursor'] = results.cursor['id']
-            else:
-                break
+
+def use_checkpoint(endpoint, store, key, every=1, prefetch=0):
+    """
+    Follow the cursor saving progress in a checkpoint store.
+
+    Every ``every`` pages the cursor of the next page, the number of results
+    so far, the parameters and the ids of the page just consumed are saved
+    under ``key``. A walk with the same parameters starts from a saved
+    checkpoint, skipping results already seen in the previous page (they
+    move to the next one when newer results are added). The checkpoint is
+    removed once the walk ends.
+    """
+    def wrapped(**kwargs):
+        query = get_normalized_params(params_list(kwargs))
+        state = store.load(key)
+        count = 0
+        seen = frozenset()
+        if state is not None and state['query'] == query:
+            kwargs['cursor'] = state['cursor']
+            count = state['count']
+            seen = frozenset(state['seen'])
+
+        pages = iter_pages(endpoint, **kwargs)
+        if prefetch:
+            pages = in_background([pages], 1, prefetch)
+        number = 0
+        results = None
+        try:
+            for results in pages:
+                ids = []
+                for result in results:
+                    ident = result.get('id') \
+                        if hasattr(result, 'get') else None
+                    ids.append(ident)
+                    if ident is not None and ident in seen:
+                        continue
+                    yield result
+                    count += 1
+                seen = frozenset()
+                number += 1
+
+                cursor = results.cursor
+                if not (cursor and cursor['more']):
+                    break
+                if number % every == 0:
+                    store.save(key, dict(
+                        cursor=cursor['id'], count=count, query=query,
+                        seen=ids))
+        finally:
+            _close(results)
+            _close(pages)
+        store.clear(key)
     return wrapped
 
 
+def iter_pages(endpoint, **kwargs):
+    """Yield every page of results following the cursor"""
+    while True:
+        results = endpoint(**kwargs)
+        yield results
+
+        if results.cursor and results.cursor['more']:
+            kwargs['cursor'] = results.cursor['id']
+        else:
+            break
+
+
 def ignore_limit(endpoint):
     def wrapped(**kwargs):
         try:
@@ -76,3 +217,155 @@ def ignore_limit(endpoint):
         except RateLimitError:
             return Result([])
     return wrapped
+
+
+def retrying(endpoint, policy):
+    """
+    Retry failing pages following a RetryPolicy.
+
+    Only the failed call is repeated, with the same cursor, so the walk goes
+    on from the last page fetched. POST endpoints are retried too: listing is
+    safe to repeat.
+    """
+    def wrapped(**kwargs):
+        return policy.call(endpoint, **kwargs)
+    return wrapped
+
+
+def wait_for_reset(endpoint, default_wait=60, clock=time.time,
+                   sleep=time.sleep):
+    """
+    Retry calls over the rate limit once it resets.
+
+    Sleeps until the reset time reported with the error, or ``default_wait``
+    seconds when it is unknown.
+    """
+    def wrapped(**kwargs):
+        while True:
+            try:
+                return endpoint(**kwargs)
+            except RateLimitError as error:
+                wait = default_wait
+                if error.reset is not None:
+                    wait = max(error.reset - clock(), 1)
+                sleep(wait)
+    return wrapped
+
+
+class MultiPaginator(object):
+    """
+    Paginate through several independent queries at once:
+
+    >>> from disqusapi.paginator import MultiPaginator
+    >>> paginator = MultiPaginator(
+    >>>     api.posts.list, [{'forum': 'disqus'}, {'forum': 'other'}],
+    >>>     workers=4, limit=100)
+    >>> for result in paginator:
+    >>>     print(result)
+
+    Each query (``params`` merged over the common keyword arguments) is walked
+    by one of ``workers`` threads and their results are merged, in no
+    particular order, into a single stream. Calling it accepts the same
+    options as Paginator, ``limit`` applies to the merged stream.
+    """
+
+    def __init__(self, endpoint, params, workers=4, **common):
+        self.endpoint = endpoint
+        self.params = params
+        self.workers = workers
+        self.common = common
+
+    def __iter__(self):
+        for result in self():
+            yield result
+
+    def __call__(self, limit=None, silence_limit=False, prefetch=0,
+                 wait_limit=False, retry=None):
+        paginators = [
+            Paginator(self.endpoint, **dict(self.common, **params))(
+                silence_limit=silence_limit, prefetch=prefetch,
+                wait_limit=wait_limit, retry=retry)
+            for params in self.params]
+        results = in_background(
+            paginators, self.workers, self.workers * 100)
+        count = 0
+        try:
+            for result in results:
+                if limit == count:
+                    break
+                yield result
+                count += 1
+        finally:
+            results.close()
+
+
+_DONE = object()
+
+
+def in_background(sources, workers, size):
+    """
+    Consume iterables in background threads, yielding their items.
+
+    Up to ``workers`` of the ``sources`` are walked at the same time and no
+    more than ``size`` items wait to be consumed. Errors in a source are
+    raised in the consumer, and the threads stop when the consumer does:
+    items left unconsumed are closed then (pages holding a connection).
+    """
+    sources = iter(sources)
+    lock = threading.Lock()
+    stop = threading.Event()
+    queue = Queue(size)
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+            except Full:
+                continue
+            if stop.is_set():
+                # Put after the consumer drained the queue
+                drain()
+            return True
+        _close(item[0])
+        return False
+
+    def drain():
+        while True:
+            try:
+                item, _ = queue.get_nowait()
+            except Empty:
+                return
+            _close(item)
+
+    def work():
+        try:
+            while True:
+                with lock:
+                    source = next(sources, _DONE)
+                if source is _DONE:
+                    break
+                for item in source:
+                    if not put((item, None)):
+                        return
+        except Exception as error:
+            put((_DONE, error))
+        put((_DONE, None))
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    running = workers
+    try:
+        while running:
+            item, error = queue.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                running -= 1
+            else:
+                yield item
+    finally:
+        stop.set()
+        drain()
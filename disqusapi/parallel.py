@@ -0,0 +1,269 @@
+"""
+Parallel export of many forums (or threads) with a process pool
+
+>>> export = ParallelExport(
+...     functools.partial(DisqusAPI, 'secret_key', pool_size=2),
+...     'posts/list', 'exports/', processes=8)
+>>> stats = export.run(['forum1', 'forum2', 'forum3'], progress=print)
+
+Each shard (the value of ``shard_param``) is walked by one of the worker
+processes into its own file. Workers build their own client with ``client``,
+a picklable callable taking a ``ratelimit`` keyword argument, and share the
+rate limit budget of the key through a SharedRateLimiter.
+"""
+import math
+import multiprocessing
+import os
+import re
+import time
+
+import simplejson
+
+from disqusapi.compat import Empty
+from disqusapi.paginator import Paginator
+from disqusapi.ratelimit import RateLimiter
+
+NAN = float('nan')
+
+
+def _shared(index):
+    def get(self):
+        value = self._state[index]
+        return None if math.isnan(value) else value
+
+    def set(self, value):
+        self._state[index] = NAN if value is None else value
+    return property(get, set)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose budget is shared by several processes.
+
+    Its state lives in shared memory, so it must reach the workers when they
+    start (as a Pool initializer argument, for instance).
+    """
+    remaining = _shared(0)
+    reset = _shared(1)
+    _tokens = _shared(2)
+    _last = _shared(3)
+    _rate = _shared(4)
+
+    def __init__(self, burst=10, reserve=0, clock=time.time,
+                 sleep=time.sleep, context=multiprocessing):
+        self._state = context.Array('d', [NAN] * 5)
+        super(SharedRateLimiter, self).__init__(burst, reserve, clock, sleep)
+        self._lock = self._state.get_lock()
+
+    def __getstate__(self):
+        return (self.burst, self.reserve, self.waited, self._clock,
+                self._sleep, self._state)
+
+    def __setstate__(self, state):
+        (self.burst, self.reserve, self.waited, self._clock, self._sleep,
+         self._state) = state
+        self._lock = self._state.get_lock()
+
+
+class JSONLinesWriter(object):
+    """Writes items as JSON, one per line"""
+    def __init__(self, path):
+        self._file = open(path, 'w')
+
+    def write(self, item):
+        self._file.write(simplejson.dumps(item))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.close()
+
+
+class ColumnarWriter(object):
+    """Writes items into a Parquet or Feather file through a ColumnarSink"""
+    def __init__(self, path, schema, format='parquet'):
+        from disqusapi import columnar
+        writer_class = {'parquet': columnar.ParquetWriter,
+                        'feather': columnar.FeatherWriter}[format]
+        self._sink = columnar.ColumnarSink(schema, writer_class(path, schema))
+
+    def write(self, item):
+        self._sink.append(item)
+
+    def close(self):
+        self._sink.close()
+
+
+EXTENSIONS = {'jsonl': 'jsonl', 'parquet': 'parquet', 'feather': 'arrow'}
+
+# Worker process state: the export, its rate limiter, the progress queue
+# and its client, built by the first shard
+_worker = None
+
+
+def _init_worker(export, limiter, progress):
+    global _worker
+    _worker = [export, limiter, progress, None]
+
+
+def _export_shard(shard):
+    export, limiter, progress, api = _worker
+    if api is None:
+        # Built here, a failing pool initializer is respawned forever
+        try:
+            api = _worker[3] = export.client(ratelimit=limiter)
+        except Exception as error:
+            stats = export.stats(shard)
+            stats.update(done=True, error=_error(error))
+            progress.put(stats)
+            return stats
+    stats = export.export_shard(api, shard, progress.put)
+    # Through the queue too, so it is reported after the shard progress
+    progress.put(stats)
+    return stats
+
+
+def _error(error):
+    return '%s: %s' % (type(error).__name__, error)
+
+
+class ParallelExport(object):
+    """
+    Export an endpoint for many shards with a process pool.
+
+    ``params`` are passed to every call of ``endpoint`` (a path such as
+    'posts/list'), along with the shard as ``shard_param``. Items go through
+    ``transform`` (if any, a picklable callable; items it returns None for
+    are skipped) and are written to ``directory`` as JSON lines, or in a
+    columnar ``format`` ('parquet' or 'feather') following ``schema``. Files
+    are written with a '.part' suffix, removed once the shard is done.
+
+    ``processes=0`` exports in the calling process, one shard at a time.
+    """
+    def __init__(self, client, endpoint, directory, shard_param='forum',
+                 params=None, format='jsonl', schema=None, transform=None,
+                 processes=4, burst=10, reserve=0, progress_every=1000):
+        if format not in EXTENSIONS:
+            raise ValueError('Unknown format: %s' % format)
+        if format != 'jsonl' and schema is None:
+            raise ValueError('%s output needs a schema' % format)
+        self.client = client
+        self.endpoint = endpoint
+        self.directory = directory
+        self.shard_param = shard_param
+        self.params = params or {}
+        self.format = format
+        self.schema = schema
+        self.transform = transform
+        self.processes = processes
+        self.burst = burst
+        self.reserve = reserve
+        self.progress_every = progress_every
+
+    def path(self, shard):
+        name = re.sub(r'[^\w.-]', '_', '%s' % (shard,))
+        return os.path.join(
+            self.directory, '%s.%s' % (name, EXTENSIONS[self.format]))
+
+    def run(self, shards, progress=None, context=multiprocessing):
+        """
+        Export every shard, returns their stats by shard.
+
+        ``progress`` is called in this process with the stats of a shard
+        every ``progress_every`` items and once it is done. Stats are dicts
+        with the ``shard``, its ``path``, the ``items`` written, the
+        ``seconds`` spent, whether it is ``done`` and the ``error`` that
+        stopped it (None if it did not fail).
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        if not self.processes:
+            return self._run_here(shards, progress)
+
+        limiter = SharedRateLimiter(self.burst, self.reserve, context=context)
+        queue = context.Queue()
+        pool = context.Pool(
+            self.processes, _init_worker, (self, limiter, queue))
+        stats = {}
+        try:
+            pending = [pool.apply_async(_export_shard, (shard,))
+                       for shard in shards]
+            pool.close()
+            while pending:
+                self._forward(queue, progress, 0.05)
+                for result in [result for result in pending
+                               if result.ready()]:
+                    pending.remove(result)
+                    shard_stats = result.get()
+                    stats[shard_stats['shard']] = shard_stats
+            pool.join()
+        finally:
+            pool.terminate()
+        self._forward(queue, progress)
+        return stats
+
+    def _forward(self, queue, progress, timeout=None):
+        """Hand the progress reports of the workers to the callback"""
+        while True:
+            try:
+                if timeout is None:
+                    report = queue.get_nowait()
+                else:
+                    report = queue.get(timeout=timeout)
+                    timeout = None
+            except Empty:
+                return
+            if progress is not None:
+                progress(report)
+
+    def _run_here(self, shards, progress):
+        api = self.client(ratelimit=RateLimiter(self.burst, self.reserve))
+        stats = {}
+        for shard in shards:
+            stats[shard] = self.export_shard(api, shard, progress)
+            if progress is not None:
+                progress(stats[shard])
+        return stats
+
+    def _writer(self, path):
+        if self.format == 'jsonl':
+            return JSONLinesWriter(path)
+        return ColumnarWriter(path, self.schema, self.format)
+
+    def stats(self, shard):
+        """Stats of a shard not exported yet"""
+        return dict(shard=shard, path=self.path(shard), items=0, seconds=0,
+                    done=False, error=None)
+
+    def export_shard(self, api, shard, progress=None):
+        """Write the items of a shard, returns its stats"""
+        start = time.time()
+        stats = self.stats(shard)
+        path = stats['path']
+        endpoint = api
+        for name in self.endpoint.split('/'):
+            endpoint = getattr(endpoint, name)
+        params = dict(self.params)
+        params[self.shard_param] = shard
+        transform = self.transform
+        writer = self._writer(path + '.part')
+        try:
+            for item in Paginator(endpoint, **params):
+                if transform is not None:
+                    item = transform(item)
+                    if item is None:
+                        continue
+                writer.write(item)
+                stats['items'] += 1
+                if progress is not None and \
+                        stats['items'] % self.progress_every == 0:
+                    stats['seconds'] = time.time() - start
+                    progress(dict(stats))
+        except Exception as error:
+            stats['error'] = _error(error)
+        finally:
+            writer.close()
+        if stats['error'] is None:
+            os.rename(path + '.part', path)
+        stats['done'] = True
+        stats['seconds'] = time.time() - start
+        return stats
@@ -0,0 +1,167 @@
+"""Persistent keep-alive connections for DisqusRequest"""
+import errno
+import select
+import socket
+import threading
+import time
+
+from disqusapi.compat import HTTPSConnection, RemoteDisconnected
+
+# Errors of a kept-alive connection the server closed
+STALE_ERRNOS = (errno.EPIPE, errno.ECONNRESET, errno.ECONNABORTED)
+
+
+def is_stale(error):
+    """Whether the server dropped the connection without answering"""
+    if isinstance(error, socket.timeout):
+        return False
+    if isinstance(error, RemoteDisconnected):
+        return True
+    return getattr(error, 'errno', None) in STALE_ERRNOS
+
+
+def is_dropped(conn):
+    """Whether the server closed an idle connection (it is readable)"""
+    sock = getattr(conn, 'sock', None)
+    if not isinstance(sock, socket.socket):
+        return False
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (socket.error, ValueError):
+        return True
+
+
+class ConnectionPool(object):
+    """
+    Thread safe pool of keep-alive connections to a single host.
+
+    >>> pool = ConnectionPool('disqus.com', size=4)
+    >>> response, body = pool.urlopen('GET', '/api/3.0/...', '', headers)
+
+    Up to ``size`` idle connections are kept around. Connections idle for
+    longer than ``max_idle`` seconds are closed instead of being reused, and so
+    are the ones the server closed meanwhile. A GET sent on a reused
+    connection the server dropped without answering is sent again on a fresh
+    one; other methods are never sent twice, nor requests that timed out.
+
+    ``hits`` counts requests served by a pooled connection and ``misses``
+    the ones that needed a new connection.
+    """
+    # Methods safe to send again on a fresh connection
+    resend_methods = ('GET', 'HEAD')
+
+    def __init__(self, host, conn=HTTPSConnection, size=10, max_idle=60,
+                 clock=time.time):
+        self.host = host
+        self.size = size
+        self.max_idle = max_idle
+        self.hits = 0
+        self.misses = 0
+        self._conn = conn
+        self._clock = clock
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._idle)
+
+    def get(self):
+        """Return an idle connection or a new one"""
+        return self._checkout()[0]
+
+    def _checkout(self):
+        now = self._clock()
+        expired = []
+        conn = None
+        with self._lock:
+            while self._idle:
+                candidate, last_used = self._idle.pop()
+                if now - last_used > self.max_idle or \
+                        is_dropped(candidate):
+                    expired.append(candidate)
+                else:
+                    conn = candidate
+                    break
+            if conn is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        for candidate in expired:
+            candidate.close()
+        if conn is None:
+            return self._conn(self.host), False
+        return conn, True
+
+    def put(self, conn):
+        """Give back a connection whose last response was fully read"""
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((conn, self._clock()))
+                return
+        conn.close()
+
+    def discard(self, conn):
+        """Drop a connection that must not be reused"""
+        conn.close()
+
+    def clear(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            conn.close()
+
+    def urlopen(self, method, path, data, headers):
+        """
+        Send a request through a pooled connection.
+
+        Returns the response and its body, the connection is back in the pool
+        by then.
+        """
+        conn, response = self.open(method, path, data, headers)
+        try:
+            body = response.read()
+        except:
+            self.discard(conn)
+            raise
+        self.release(conn, response)
+        return response, body
+
+    def open(self, method, path, data, headers, call=None):
+        """
+        Send a request through a pooled connection.
+
+        Returns the connection and the response, ``release`` them once the
+        response is read. ``call`` (a disqusapi.metrics.Call) times it.
+        """
+        conn, reused = self._checkout()
+        try:
+            return conn, self._send(conn, method, path, data, headers, call)
+        except Exception as error:
+            self.discard(conn)
+            if not reused or method not in self.resend_methods or \
+                    not is_stale(error):
+                raise
+        # Stale keep-alive connection, try once with a fresh one
+        conn = self._conn(self.host)
+        try:
+            return conn, self._send(conn, method, path, data, headers, call)
+        except:
+            self.discard(conn)
+            raise
+
+    def release(self, conn, response):
+        """
+        Pool the connection again unless the server is closing it, or the
+        response was not fully read.
+        """
+        if response.will_close or not response.isclosed():
+            self.discard(conn)
+        else:
+            self.put(conn)
+
+    def _send(self, conn, method, path, data, headers, call=None):
+        if call is not None:
+            return call.send(conn, method, path, data, headers)
+        conn.request(method, path, data, headers)
+        return conn.getresponse()
@@ -0,0 +1,87 @@
+"""Client side pacing to stay under the API rate limit"""
+import threading
+import time
+
+
+def parse_headers(response):
+    """
+    Read the rate limit headers of a response.
+
+    Returns the remaining calls and the reset time (unix timestamp), None for
+    missing values.
+    """
+    values = []
+    for header in ('X-Ratelimit-Remaining', 'X-Ratelimit-Reset'):
+        try:
+            values.append(int(response.getheader(header)))
+        except (TypeError, ValueError):
+            values.append(None)
+    return tuple(values)
+
+
+class RateLimiter(object):
+    """
+    Token bucket governor fed by the API rate limit headers.
+
+    >>> limiter = RateLimiter()
+    >>> api = DisqusAPI('secret_key', ratelimit=limiter)
+
+    Share one instance between every client (and thread) using the same key.
+    Calls are paced so the remaining budget lasts until the window resets:
+    tokens refill at ``remaining / seconds to reset`` and up to ``burst`` of
+    them can be spent at once. Once only ``reserve`` calls are left,
+    ``acquire`` blocks until the reset time. Until the first response arrives
+    calls are not limited.
+    """
+    def __init__(self, burst=10, reserve=0, clock=time.time,
+                 sleep=time.sleep):
+        self.burst = burst
+        self.reserve = reserve
+        self.remaining = None
+        self.reset = None
+        self.waited = 0
+        self._tokens = burst
+        self._last = None
+        self._rate = None
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call can be made without going over the limit"""
+        with self._lock:
+            wait = self._reserve(self._clock())
+            self.waited += wait
+        if wait > 0:
+            self._sleep(wait)
+
+    def _reserve(self, now):
+        if self.remaining is None or self.reset is None or self.reset <= now:
+            return 0
+        if self.remaining <= self.reserve:
+            return self.reset - now
+        self.remaining -= 1
+
+        rate = self._rate
+        if self._last is not None:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * rate)
+        self._last = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / rate
+
+    def update(self, remaining, reset):
+        """Record the budget reported by the API"""
+        if remaining is None or reset is None:
+            return
+        with self._lock:
+            if reset != self.reset or self.remaining is None:
+                self.reset = reset
+                self.remaining = remaining
+            else:
+                # Responses of concurrent calls may arrive out of order
+                self.remaining = min(self.remaining, remaining)
+            seconds = max(self.reset - self._clock(), 1)
+            self._rate = max(self.remaining - self.reserve, 1) / float(seconds)
@@ -0,0 +1,260 @@
+"""Compact records for posts, threads, users, forums and categories"""
+from disqusapi.compat import intern
+
+
+class Record(object):
+    """
+    Slotted replacement of an API object dict.
+
+    Known keys are stored in slots (so instances carry no key strings) and
+    unknown ones in a small dict. Values are reachable as attributes or with
+    the usual (read only) dict operations:
+
+    >>> post.message == post['message'] == post.get('message')
+
+    Keys missing from the API object are missing from the record too.
+    """
+    __slots__ = ('_extra',)
+    fields = ()
+    _field_set = frozenset()
+    # Values repeated among many objects, stored once
+    interned = ()
+    # Keys holding nested objects, by record class name
+    nested = {}
+
+    def __init__(self, data):
+        extra = None
+        for key, value in data.items():
+            if key in self._field_set:
+                if key in self.interned and isinstance(value, str):
+                    value = intern(value)
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[intern(str(key))] = value
+        self._extra = extra
+
+    def __getattr__(self, attr):
+        extra = object.__getattribute__(self, '_extra')
+        if extra is not None and attr in extra:
+            return extra[attr]
+        raise AttributeError(attr)
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def keys(self):
+        keys = [key for key in self.fields if hasattr(self, key)]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def to_dict(self):
+        """Plain dict copy, nested records included"""
+        return dict(
+            (key, value.to_dict() if isinstance(value, Record) else value)
+            for key, value in self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and \
+                dict(self.items()) == dict(other.items())
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<%s: %r>' % (type(self).__name__, self.get('id'))
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __setstate__(self, state):
+        self.__init__(state)
+
+
+def record_class(name, fields, interned=(), nested=None):
+    """Build a Record subclass with a slot per field"""
+    return type(name, (Record,), dict(
+        __slots__=tuple(fields),
+        fields=tuple(fields),
+        _field_set=frozenset(fields),
+        interned=frozenset(interned),
+        nested=nested or {}))
+
+
+User = record_class('User', (
+    'id', 'username', 'name', 'about', 'url', 'profileUrl', 'avatar',
+    'isAnonymous', 'isPrivate', 'isPrimary', 'isPowerContributor',
+    'joinedAt', 'location', 'reputation', 'rep', 'emailHash',
+    'disable3rdPartyTrackers', 'signedUrl', 'numPosts', 'numLikesReceived',
+    'numFollowers', 'numFollowing', 'numForumsFollowing', 'isFollowing',
+    'isFollowedBy'),
+    interned=('joinedAt', 'location'))
+
+Forum = record_class('Forum', (
+    'id', 'pk', 'name', 'description', 'url', 'favicon', 'avatar', 'founder',
+    'language', 'createdAt', 'settings', 'channel', 'organizationId',
+    'adsReviewStatus', 'guidelines', 'disableDisqusBranding',
+    'raw_guidelines', 'signedUrl', 'daysThreadAlive', 'twitterName'),
+    interned=('id', 'founder', 'language'))
+
+Category = record_class('Category', (
+    'id', 'forum', 'title', 'order', 'isDefault'),
+    interned=('id', 'forum', 'title'),
+    nested={'forum': 'Forum'})
+
+Thread = record_class('Thread', (
+    'id', 'forum', 'category', 'author', 'title', 'clean_title', 'link',
+    'feed', 'slug', 'message', 'raw_message', 'identifiers', 'createdAt',
+    'isClosed', 'isDeleted', 'isSpam', 'posts', 'likes', 'dislikes',
+    'userScore', 'userSubscription', 'highlightedPost', 'signedLink',
+    'canModerate', 'canPost', 'reactions', 'ipAddress', 'validateAllPosts',
+    'sort', 'trackbacks'),
+    interned=('forum', 'category', 'author'),
+    nested={'forum': 'Forum', 'category': 'Category', 'author': 'User'})
+
+Post = record_class('Post', (
+    'id', 'parent', 'thread', 'forum', 'author', 'message', 'raw_message',
+    'createdAt', 'isApproved', 'isDeleted', 'isEdited', 'isFlagged',
+    'isHighlighted', 'isSpam', 'isJuliaFlagged', 'isAtFlagLimit',
+    'isNewUserNeedsApproval', 'likes', 'dislikes', 'points', 'numReports',
+    'media', 'canVote', 'userScore', 'moderationLabels', 'sb',
+    'approxLoc', 'ipAddress'),
+    interned=('thread', 'forum'),
+    nested={'thread': 'Thread', 'forum': 'Forum', 'author': 'User'})
+
+CLASSES = dict((cls.__name__, cls) for cls in (
+    User, Forum, Category, Thread, Post))
+
+# Last word of an endpoint name (lowercase) and its record class
+KINDS = (
+    ('posts', Post),
+    ('threads', Thread),
+    ('users', User),
+    ('moderators', User),
+    ('followers', User),
+    ('following', User),
+    ('forums', Forum),
+    ('categories', Category),
+)
+
+
+# Endpoints returning objects of their resource family
+GENERIC_METHODS = frozenset([
+    'details', 'getContext', 'create', 'update', 'list', 'listPopular',
+    'listHot', 'listSimilar'])
+
+
+def endpoint_class(path):
+    """
+    Record class of the objects an endpoint returns, None if unknown.
+
+    ``forums/listThreads`` returns threads, ``posts/listPopular`` posts.
+    """
+    resource, _, method = path.rpartition('/')
+    if method.startswith('list'):
+        cls = _kind(method[4:])
+        if cls is not None:
+            return cls
+    if method in GENERIC_METHODS:
+        return _kind(resource)
+    return None
+
+
+def _kind(name):
+    name = name.lower()
+    for suffix, cls in KINDS:
+        if name.endswith(suffix):
+            return cls
+    return None
+
+
+class RecordFactory(object):
+    """
+    Turns API objects into records.
+
+    >>> api = DisqusAPI('secret_key', records=True)
+
+    Nested objects (post authors, forums and threads when related) are
+    shared: an object equal to one already built is replaced by it, within a
+    page and across pages, for up to ``max_shared`` distinct objects.
+    ``shared`` counts how many were deduplicated.
+    """
+    def __init__(self, max_shared=100000):
+        self.max_shared = max_shared
+        self.shared = 0
+        self._shared = {}
+
+    def __call__(self, path, data):
+        """Record for an object returned by the endpoint at path"""
+        cls = endpoint_class(path)
+        if cls is None or not isinstance(data, dict):
+            return data
+        return self.build(cls, data)
+
+    def build(self, cls, data):
+        if cls.nested:
+            data = dict(data)
+            for key, name in cls.nested.items():
+                value = data.get(key)
+                if isinstance(value, dict):
+                    data[key] = self.share(CLASSES[name], value)
+        return cls(data)
+
+    def share(self, cls, data):
+        """Return the record built for an equal object, or build one"""
+        ident = data.get('id')
+        if ident is None:
+            return self.build(cls, data)
+        key = (cls, ident)
+        # Compared with the object the record was built from, plain dicts
+        # compare much faster than records
+        existing = self._shared.get(key)
+        if existing is not None and existing[0] == data:
+            self.shared += 1
+            return existing[1]
+        record = self.build(cls, data)
+        if len(self._shared) >= self.max_shared:
+            self._shared.clear()
+        self._shared[key] = (data, record)
+        return record
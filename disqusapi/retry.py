@@ -0,0 +1,73 @@
+"""Retry policy for transient failures"""
+import random
+import socket
+import time
+
+from disqusapi.compat import HTTPException
+from disqusapi.exceptions import APIError, ServerError
+
+
+class RetryPolicy(object):
+    """
+    Retries calls failing with transient errors.
+
+    >>> api = DisqusAPI('secret_key', retry=RetryPolicy(attempts=5))
+
+    A call is tried up to ``attempts`` times while it fails with one of
+    ``exceptions`` (network errors and non JSON answers by default) or an
+    APIError whose code is in ``codes``. Retries wait an exponential backoff
+    (``backoff * 2 ** retry``, at most ``max_backoff``) with full jitter, and
+    are given up when they would end past ``deadline`` seconds from the first
+    attempt.
+
+    POST endpoints are not idempotent so DisqusRequest does not retry them
+    unless ``retry_post`` is set.
+    """
+    def __init__(self, attempts=3, backoff=0.5, max_backoff=30,
+                 deadline=None, exceptions=(socket.error, HTTPException,
+                                            ServerError),
+                 codes=(15,), retry_post=False, clock=time.time,
+                 sleep=time.sleep, random=random.random):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.exceptions = exceptions
+        self.codes = codes
+        self.retry_post = retry_post
+        self.retries = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random
+
+    def allows(self, method):
+        """Whether calls with this HTTP method may be retried"""
+        return method != 'POST' or self.retry_post
+
+    def is_retryable(self, error):
+        if isinstance(error, self.exceptions):
+            return True
+        return isinstance(error, APIError) and error.code in self.codes
+
+    def delay(self, retry):
+        """Seconds to wait before the given retry (0 based)"""
+        return min(self.max_backoff, self.backoff * 2 ** retry) * \
+            self._random()
+
+    def call(self, func, *args, **kwargs):
+        start = self._clock()
+        retry = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as error:
+                if retry + 1 >= self.attempts or \
+                        not self.is_retryable(error):
+                    raise
+                delay = self.delay(retry)
+                if self.deadline is not None and \
+                        self._clock() + delay - start > self.deadline:
+                    raise
+            self._sleep(delay)
+            self.retries += 1
+            retry += 1
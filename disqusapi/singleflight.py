@@ -0,0 +1,57 @@
+"""Coalescing of identical calls in flight"""
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Runs a single call at a time per key.
+
+    >>> api = DisqusAPI('secret_key', coalesce=True)
+
+    Callers asking for a key already in flight wait for that call and share
+    its result, or its exception, instead of making their own. ``calls``
+    counts the calls made and ``coalesced`` the ones saved.
+    """
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Calls in flight"""
+        return len(self._calls)
+
+    def do(self, key, func, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
@@ -0,0 +1,195 @@
+"""Incremental decoding of API responses"""
+import codecs
+
+import simplejson
+
+from disqusapi import Result
+
+WHITESPACE = ' \t\n\r'
+
+
+class EnvelopeParser(object):
+    """
+    Decodes an API response as it is read.
+
+    >>> parser = EnvelopeParser(response.read)
+    >>> if parser.start():
+    >>>     for item in parser.items():
+    >>>         print(item)
+    >>> parser.envelope['cursor']
+
+    ``start`` reads the envelope up to its ``response`` key. When it holds a
+    list, the items are decoded one by one by ``items`` and the keys after it
+    (if any) are read once the list ends. Otherwise the whole envelope is
+    decoded and ``start`` returns False.
+    """
+    def __init__(self, read, chunk_size=16384):
+        self.envelope = {}
+        self._read = read
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = simplejson.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def start(self):
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            self._finish()
+            return False
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'response' and self._peek() == '[':
+                self._pos += 1
+                return True
+            self.envelope[key] = self._value()
+            if not self._next_member():
+                self._finish()
+                return False
+
+    def items(self):
+        if self._peek() == ']':
+            self._pos += 1
+        else:
+            while True:
+                yield self._value()
+                char = self._peek()
+                self._pos += 1
+                if char == ']':
+                    break
+                if char != ',':
+                    self._error('Expected , or ]')
+        while self._next_member():
+            key = self._value()
+            self._expect(':')
+            self.envelope[key] = self._value()
+        self._finish()
+
+    def _finish(self):
+        """Read up to the end, so the connection can be reused"""
+        while self._fill():
+            self._buffer = ''
+
+    def _next_member(self):
+        """Consume the separator after a member, False at the end"""
+        char = self._peek()
+        self._pos += 1
+        if char == '}':
+            return False
+        if char != ',':
+            self._error('Expected , or }')
+        return True
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = self._read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            chunk = b''
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk, self._eof)
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace and return the next character ('' at the end)"""
+        while True:
+            buffer = self._buffer
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buffer) or not self._fill():
+                return buffer[pos:pos + 1]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            self._error('Expected %s' % char)
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+            # A number could continue in the next chunk
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def _error(self, message):
+        raise ValueError('%s at %d: %r' % (
+            message, self._pos, self._buffer[self._pos:self._pos + 20]))
+
+
+class StreamResult(Result):
+    """
+    Result whose items are decoded while they are iterated.
+
+    Items are not kept: iterate it once. Accessing ``response`` (or using
+    ``len`` and indexes) decodes and keeps the remaining items, as does
+    reading ``cursor`` when the API sent it after them.
+
+    The connection is released once the items are read, or dropped by
+    ``close`` (or when an iteration is stopped early) if some are left.
+
+    ``build`` is applied to each item when given.
+    """
+    def __init__(self, parser, release=None, build=None):
+        self._parser = parser
+        self._items = parser.items()
+        if build is not None:
+            self._items = (build(item) for item in self._items)
+        self._release = release
+        self._response = None
+
+    def _consume(self):
+        try:
+            for item in self._items:
+                yield item
+        finally:
+            self.close()
+
+    def __iter__(self):
+        try:
+            for item in self._consume():
+                yield item
+        finally:
+            self.close()
+        # What response kept meanwhile (len() from list() does it)
+        if self._response is not None:
+            for item in self._response:
+                yield item
+
+    def close(self):
+        """Release the connection, the items not read yet are lost"""
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    @property
+    def response(self):
+        if self._response is None:
+            self._response = list(self._consume())
+        return self._response
+
+    @property
+    def cursor(self):
+        envelope = self._parser.envelope
+        if 'cursor' not in envelope and self._response is None:
+            self.response
+        return envelope.get('cursor') or {}
+
+    @property
+    def code(self):
+        return self._parser.envelope.get('code')
+
@@ -0,0 +1,517 @@
+"""
+Local stand-in for the Disqus API, for integration tests and benchmarks
+
+>>> with FakeDisqusServer(posts=1000, latency=0.01) as server:
+...     api = server.client(pool_size=4)
+...     for post in Paginator(api.posts.list, forum='fake'):
+...         print(post['id'])
+
+It serves synthetic posts and threads through the ``list`` and ``details``
+endpoints of both, with cursors, ``since`` and ``order``, rate limit headers
+and injected latency and errors. ``requests`` keeps what was asked for.
+Forum exports (exports/exportForum, then exports/details until complete)
+give a gzipped XML dump of the items. Posts are moderated through the
+approve, remove, restore, spam, highlight and unhighlight endpoints.
+"""
+import calendar
+import functools
+import random
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from xml.sax.saxutils import escape, quoteattr
+
+import simplejson
+
+from disqusapi import DisqusAPI, DisqusRequest
+from disqusapi.compat import (
+    BaseHTTPRequestHandler,
+    HTTPConnection,
+    HTTPServer,
+    ThreadingMixIn,
+    parse_qsl,
+    urlparse)
+from disqusapi.pool import ConnectionPool
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam '
+    'quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo '
+    'consequat').split()
+
+# First item date, items are a minute apart
+EPOCH = calendar.timegm((2014, 1, 1, 0, 0, 0))
+
+# Moderation endpoint: flag of the posts and its new value
+MODERATION = {
+    'approve': ('isApproved', True),
+    'remove': ('isDeleted', True),
+    'restore': ('isDeleted', False),
+    'spam': ('isSpam', True),
+    'highlight': ('isHighlighted', True),
+    'unhighlight': ('isHighlighted', False),
+}
+
+ERRORS = {
+    1: (404, 'Endpoint not valid'),
+    2: (400, 'Invalid argument'),
+    13: (429, 'You have exceeded your hourly limit of requests'),
+    15: (500, 'Internal server error'),
+}
+
+
+def date(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(timestamp))
+
+
+def text(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def make_user(number):
+    return {
+        'id': str(number),
+        'username': 'user%d' % number,
+        'name': 'User %d' % number,
+        'about': '',
+        'url': '',
+        'profileUrl': 'https://disqus.com/by/user%d/' % number,
+        'joinedAt': date(EPOCH - 86400 * number),
+        'isAnonymous': False,
+        'isPrivate': False,
+        'isPrimary': True,
+        'isPowerContributor': False,
+        'reputation': 1.0 + number % 7,
+        'avatar': {
+            'isCustom': False,
+            'permalink': 'https://disqus.com/api/users/avatars/user%d.jpg'
+                         % number,
+            'cache': 'https://a.disquscdn.com/uploads/users/%d/avatar92.jpg'
+                     % number,
+        },
+    }
+
+
+def make_thread(number, rng):
+    return {
+        'id': str(number),
+        'forum': 'fake',
+        'category': '1',
+        'author': str(number % 10 + 1),
+        'title': 'Thread %d' % number,
+        'clean_title': 'Thread %d' % number,
+        'slug': 'thread_%d' % number,
+        'link': 'http://example.com/threads/%d/' % number,
+        'feed': 'https://fake.disqus.com/thread_%d/latest.rss' % number,
+        'identifiers': ['thread-%d' % number],
+        'message': text(rng, 200),
+        'createdAt': date(EPOCH + 60 * number),
+        'posts': 0,
+        'likes': rng.randint(0, 50),
+        'dislikes': rng.randint(0, 5),
+        'userScore': 0,
+        'reactions': 0,
+        'isClosed': False,
+        'isDeleted': False,
+    }
+
+
+def make_post(number, threads, users, rng, message_size):
+    raw = text(rng, message_size)
+    likes = rng.randint(0, 20)
+    dislikes = rng.randint(0, 3)
+    return {
+        'id': str(number),
+        'forum': 'fake',
+        'thread': str(number % threads + 1),
+        'parent': None if number % 3 else max(number - 2, 1),
+        'author': make_user(number % users + 1),
+        'createdAt': date(EPOCH + 60 * number),
+        'raw_message': raw,
+        'message': '<p>%s</p>' % raw,
+        'likes': likes,
+        'dislikes': dislikes,
+        'points': likes - dislikes,
+        'numReports': 0,
+        'media': [],
+        'isApproved': True,
+        'isDeleted': False,
+        'isEdited': False,
+        'isFlagged': False,
+        'isHighlighted': False,
+        'isJuliaFlagged': True,
+        'isSpam': False,
+    }
+
+
+def _element(name, value, indent='  '):
+    if value is None:
+        return '%s<%s/>\n' % (indent, name)
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    return '%s<%s>%s</%s>\n' % (indent, name, escape('%s' % value), name)
+
+
+def make_dump(threads, posts):
+    """XML export dump of the items, as Disqus writes them"""
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<disqus xmlns="http://disqus.com" '
+        'xmlns:dsq="http://disqus.com/disqus-internals">\n'
+        '<category dsq:id="1">\n',
+        _element('forum', 'fake'),
+        _element('title', 'General'),
+        _element('isDefault', True),
+        '</category>\n']
+    for thread in threads:
+        author = make_user(int(thread['author']))
+        parts.extend([
+            '<thread dsq:id=%s>\n' % quoteattr(thread['id']),
+            _element('id', thread['identifiers'][0]),
+            _element('forum', thread['forum']),
+            '  <category dsq:id=%s/>\n' % quoteattr(thread['category']),
+            _element('link', thread['link']),
+            _element('title', thread['title']),
+            _element('message', thread['message']),
+            _element('createdAt', thread['createdAt'] + 'Z'),
+            '  <author>\n',
+            _element('name', author['name'], '    '),
+            _element('isAnonymous', False, '    '),
+            _element('username', author['username'], '    '),
+            '  </author>\n',
+            _element('isClosed', thread['isClosed']),
+            _element('isDeleted', thread['isDeleted']),
+            '</thread>\n'])
+    for post in posts:
+        parts.extend([
+            '<post dsq:id=%s>\n' % quoteattr(post['id']),
+            _element('id', None),
+            _element('message', post['message']),
+            _element('createdAt', post['createdAt'] + 'Z'),
+            _element('isDeleted', post['isDeleted']),
+            _element('isSpam', post['isSpam']),
+            '  <author>\n',
+            _element('name', post['author']['name'], '    '),
+            _element('isAnonymous', False, '    '),
+            _element('username', post['author']['username'], '    '),
+            '  </author>\n',
+            '  <thread dsq:id=%s/>\n' % quoteattr(post['thread'])])
+        if post['parent'] is not None:
+            parts.append(
+                '  <parent dsq:id="%d"/>\n' % post['parent'])
+        parts.append('</post>\n')
+    parts.append('</disqus>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def connect(address, host=None):
+    return HTTPConnection(address)
+
+
+def client(address, secret_key='secret', pool_size=None, **options):
+    """
+    DisqusAPI calling a fake server at address (host:port).
+
+    ``options`` are DisqusRequest's. Unlike FakeDisqusServer.client it can be
+    pickled with functools.partial, for other processes.
+    """
+    conn = functools.partial(connect, address)
+    api = DisqusAPI(secret_key)
+    pool = None
+    if pool_size:
+        pool = ConnectionPool(address, conn=conn, size=pool_size)
+    api.make_request = DisqusRequest(
+        dict(api_secret=secret_key), FakeDisqusServer.version, conn=conn,
+        pool=pool, **options)
+    return api
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # Headers and body are written apart, do not wait for delayed ACKs
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self._answer('GET', url.path, url.query)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8')
+        self._answer('POST', urlparse(self.path).path, body)
+
+    def _answer(self, method, path, query):
+        fake = self.server.fake
+        status, headers, body = fake.handle(
+            method, path, parse_qsl(query, keep_blank_values=True))
+        encoding = None
+        if headers.get('Content-Type') == 'application/json':
+            encoding, body = fake.compress_body(
+                body, self.headers.get('Accept-Encoding') or '')
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        self.send_response(status)
+        for name, value in sorted(headers.items()):
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    # Idle keep-alive connections would block server_close otherwise
+    block_on_close = False
+
+
+class FakeDisqusServer(object):
+    """
+    Fake API on a local port.
+
+    ``posts`` and ``threads`` are how many items there are, posts having
+    ``message_size`` characters. Every answer waits ``latency`` seconds;
+    ``ratelimit`` calls are allowed per ``window`` seconds (answering error
+    13 past that) and a random ``error_rate`` of them answer error 15.
+    Bodies are compressed with gzip or deflate when accepted, unless
+    ``compress`` is False. Exports are complete after ``export_polls`` calls
+    to exports/details.
+    """
+    version = '3.0'
+
+    def __init__(self, posts=1000, threads=100, users=50, message_size=400,
+                 latency=0, ratelimit=1000, window=3600, error_rate=0,
+                 compress=True, export_polls=2, seed=0):
+        rng = random.Random(seed)
+        self.items = {
+            'threads': [make_thread(number, rng)
+                        for number in range(1, threads + 1)],
+            'posts': [make_post(number, threads, users, rng, message_size)
+                      for number in range(1, posts + 1)],
+        }
+        for post in self.items['posts']:
+            self.items['threads'][int(post['thread']) - 1]['posts'] += 1
+        self.latency = latency
+        self.ratelimit = ratelimit
+        self.window = window
+        self.error_rate = error_rate
+        self.compress = compress
+        self.export_polls = export_polls
+        self.exports = {}
+        self.requests = []
+        self._rng = random.Random(seed)
+        self._failures = deque()
+        self._window_start = time.time()
+        self._used = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self._httpd = _HTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.fake = self
+        thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,))
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    @property
+    def address(self):
+        return '%s:%d' % self._httpd.server_address[:2]
+
+    def connection(self, host=None):
+        """Connection to the server, whatever the host asked for"""
+        return connect(self.address)
+
+    def client(self, secret_key='secret', pool_size=None, **options):
+        """DisqusAPI calling the server, options are DisqusRequest's"""
+        return client(self.address, secret_key, pool_size, **options)
+
+    def fail(self, code=15, times=1, status=None, body=None):
+        """Answer the next calls with an API error, or a raw body"""
+        for _ in range(times):
+            self._failures.append((code, status, body))
+
+    def handle(self, method, path, params):
+        """Status, headers and body answering a call"""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests.append((method, path, params))
+            now = time.time()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                self._used = 0
+            self._used += 1
+            remaining = self.ratelimit - self._used
+            failure = self._failures.popleft() if self._failures else None
+            random_error = self.error_rate and \
+                self._rng.random() < self.error_rate
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Ratelimit-Limit': str(self.ratelimit),
+            'X-Ratelimit-Remaining': str(max(remaining, 0)),
+            'X-Ratelimit-Reset': str(int(self._window_start + self.window)),
+        }
+        if remaining < 0:
+            return self.error(13, headers)
+        if failure is not None:
+            code, status, body = failure
+            if body is not None:
+                headers['Content-Type'] = 'text/html'
+                return status or 500, headers, body.encode('utf-8')
+            return self.error(code, headers, status)
+        if random_error:
+            return self.error(15, headers)
+
+        if path.startswith('/exports/'):
+            return self.download(path, headers)
+        prefix = '/api/%s/' % self.version
+        if not (path.startswith(prefix) and path.endswith('.json')):
+            return self.error(1, headers)
+        kind, _, action = path[len(prefix):-len('.json')].partition('/')
+        args = {}
+        for name, value in params:
+            args.setdefault(name, []).append(value)
+        if kind == 'exports':
+            return self.export(action, args, headers)
+        if kind == 'posts' and action in MODERATION and method == 'POST':
+            return self.moderate(action, args, headers)
+        if kind not in self.items or action not in ('list', 'details'):
+            return self.error(1, headers)
+        if action == 'details':
+            return self.details(kind, args, headers)
+        return self.list(kind, args, headers)
+
+    def export(self, action, args, headers):
+        if action == 'exportForum':
+            if 'forum' not in args:
+                return self.error(2, headers)
+            with self._lock:
+                ident = len(self.exports) + 1
+                self.exports[ident] = self.export_polls
+            return 200, headers, self.encode({'code': 0, 'response': {
+                'id': ident, 'forum': args['forum'][0], 'status': 'queued'}})
+        ident = args.get('export', [''])[0]
+        if action != 'details' or not ident.isdigit() or \
+                int(ident) not in self.exports:
+            return self.error(2, headers)
+        ident = int(ident)
+        with self._lock:
+            polls = self.exports[ident] = max(self.exports[ident] - 1, 0)
+        export = {'id': ident, 'status': 'processing' if polls else 'complete'}
+        if not polls:
+            export['url'] = 'http://%s/exports/%d.xml.gz' % (
+                self.address, ident)
+        return 200, headers, self.encode({'code': 0, 'response': export})
+
+    def moderate(self, action, args, headers):
+        """Flag every post, or none when one of them does not exist"""
+        posts = self.items['posts']
+        idents = args.get('post', [])
+        if not idents or not all(
+                ident.isdigit() and 0 < int(ident) <= len(posts)
+                for ident in idents):
+            return self.error(2, headers)
+        flag, value = MODERATION[action]
+        with self._lock:
+            for ident in idents:
+                posts[int(ident) - 1][flag] = value
+        return 200, headers, self.encode({'code': 0, 'response': [
+            {'id': ident} for ident in idents]})
+
+    def download(self, path, headers):
+        ident = path[len('/exports/'):-len('.xml.gz')]
+        if not path.endswith('.xml.gz') or not ident.isdigit() or \
+                self.exports.get(int(ident)) != 0:
+            return 404, {'Content-Type': 'text/plain'}, b'Not found'
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        dump = make_dump(self.items['threads'], self.items['posts'])
+        return 200, {'Content-Type': 'application/x-gzip'}, \
+            compressor.compress(dump) + compressor.flush()
+
+    def compress_body(self, body, accept_encoding):
+        """Content-Encoding (None when not compressed) and body"""
+        accepted = [encoding.split(';')[0].strip()
+                    for encoding in accept_encoding.lower().split(',')]
+        if not self.compress:
+            return None, body
+        for encoding, wbits in (('gzip', 16 + zlib.MAX_WBITS),
+                                ('deflate', zlib.MAX_WBITS)):
+            if encoding in accepted:
+                compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+                return encoding, compressor.compress(body) + \
+                    compressor.flush()
+        return None, body
+
+    def error(self, code, headers, status=None):
+        default_status, message = ERRORS.get(code, (500, 'Error'))
+        return status or default_status, headers, self.encode(
+            {'code': code, 'response': message})
+
+    def encode(self, data):
+        return simplejson.dumps(data).encode('utf-8')
+
+    def details(self, kind, args, headers):
+        ident = args.get(kind[:-1], [''])[0]
+        items = self.items[kind]
+        if not ident.isdigit() or not 0 < int(ident) <= len(items):
+            return self.error(2, headers)
+        return 200, headers, self.encode(
+            {'code': 0, 'response': items[int(ident) - 1]})
+
+    def list(self, kind, args, headers):
+        items = self.items[kind]
+        if 'thread' in args:
+            threads = set(args['thread'])
+            field = 'id' if kind == 'threads' else 'thread'
+            items = [item for item in items if item[field] in threads]
+        if 'since' in args:
+            since = args['since'][0]
+            if since.isdigit():
+                since = date(int(since))
+            items = [item for item in items if item['createdAt'] >= since]
+        if args.get('order', ['desc'])[0] == 'desc':
+            items = items[::-1]
+        try:
+            limit = min(int(args.get('limit', [25])[0]), 100)
+            start = int(args.get('cursor', ['0'])[0].split(':')[0] or 0)
+        except ValueError:
+            return self.error(2, headers)
+        end = start + limit
+        more = end < len(items)
+        cursor = {
+            'id': '%d:0:0' % end,
+            'next': '%d:0:0' % end if more else None,
+            'prev': '%d:0:1' % start if start else None,
+            'hasNext': more,
+            'hasPrev': bool(start),
+            'more': more,
+            'total': None,
+        }
+        return 200, headers, self.encode(
+            {'code': 0, 'cursor': cursor, 'response': items[start:end]})
@@ -0,0 +1,83 @@
+import sys
+
+from mock import Mock
+
+from disqusapi import Result
+from disqusapi.exceptions import APIError
+from disqusapi.tests import unittest
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from disqusapi.aio import AsyncDisqusAPI, AsyncDisqusRequest
+
+
+def run(*coroutines):
+    """Run the coroutines concurrently in a new loop, returns their results"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(asyncio.gather(*coroutines))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'asyncio client needs 3.7+')
+class TestAsyncDisqusRequest(unittest.TestCase):
+    def setUp(self):
+        self.request = Mock(return_value=1)
+        self.sut = AsyncDisqusRequest(self.request, concurrency=2)
+
+    def tearDown(self):
+        self.sut.close()
+
+    def test_call(self):
+        self.assertEqual([1], run(self.sut('GET', 'a/b', {'c': 1})))
+        self.request.assert_called_with('GET', 'a/b', {'c': 1})
+
+    def test_error(self):
+        self.request.side_effect = APIError(2, 'bad')
+        with self.assertRaises(APIError):
+            run(self.sut('GET', 'a/b', {}))
+
+    def test_concurrent(self):
+        self.request.side_effect = lambda method, path, kwargs: path
+        self.assertEqual(
+            ['0', '1', '2', '3', '4'],
+            run(*[self.sut('GET', str(i), {}) for i in range(5)]))
+
+    def test_close_closes_transport(self):
+        self.sut.close()
+        self.request.transport.close.assert_called_with()
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'asyncio client needs 3.7+')
+class TestAsyncDisqusAPI(unittest.TestCase):
+    def setUp(self):
+        self.sut = AsyncDisqusAPI('secret', concurrency=3)
+
+    def tearDown(self):
+        self.sut.close()
+
+    def test_shared_pool(self):
+        self.assertEqual(3, self.sut.make_request.request.pool.size)
+
+    def test_resource(self):
+        self.sut.make_request.request = Mock(return_value=[1])
+        self.assertEqual(
+            [[1]], run(self.sut.threads.list(forum='disqus')))
+        self.sut.make_request.request.assert_called_with(
+            'GET', 'threads/list', {'forum': 'disqus'})
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            self.sut.threads.details()
+
+    def test_batch(self):
+        self.sut.make_request.request = Mock(side_effect=lambda *args: Result(
+            [{'id': ident} for ident in args[2]['thread']]))
+        batch = self.sut.batch
+        found, = run(batch.threads(
+            ['1', '2', '1', '3'], known={'3': 'known'}))
+        self.assertEqual(['1', '2', '3'], sorted(found))
+        self.assertEqual(1, batch.calls)
@@ -1,3 +1,9 @@
+import io
+import marshal
+import os
+import tempfile
+import zlib
+
 from mock import Mock
 
 from disqusapi import (
@@ -7,13 +13,25 @@ from disqusapi import (
     DisqusRequest,
     params_list,
     DisqusAPI,
-    load_interfaces)
+    INTERFACES_PATH,
+    compile_interfaces,
+    load_interfaces,
+    read_interfaces)
+from disqusapi.cache import ResponseCache
 from disqusapi.exceptions import (
     InterfaceNotDefined,
     APIError,
     InvalidAccessToken,
-    RateLimitError)
+    RateLimitError,
+    ServerError)
+from disqusapi.jsonlib import BACKENDS, DEFAULT_BACKEND
+from disqusapi.metrics import Instrumentation
+from disqusapi.records import Post, RecordFactory, Thread
+from disqusapi.retry import RetryPolicy
+from disqusapi.singleflight import SingleFlight
+from disqusapi.stream import StreamResult
 from disqusapi.tests import unittest
+from disqusapi.utils import MacSigner
 
 
 class TestResult(unittest.TestCase):
@@ -85,6 +103,19 @@ class TestResourceElement(unittest.TestCase):
         sut = MyResourceElement({}, 2, ()).supercalifragilisticexpialidocious
         self.assertEqual({}, sut.interface)
 
+    def test_getattr_undefined_keeps_interface(self):
+        interface = {}
+        MyResourceElement(interface, None, ()).unknown
+        self.assertEqual({}, interface)
+
+    def test_getattr_memoized(self):
+        sut = MyResourceElement({'apple': {}}, None, ())
+        self.assertIs(sut.apple, sut.apple)
+
+    def test_getattr_private(self):
+        with self.assertRaises(AttributeError):
+            MyResourceElement({}, None, ())._private
+
     def test_new_element(self):
         with self.assertRaises(NotImplementedError):
             ResourceElement({}, None, ()).test
@@ -102,6 +133,11 @@ class TestResource(unittest.TestCase):
         with self.assertRaises(ValueError):
             Resource('req', {'required': ['test']}, None, ())()
 
+    def test_invalid_argument_frozenset(self):
+        interface = {'required': frozenset(['a', 'b'])}
+        with self.assertRaises(ValueError):
+            Resource('req', interface, None, ())(a=1, method='GET')
+
     def test_invalid_method(self):
         with self.assertRaises(InterfaceNotDefined):
             Resource('req', {}, None, ())()
@@ -192,6 +228,296 @@ class TestDisqusRequest(unittest.TestCase):
         with self.assertRaises(InvalidAccessToken):
             self.sut('POST', 'a/b', {})
 
+    def test_cache_get(self):
+        cache = ResponseCache()
+        sut = DisqusRequest(self.default_params, '3.0', self.conn, cache=cache)
+        self.assertEqual(1, sut('GET', 'a/b', {}))
+        self.assertEqual(1, sut('GET', 'a/b', {}))
+        self.assertEqual(1, self.request.call_count)
+        self.assertEqual(dict(hits=1, misses=1), cache.stats())
+
+    def test_cache_post_invalidates(self):
+        cache = ResponseCache()
+        sut = DisqusRequest(self.default_params, '3.0', self.conn, cache=cache)
+        sut('GET', 'a/b', {})
+        sut('POST', 'a/c', {})
+        sut('POST', 'a/c', {})
+        sut('GET', 'a/b', {})
+        self.assertEqual(4, self.request.call_count)
+
+    def test_cache_error_not_cached(self):
+        cache = ResponseCache()
+        sut = DisqusRequest(self.default_params, '3.0', self.conn, cache=cache)
+        self.set_error_code(1)
+        with self.assertRaises(APIError):
+            sut('GET', 'a/b', {})
+        self.assertEqual(dict(hits=0, misses=1), cache.stats())
+        with self.assertRaises(APIError):
+            sut('GET', 'a/b', {})
+        self.assertEqual(2, self.request.call_count)
+
+    def test_ratelimit(self):
+        ratelimit = Mock()
+        headers = {'X-Ratelimit-Remaining': '10',
+                   'X-Ratelimit-Reset': '3600'}
+        self.response.getheader.side_effect = headers.get
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, ratelimit=ratelimit)
+        sut('POST', 'a/b', {})
+        ratelimit.acquire.assert_called_with()
+        ratelimit.update.assert_called_with(10, 3600)
+
+    def test_error_ratelimit_reset(self):
+        self.set_error_code(13)
+        headers = {'X-Ratelimit-Remaining': '0',
+                   'X-Ratelimit-Reset': '3600'}
+        self.response.getheader.side_effect = headers.get
+        with self.assertRaises(RateLimitError) as context:
+            self.sut('POST', 'a/b', {})
+        self.assertEqual(
+            (0, 3600), (context.exception.remaining, context.exception.reset))
+
+    def test_error_not_json(self):
+        self.response.status = 502
+        self.response.read.return_value = '<html>Bad Gateway</html>'
+        with self.assertRaises(ServerError) as context:
+            self.sut('GET', 'a/b', {})
+        self.assertEqual(502, context.exception.code)
+
+    def retrying_request(self):
+        self.response.read.side_effect = ['<html>', '{"response": 1}']
+        retry = RetryPolicy(sleep=lambda seconds: None)
+        return DisqusRequest(
+            self.default_params, '3.0', self.conn, retry=retry)
+
+    def test_retry_get(self):
+        self.assertEqual(1, self.retrying_request()('GET', 'a/b', {}))
+        self.assertEqual(2, self.request.call_count)
+
+    def test_retry_skips_post(self):
+        with self.assertRaises(ServerError):
+            self.retrying_request()('POST', 'a/b', {})
+        self.assertEqual(1, self.request.call_count)
+
+    def instrumented_request(self, **options):
+        calls = []
+        instrument = Instrumentation(after=[calls.append])
+        sut = DisqusRequest(self.default_params, '3.0', self.conn,
+                            instrument=instrument, **options)
+        return sut, calls
+
+    def test_instrument(self):
+        sut, calls = self.instrumented_request()
+        sut('GET', 'a/b', {})
+        call = calls[0]
+        self.assertEqual(('GET', 'a/b', 200), (call.method, call.path,
+                                               call.status))
+        self.assertEqual(
+            len('/api/3.0/a/b.json?api_secret=secret'), call.sent)
+        self.assertEqual(len('{"response": 1}'), call.received)
+        self.assertEqual((0, None, None), (call.retries, call.cache,
+                                           call.error))
+        self.assertGreaterEqual(call.elapsed, 0)
+
+    def test_instrument_error(self):
+        sut, calls = self.instrumented_request()
+        self.set_error_code(1)
+        with self.assertRaises(APIError):
+            sut('POST', 'a/b', {})
+        self.assertEqual(500, calls[0].status)
+        self.assertIsInstance(calls[0].error, APIError)
+
+    def test_instrument_retries(self):
+        self.response.read.side_effect = ['<html>', '{"response": 1}']
+        sut, calls = self.instrumented_request(
+            retry=RetryPolicy(sleep=lambda seconds: None))
+        sut('GET', 'a/b', {})
+        self.assertEqual(1, calls[0].retries)
+        self.assertEqual(len('<html>{"response": 1}'), calls[0].received)
+
+    def test_instrument_cache(self):
+        sut, calls = self.instrumented_request(cache=ResponseCache())
+        sut('GET', 'a/b', {})
+        sut('GET', 'a/b', {})
+        self.assertEqual(['miss', 'hit'], [call.cache for call in calls])
+        self.assertEqual(0, calls[1].attempts)
+
+    def test_instrument_pool(self):
+        pool = Mock()
+        pool.open.return_value = ('conn', self.response)
+        sut, calls = self.instrumented_request(pool=pool)
+        sut('GET', 'a/b', {})
+        self.assertIs(calls[0], pool.open.call_args[0][4])
+
+    def test_signer(self):
+        signer = MacSigner('key', key_id='token')
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, signer=signer)
+        sut('POST', 'a/b', {})
+        headers = self.request.call_args[0][3]
+        self.assertTrue(headers['Authorization'].startswith(
+            'MAC id="token", nonce="'))
+        self.assertNotIn('Authorization', sut.headers)
+
+    def test_signer_retry(self):
+        self.response.read.side_effect = ['<html>', '{"response": 1}']
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, signer=MacSigner('key'),
+            retry=RetryPolicy(sleep=lambda seconds: None))
+        sut('GET', 'a/b', {})
+        first, second = [call[0][3]['Authorization']
+                         for call in self.request.call_args_list]
+        self.assertNotEqual(first, second)
+
+    def compressed_request(self, body, **options):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = compressor.compress(body.encode('utf-8')) + compressor.flush()
+        self.response.read.side_effect = io.BytesIO(data).read
+        self.response.getheader.side_effect = \
+            {'Content-Encoding': 'gzip'}.get
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, compress=True, **options)
+        return sut, data
+
+    def test_compress_header(self):
+        sut, _ = self.compressed_request('{"response": 1}')
+        self.assertEqual('gzip, deflate', sut.headers[
+            'Accept-Encoding'][:len('gzip, deflate')])
+        self.assertNotIn('Accept-Encoding', self.sut.headers)
+
+    def test_compress(self):
+        sut, _ = self.compressed_request('{"response": [1, 2], "cursor": 3}')
+        self.assertEqual(Result([1, 2], 3), sut('GET', 'a/b', {}))
+
+    def test_compress_stream(self):
+        sut, _ = self.compressed_request(
+            '{"response": [1, 2], "cursor": 3}', stream=True)
+        result = sut('GET', 'a/b', {})
+        self.assertEqual([1, 2], list(result))
+        self.assertEqual(3, result.cursor)
+
+    def test_compress_uncompressed_answer(self):
+        self.response.getheader.return_value = None
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, compress=True)
+        self.assertEqual(1, sut('GET', 'a/b', {}))
+
+    def test_compress_instrument(self):
+        body = '{"response": [%s]}' % ', '.join(['1'] * 1000)
+        calls = []
+        sut, data = self.compressed_request(
+            body, instrument=Instrumentation(after=[calls.append]))
+        sut('GET', 'a/b', {})
+        self.assertEqual((len(data), len(body)),
+                         (calls[0].received, calls[0].decompressed))
+
+    def test_records(self):
+        self.response.read.return_value = '{"response": [{"id": "1"}]}'
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, records=RecordFactory())
+        result = sut('GET', 'posts/list', {})
+        self.assertIsInstance(result[0], Post)
+        self.assertEqual('1', result[0].id)
+
+    def test_records_details(self):
+        self.response.read.return_value = '{"response": {"id": "1"}}'
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, records=RecordFactory())
+        self.assertIsInstance(sut('GET', 'threads/details', {}), Thread)
+
+    def test_records_stream(self):
+        sut = self.streaming_request(
+            '{"response": [{"id": "1"}]}', records=RecordFactory())
+        self.assertIsInstance(list(sut('GET', 'posts/list', {}))[0], Post)
+
+    def test_singleflight(self):
+        singleflight = Mock()
+        singleflight.do.return_value = 'shared'
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, singleflight=singleflight)
+        self.assertEqual('shared', sut('GET', 'a/b', {'b': 2, 'a': 1}))
+        key = singleflight.do.call_args[0][0]
+        self.assertEqual(('a/b', 'a=1&api_secret=secret&b=2'), key)
+
+    def test_singleflight_skips_post(self):
+        singleflight = Mock()
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, singleflight=singleflight)
+        self.assertEqual(1, sut('POST', 'a/b', {}))
+        self.assertFalse(singleflight.do.called)
+
+    def test_pool(self):
+        pool = Mock()
+        pool.open.return_value = ('conn', self.response)
+        sut = DisqusRequest(self.default_params, '3.0', self.conn, pool)
+        self.assertEqual(1, sut('POST', 'a/b', {}))
+        pool.open.assert_called_with(
+            'POST', '/api/3.0/a/b.json', 'api_secret=secret', sut.headers,
+            None)
+        pool.release.assert_called_with('conn', self.response)
+        self.assertFalse(self.conn.called)
+
+    def streaming_request(self, body, **options):
+        body = io.BytesIO(body.encode('utf-8'))
+        self.response.read.side_effect = body.read
+        return DisqusRequest(
+            self.default_params, '3.0', self.conn, stream=True, **options)
+
+    def test_stream(self):
+        sut = self.streaming_request(
+            '{"cursor": {"more": false}, "code": 0, "response": [1, 2]}')
+        result = sut('GET', 'a/b', {})
+        self.assertIsInstance(result, StreamResult)
+        self.assertFalse(self.conn.return_value.close.called)
+        self.assertEqual([1, 2], list(result))
+        self.assertEqual({'more': False}, result.cursor)
+        self.conn.return_value.close.assert_called_with()
+
+    def test_stream_invalid(self):
+        sut = self.streaming_request('<html>Bad gateway</html>')
+        with self.assertRaises(ServerError):
+            sut('GET', 'a/b', {})
+        self.conn.return_value.close.assert_called_with()
+
+    def test_stream_invalid_retried(self):
+        bodies = [io.BytesIO(b'<html>'),
+                  io.BytesIO(b'{"code": 0, "response": [1]}')]
+        current = []
+        self.conn.return_value.request.side_effect = \
+            lambda *args: current.append(bodies.pop(0))
+        self.response.read.side_effect = \
+            lambda size=-1: current[-1].read(size)
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, stream=True,
+            retry=RetryPolicy(attempts=2, sleep=lambda seconds: None))
+        self.assertEqual([1], list(sut('GET', 'a/b', {})))
+
+    def test_stream_object(self):
+        sut = self.streaming_request('{"code": 0, "response": {"id": 1}}')
+        self.assertEqual({'id': 1}, sut('GET', 'a/b', {}))
+        self.conn.return_value.close.assert_called_with()
+
+    def test_stream_error(self):
+        self.response.status = 400
+        self.response.read.return_value = '{"code": 2, "response": "bad"}'
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, stream=True)
+        with self.assertRaises(APIError):
+            sut('GET', 'a/b', {})
+
+    def test_json_backend(self):
+        self.assertIs(DEFAULT_BACKEND, self.sut.json_backend)
+        backend = Mock(wraps=BACKENDS['json'])
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, json_backend=backend)
+        self.assertEqual(1, sut('GET', 'a/b', {}))
+        backend.loads.assert_called_with('{"response": 1}')
+
+    def test_json_backend_name(self):
+        sut = DisqusRequest(
+            self.default_params, '3.0', self.conn, json_backend='json')
+        self.assertIs(BACKENDS['json'], sut.json_backend)
+
 
 class TestParamsList(unittest.TestCase):
     def test_simple(self):
@@ -204,6 +530,51 @@ class TestParamsList(unittest.TestCase):
         self.assertEqual([('a', 1), ('a', 2)], params_list({'a': (1, 2)}))
 
 
+class TestInterfaces(unittest.TestCase):
+    def setUp(self):
+        self.cache = os.path.join(tempfile.mkdtemp(), 'interfaces.marshal')
+
+    def test_loaded_once(self):
+        self.assertIs(load_interfaces(), load_interfaces())
+
+    def test_read_only(self):
+        with self.assertRaises(TypeError):
+            load_interfaces()['threads']['other'] = {}
+
+    def test_required_frozenset(self):
+        self.assertEqual(
+            frozenset(['thread']),
+            load_interfaces()['threads']['details']['required'])
+
+    def test_compile(self):
+        self.assertEqual(
+            {'a': {'b': {'required': frozenset(['c']), 'method': 'GET'}}},
+            compile_interfaces(
+                {'a': {'b': {'required': ['c'], 'method': 'GET'}}}))
+
+    def test_marshal_cache_written(self):
+        interfaces = read_interfaces(INTERFACES_PATH, self.cache)
+        with open(self.cache, 'rb') as cache:
+            self.assertEqual(interfaces, marshal.load(cache))
+
+    def test_marshal_cache_read(self):
+        with open(self.cache, 'wb') as cache:
+            marshal.dump({'cached': {}}, cache)
+        self.assertEqual(
+            {'cached': {}}, read_interfaces(INTERFACES_PATH, self.cache))
+
+    def test_marshal_cache_outdated(self):
+        with open(self.cache, 'wb') as cache:
+            marshal.dump({'cached': {}}, cache)
+        os.utime(self.cache, (0, 0))
+        self.assertIn('threads', read_interfaces(INTERFACES_PATH, self.cache))
+
+    def test_marshal_cache_broken(self):
+        with open(self.cache, 'wb') as cache:
+            cache.write(b'broken')
+        self.assertIn('threads', read_interfaces(INTERFACES_PATH, self.cache))
+
+
 class TestDisqusAPI(unittest.TestCase):
     def test_init_interface(self):
         self.assertEqual(load_interfaces(), DisqusAPI('secret').interface)
@@ -211,6 +582,30 @@ class TestDisqusAPI(unittest.TestCase):
     def test_init_tree(self):
         self.assertEqual((), DisqusAPI('secret').tree)
 
+    def test_init_shares_interface(self):
+        self.assertIs(
+            DisqusAPI('secret').interface, DisqusAPI('other').interface)
+
+    def test_init_no_pool(self):
+        self.assertIsNone(DisqusAPI('secret').make_request.pool)
+
+    def test_init_cache(self):
+        cache = ResponseCache()
+        self.assertIs(
+            cache, DisqusAPI('secret', cache=cache).make_request.cache)
+
+    def test_init_records(self):
+        sut = DisqusAPI('secret', records=True)
+        self.assertIsInstance(sut.make_request.records, RecordFactory)
+
+    def test_init_coalesce(self):
+        sut = DisqusAPI('secret', coalesce=True)
+        self.assertIsInstance(sut.make_request.singleflight, SingleFlight)
+
+    def test_init_pool_size(self):
+        pool = DisqusAPI('secret', pool_size=3).make_request.pool
+        self.assertEqual((DisqusRequest.host, 3), (pool.host, pool.size))
+
     def test_resource_element(self):
         sut = DisqusAPI('secret')
         self.assertEqual(
@@ -0,0 +1,75 @@
+from mock import Mock
+
+from disqusapi import DisqusAPI, Result
+from disqusapi.batch import BatchLookup, unique
+from disqusapi.cache import MemoryCache
+from disqusapi.tests import unittest
+
+
+class TestUnique(unittest.TestCase):
+    def test_unique(self):
+        self.assertEqual([3, 1, 2], list(unique([3, 1, 3, 2, 1])))
+
+
+class TestBatchLookup(unittest.TestCase):
+    def setUp(self):
+        self.api = DisqusAPI('secret')
+        self.request = Mock(side_effect=self.respond)
+        self.api.make_request = self.request
+        self.sut = BatchLookup(self.api, workers=2)
+
+    def respond(self, method, path, kwargs):
+        if path == 'threads/list':
+            return Result([{'id': ident, 'title': 't%s' % ident}
+                           for ident in kwargs['thread']
+                           if ident != 'gone'])
+        return {'id': kwargs['user'], 'username': 'u%s' % kwargs['user']}
+
+    def test_api_property(self):
+        self.assertIsInstance(self.api.batch, BatchLookup)
+
+    def test_threads(self):
+        found = self.sut.threads([1, '2', 1])
+        self.assertEqual({'1', '2'}, set(found))
+        self.assertEqual('t2', found['2']['title'])
+        self.request.assert_called_once_with(
+            'GET', 'threads/list', {'thread': ['1', '2'], 'limit': 2})
+
+    def test_chunks(self):
+        found = self.sut.threads(range(250))
+        self.assertEqual(250, len(found))
+        self.assertEqual(3, self.request.call_count)
+        self.assertEqual(
+            [100, 100, 50],
+            sorted([len(call[0][2]['thread'])
+                    for call in self.request.call_args_list], reverse=True))
+
+    def test_not_found(self):
+        self.assertEqual(['1'], list(self.sut.threads(['1', 'gone'])))
+
+    def test_single_id_endpoint(self):
+        found = self.sut.users(['1', '2'])
+        self.assertEqual('u2', found['2']['username'])
+        self.assertEqual(2, self.request.call_count)
+
+    def test_params(self):
+        self.sut.threads(['1'], forum='disqus')
+        self.request.assert_called_once_with(
+            'GET', 'threads/list',
+            {'thread': ['1'], 'limit': 1, 'forum': 'disqus'})
+
+    def test_known(self):
+        found = self.sut.threads(['1', '2'], known={'1': 'mine'})
+        self.assertEqual('mine', found['1'])
+        self.request.assert_called_once_with(
+            'GET', 'threads/list', {'thread': ['2'], 'limit': 1})
+
+    def test_cache(self):
+        sut = BatchLookup(self.api, cache=MemoryCache())
+        sut.threads(['1'])
+        self.assertEqual('t1', sut.threads(['1'])['1']['title'])
+        self.assertEqual(1, self.request.call_count)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(AttributeError):
+            self.sut.reactions
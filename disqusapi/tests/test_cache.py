@@ -0,0 +1,132 @@
+from disqusapi.cache import BaseCache, MemoryCache, ResponseCache
+from disqusapi.tests import unittest
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBaseCache(unittest.TestCase):
+    def test_interface(self):
+        with self.assertRaises(NotImplementedError):
+            BaseCache().get('key')
+
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sut = MemoryCache(max_entries=2, clock=self.clock)
+
+    def test_get_missing(self):
+        self.assertIsNone(self.sut.get('a'))
+        self.assertEqual(1, self.sut.misses)
+
+    def test_set_get(self):
+        self.sut.set('a', 1)
+        self.assertEqual(1, self.sut.get('a'))
+        self.assertEqual(1, self.sut.hits)
+
+    def test_ttl(self):
+        self.sut.set('a', 1, ttl=10)
+        self.clock.now = 10
+        self.assertIsNone(self.sut.get('a'))
+        self.assertEqual(0, len(self.sut))
+
+    def test_lru_eviction(self):
+        self.sut.set('a', 1)
+        self.sut.set('b', 2)
+        self.sut.get('a')
+        self.sut.set('c', 3)
+        self.assertIsNone(self.sut.get('b'))
+        self.assertEqual(1, self.sut.get('a'))
+        self.assertEqual(1, self.sut.evictions)
+
+    def test_delete(self):
+        self.sut.set('a', 1)
+        self.sut.delete('a')
+        self.assertIsNone(self.sut.get('a'))
+
+    def test_stats(self):
+        self.sut.set('a', 1)
+        self.sut.get('a')
+        self.assertEqual(
+            dict(hits=1, misses=0, evictions=0, size=1), self.sut.stats())
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = MemoryCache(clock=self.clock)
+        self.sut = ResponseCache(
+            self.backend, ttl=10, ttls={'forums/details': 100,
+                                        'threads/list': 0})
+
+    def test_miss(self):
+        self.assertIsNone(self.sut.get('threads/details', [('thread', 1)]))
+        self.assertEqual(dict(hits=0, misses=1), self.sut.stats())
+
+    def test_hit(self):
+        self.sut.set('threads/details', [('thread', 1)], 'thread')
+        self.assertEqual(
+            'thread', self.sut.get('threads/details', [('thread', 1)]))
+        self.assertEqual(dict(hits=1, misses=0), self.sut.stats())
+
+    def test_normalized_params(self):
+        self.sut.set('a/b', [('y', 1), ('x', 2)], 'value')
+        self.assertEqual('value', self.sut.get('a/b', [('x', 2), ('y', 1)]))
+
+    def test_different_params(self):
+        self.sut.set('a/b', [('x', 1)], 'value')
+        self.assertIsNone(self.sut.get('a/b', [('x', 2)]))
+
+    def test_default_ttl(self):
+        self.sut.set('a/b', [], 'value')
+        self.clock.now = 10
+        self.assertIsNone(self.sut.get('a/b', []))
+
+    def test_endpoint_ttl(self):
+        self.sut.set('forums/details', [], 'value')
+        self.clock.now = 99
+        self.assertEqual('value', self.sut.get('forums/details', []))
+
+    def test_endpoint_disabled(self):
+        self.sut.set('threads/list', [], 'value')
+        self.assertIsNone(self.sut.get('threads/list', []))
+
+    def test_invalidate_family(self):
+        self.sut.set('threads/details', [], 'thread')
+        self.sut.set('forums/details', [], 'forum')
+        self.sut.invalidate('threads/close')
+        self.assertIsNone(self.sut.get('threads/details', []))
+        self.assertEqual('forum', self.sut.get('forums/details', []))
+
+    def test_backend_stats(self):
+        self.sut.get('threads/details', [('thread', 1)])
+        self.sut.set('threads/details', [('thread', 1)], 'thread')
+        self.sut.get('threads/details', [('thread', 1)])
+        self.assertEqual(dict(hits=1, misses=1, evictions=0, size=1),
+                         self.backend.stats())
+
+    def test_generations_not_evicted(self):
+        self.backend.max_entries = 1
+        self.sut.set('threads/details', [], 'thread')
+        self.sut.set('forums/details', [], 'forum')
+        self.sut.set('threads/details', [], 'thread')
+        self.assertEqual('thread', self.sut.get('threads/details', []))
+
+    def test_shared_backend_generations(self):
+        backend = MemoryCache(clock=self.clock)
+        backend.shared = True
+        sut = ResponseCache(backend)
+        other = ResponseCache(backend)
+        sut.set('threads/details', [], 'thread')
+        self.assertEqual('thread', other.get('threads/details', []))
+        other.invalidate('threads/close')
+        self.assertIsNone(sut.get('threads/details', []))
+
+    def test_default_backend(self):
+        self.assertIsInstance(ResponseCache().backend, MemoryCache)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+from disqusapi.checkpoint import (
+    CheckpointStore,
+    FileCheckpointStore,
+    MemoryCheckpointStore,
+    SQLiteCheckpointStore)
+from disqusapi.tests import unittest
+
+
+class StoreTests(object):
+    def test_load_missing(self):
+        self.assertIsNone(self.sut.load('key'))
+
+    def test_save_load(self):
+        self.sut.save('key', {'cursor': '1:0:0', 'seen': ['1']})
+        self.assertEqual(
+            {'cursor': '1:0:0', 'seen': ['1']}, self.sut.load('key'))
+
+    def test_save_replaces(self):
+        self.sut.save('key', {'count': 1})
+        self.sut.save('key', {'count': 2})
+        self.assertEqual({'count': 2}, self.sut.load('key'))
+
+    def test_keys(self):
+        self.sut.save('a', {'count': 1})
+        self.sut.save('b', {'count': 2})
+        self.assertEqual({'count': 1}, self.sut.load('a'))
+
+    def test_clear(self):
+        self.sut.save('key', {'count': 1})
+        self.sut.clear('key')
+        self.sut.clear('missing')
+        self.assertIsNone(self.sut.load('key'))
+
+
+class TestCheckpointStore(unittest.TestCase):
+    def test_interface(self):
+        with self.assertRaises(NotImplementedError):
+            CheckpointStore().load('key')
+
+
+class TestMemoryCheckpointStore(StoreTests, unittest.TestCase):
+    def setUp(self):
+        self.sut = MemoryCheckpointStore()
+
+
+class TestFileCheckpointStore(StoreTests, unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'checkpoints.json')
+        self.sut = FileCheckpointStore(self.path)
+
+    def test_persisted(self):
+        self.sut.save('key', {'count': 1})
+        self.assertEqual(
+            {'count': 1}, FileCheckpointStore(self.path).load('key'))
+
+    def test_broken_file(self):
+        with open(self.path, 'w') as target:
+            target.write('{broken')
+        self.assertIsNone(self.sut.load('key'))
+
+
+class TestSQLiteCheckpointStore(StoreTests, unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'checkpoints.db')
+        self.sut = SQLiteCheckpointStore(self.path)
+
+    def test_persisted(self):
+        self.sut.save('key', {'count': 1})
+        self.assertEqual(
+            {'count': 1}, SQLiteCheckpointStore(self.path).load('key'))
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+from disqusapi.columnar import (
+    ColumnarSink,
+    Field,
+    POSTS,
+    numpy,
+    parse_timestamp,
+    pyarrow)
+from disqusapi.tests import unittest
+
+SCHEMA = (
+    Field('id', 'int'),
+    Field('author', 'string', 'author.username'),
+    Field('thread', 'int', 'thread.id'),
+    Field('createdAt', 'timestamp'),
+    Field('likes', 'int'),
+    Field('isSpam', 'bool'),
+    Field('score', 'float', 'userScore'),
+)
+
+
+def post(ident, **extra):
+    data = {'id': str(ident), 'author': {'username': u'bób'},
+            'thread': '10', 'createdAt': '2013-01-02T03:04:05',
+            'likes': ident, 'isSpam': False, 'userScore': 0.5}
+    data.update(extra)
+    return data
+
+
+class Writer(object):
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def __call__(self, schema, columns, masks):
+        self.chunks.append(dict(
+            (name, list(column)) for name, column in columns.items()))
+        self.masks = masks
+
+    def close(self):
+        self.closed = True
+
+
+class TestParseTimestamp(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(1357095845, parse_timestamp('2013-01-02T03:04:05'))
+
+    def test_empty(self):
+        self.assertIsNone(parse_timestamp(None))
+
+
+class TestField(unittest.TestCase):
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            Field('id', 'complex')
+
+    def test_missing(self):
+        self.assertEqual([None, None], [
+            Field('likes', 'int').extract([{}])[0],
+            Field('title').extract([{}])[0]])
+
+    def test_path_not_expanded(self):
+        self.assertEqual([10], Field('t', 'int', 'thread.id').extract(
+            [{'thread': '10'}]))
+
+    def test_posts_schema(self):
+        self.assertEqual(
+            len(POSTS), len(set(field.name for field in POSTS)))
+
+
+class TestColumnarSink(unittest.TestCase):
+    def test_columns(self):
+        sut = ColumnarSink(SCHEMA, batch_size=2)
+        sut.extend([post(1), post(2), post(3, isSpam=True)])
+        columns = sut.columns()
+        self.assertEqual([1, 2, 3], list(columns['id']))
+        self.assertEqual([u'bób'] * 3, columns['author'])
+        self.assertEqual([10] * 3, list(columns['thread']))
+        self.assertEqual([1357095845] * 3, list(columns['createdAt']))
+        self.assertEqual([0, 0, 1], list(columns['isSpam']))
+        self.assertEqual([0.5] * 3, list(columns['score']))
+        self.assertEqual(3, sut.rows)
+
+    def test_missing_masked(self):
+        sut = ColumnarSink(SCHEMA, batch_size=2)
+        sut.extend([post(1), post(2, createdAt=None, thread=None),
+                    post(3, likes=None)])
+        columns = sut.columns()
+        masks = sut.masks()
+        self.assertEqual([1, 2, 3], list(columns['id']))
+        self.assertEqual([0, 0, 0], list(masks['id']))
+        self.assertEqual([0, 1, 0], list(masks['createdAt']))
+        self.assertEqual([0, 1, 0], list(masks['thread']))
+        self.assertEqual([0, 0, 1], list(masks['likes']))
+        self.assertEqual([1, 2, 0], list(columns['likes']))
+        self.assertNotIn('author', masks)
+
+    def test_chunks(self):
+        writer = Writer()
+        sut = ColumnarSink(SCHEMA, writer, chunk_size=2, batch_size=1)
+        sut.consume(post(i) for i in range(5))
+        self.assertEqual(
+            [[0, 1], [2, 3], [4]],
+            [chunk['likes'] for chunk in writer.chunks])
+        self.assertEqual(5, sut.written)
+        self.assertTrue(writer.closed)
+
+    def test_close_empty(self):
+        writer = Writer()
+        ColumnarSink(SCHEMA, writer).close()
+        self.assertEqual([], writer.chunks)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        sut = ColumnarSink(SCHEMA)
+        sut.extend([post(1), post(2)])
+        arrays = sut.to_numpy()
+        self.assertEqual('int64', arrays['id'].dtype.name)
+        self.assertEqual('bool', arrays['isSpam'].dtype.name)
+        self.assertEqual(
+            numpy.datetime64('2013-01-02T03:04:05'), arrays['createdAt'][0])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy_masked(self):
+        sut = ColumnarSink(SCHEMA)
+        sut.extend([post(1), post(2, likes=None)])
+        arrays = sut.to_numpy()
+        self.assertEqual([1, None], arrays['likes'].tolist())
+        self.assertNotIsInstance(arrays['id'], numpy.ma.MaskedArray)
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class TestArrowWriters(unittest.TestCase):
+    def test_record_batches(self):
+        from disqusapi.columnar import RecordBatches
+        writer = RecordBatches(SCHEMA)
+        ColumnarSink(SCHEMA, writer).consume([post(1), post(2)])
+        self.assertEqual(2, writer.batches[0].num_rows)
+
+    def test_nulls(self):
+        from disqusapi.columnar import RecordBatches
+        writer = RecordBatches(POSTS)
+        ColumnarSink(POSTS, writer).consume([
+            {'id': '1', 'createdAt': '2013-01-02T03:04:05'},
+            {'id': '2', 'parent': 1}])
+        batch = writer.batches[0]
+        self.assertEqual([None, 1], batch.column(
+            batch.schema.get_field_index('parent')).to_pylist())
+        self.assertIsNone(batch.column(
+            batch.schema.get_field_index('createdAt')).to_pylist()[1])
+
+    def test_parquet(self):
+        import os
+        import tempfile
+        from disqusapi.columnar import ParquetWriter
+        path = os.path.join(tempfile.mkdtemp(), 'posts.parquet')
+        sink = ColumnarSink(SCHEMA, ParquetWriter(path, SCHEMA), chunk_size=1)
+        sink.consume([post(1), post(2)])
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual([1, 2], table.column('id').to_pylist())
@@ -0,0 +1,69 @@
+import io
+import zlib
+
+from disqusapi.compression import (
+    ACCEPT_ENCODING,
+    DECODERS,
+    DecompressingReader,
+    brotli)
+from disqusapi.tests import unittest
+
+BODY = b'{"response": [' + b', '.join(
+    b'{"id": "%d", "message": "lorem ipsum"}' % number
+    for number in range(1000)) + b']}'
+
+
+def compress(data, wbits):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+class TestDecompressingReader(unittest.TestCase):
+    def reader(self, data, encoding, chunk_size=1024):
+        self.source = io.BytesIO(data)
+        return DecompressingReader(self.source.read, encoding, chunk_size)
+
+    def test_gzip(self):
+        sut = self.reader(compress(BODY, 16 + zlib.MAX_WBITS), 'gzip')
+        self.assertEqual(BODY, sut.read())
+
+    def test_deflate(self):
+        sut = self.reader(compress(BODY, zlib.MAX_WBITS), 'deflate')
+        self.assertEqual(BODY, sut.read())
+
+    def test_raw_deflate(self):
+        sut = self.reader(compress(BODY, -zlib.MAX_WBITS), 'deflate')
+        self.assertEqual(BODY, sut.read())
+
+    def test_bounded_reads(self):
+        data = compress(BODY, 16 + zlib.MAX_WBITS)
+        sut = self.reader(data, 'gzip', chunk_size=64)
+        read = b''
+        while len(read) < 300:
+            chunk = sut.read(100)
+            self.assertTrue(0 < len(chunk) <= 100)
+            read += chunk
+        # Compressed data is read as needed, not all at once
+        self.assertLess(self.source.tell(), len(data))
+        self.assertEqual(BODY[:len(read)], read)
+
+    def test_counters(self):
+        data = compress(BODY, 16 + zlib.MAX_WBITS)
+        sut = self.reader(data, 'gzip')
+        sut.read()
+        self.assertEqual((len(data), len(BODY)),
+                         (sut.compressed, sut.decompressed))
+
+    def test_empty(self):
+        sut = self.reader(compress(b'', 16 + zlib.MAX_WBITS), 'gzip')
+        self.assertEqual(b'', sut.read(10))
+        self.assertEqual(b'', sut.read())
+
+    def test_accept_encoding(self):
+        self.assertEqual(
+            set(DECODERS), set(ACCEPT_ENCODING.split(', ')))
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        sut = self.reader(brotli.compress(BODY), 'br')
+        self.assertEqual(BODY, sut.read())
@@ -0,0 +1,238 @@
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import zlib
+
+import mock
+
+from disqusapi import Result
+from disqusapi.exceptions import ExportError
+from disqusapi.exports import ForumExport, parse_dump
+from disqusapi.tests import unittest
+from disqusapi.tests.fakeserver import FakeDisqusServer, make_dump
+
+DUMP = b'''<?xml version="1.0" encoding="utf-8"?>
+<disqus xmlns="http://disqus.com"
+        xmlns:dsq="http://disqus.com/disqus-internals">
+  <category dsq:id="7">
+    <forum>myforum</forum>
+    <title>General</title>
+    <isDefault>true</isDefault>
+  </category>
+  <thread dsq:id="10">
+    <id>article-1</id>
+    <forum>myforum</forum>
+    <category dsq:id="7"/>
+    <link>http://example.com/1/</link>
+    <title>Some &amp; title</title>
+    <message/>
+    <createdAt>2014-01-01T10:00:00Z</createdAt>
+    <author>
+      <name>Ann</name>
+      <isAnonymous>false</isAnonymous>
+      <username>ann</username>
+    </author>
+    <isClosed>true</isClosed>
+    <isDeleted>false</isDeleted>
+  </thread>
+  <post dsq:id="100">
+    <id/>
+    <message><![CDATA[<p>Hello</p>]]></message>
+    <createdAt>2014-01-01T11:00:00Z</createdAt>
+    <isDeleted>false</isDeleted>
+    <isSpam>false</isSpam>
+    <author>
+      <name>Bob</name>
+      <isAnonymous>true</isAnonymous>
+    </author>
+    <thread dsq:id="10"/>
+  </post>
+  <post dsq:id="101">
+    <message>Reply</message>
+    <createdAt>2014-01-01T12:00:00Z</createdAt>
+    <isSpam>true</isSpam>
+    <thread dsq:id="10"/>
+    <parent dsq:id="100"/>
+  </post>
+</disqus>
+'''
+
+
+class TestParseDump(unittest.TestCase):
+    def setUp(self):
+        self.items = list(parse_dump(io.BytesIO(DUMP)))
+
+    def test_kinds(self):
+        self.assertEqual(['category', 'thread', 'post', 'post'],
+                         [kind for kind, item in self.items])
+
+    def test_category(self):
+        self.assertEqual(
+            {'id': '7', 'forum': 'myforum', 'title': 'General',
+             'isDefault': True}, self.items[0][1])
+
+    def test_thread(self):
+        thread = self.items[1][1]
+        self.assertEqual('10', thread['id'])
+        self.assertEqual('7', thread['category'])
+        self.assertEqual(['article-1'], thread['identifiers'])
+        self.assertEqual('Some & title', thread['title'])
+        self.assertEqual('', thread['message'])
+        self.assertEqual('2014-01-01T10:00:00', thread['createdAt'])
+        self.assertEqual('ann', thread['author']['username'])
+        self.assertTrue(thread['isClosed'])
+        self.assertFalse(thread['isDeleted'])
+
+    def test_posts(self):
+        post, reply = self.items[2][1], self.items[3][1]
+        self.assertEqual('100', post['id'])
+        self.assertEqual('10', post['thread'])
+        self.assertIsNone(post['parent'])
+        self.assertEqual('<p>Hello</p>', post['message'])
+        self.assertEqual({'name': 'Bob', 'username': None, 'email': None,
+                          'isAnonymous': True}, post['author'])
+        self.assertEqual(100, reply['parent'])
+        self.assertTrue(reply['isSpam'])
+        self.assertIsNone(reply['author'])
+
+    def test_compressed_chunks(self):
+        from disqusapi.compression import DecompressingReader
+        data = zlib.compress(DUMP)
+        reader = DecompressingReader(io.BytesIO(data).read, 'deflate', 16)
+        self.assertEqual(self.items, list(parse_dump(reader)))
+
+
+class TestForumExport(unittest.TestCase):
+    def setUp(self):
+        self.api = mock.Mock()
+        self.api.exports.exportForum.return_value = Result(
+            {'id': 1, 'status': 'queued'})
+        self.now = [0]
+        self.sleeps = []
+
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now[0] += seconds
+        self.export = ForumExport(
+            self.api, 'myforum', interval=1, backoff=2, max_interval=5,
+            timeout=100, clock=lambda: self.now[0], sleep=sleep)
+
+    def statuses(self, *statuses):
+        self.api.exports.details.side_effect = [
+            Result(status) for status in statuses]
+
+    def test_wait(self):
+        self.statuses(
+            *[{'id': 1, 'status': 'processing'}] * 4 +
+            [{'id': 1, 'status': 'complete', 'url': 'http://dump'}])
+        self.assertEqual('http://dump', self.export.wait())
+        self.api.exports.exportForum.assert_called_once_with(forum='myforum')
+        self.api.exports.details.assert_called_with(export=1, method='GET')
+        self.assertEqual([1, 2, 4, 5, 5], self.sleeps)
+        self.assertEqual(5, self.export.polls)
+
+    def test_failed(self):
+        self.statuses({'id': 1, 'status': 'failed'})
+        with self.assertRaises(ExportError):
+            self.export.wait()
+
+    def test_timeout(self):
+        self.api.exports.details.return_value = Result(
+            {'id': 1, 'status': 'processing'})
+        with self.assertRaises(ExportError):
+            self.export.wait()
+        self.assertLessEqual(sum(self.sleeps), 100)
+
+    def test_status_endpoint(self):
+        self.export.status_endpoint = 'forums/exportStatus'
+        self.export.method = 'POST'
+        self.api.forums.exportStatus.return_value = Result(
+            {'id': 1, 'status': 'done', 'url': 'http://dump'})
+        self.export.start()
+        self.assertEqual('http://dump', self.export.wait())
+        self.api.forums.exportStatus.assert_called_once_with(
+            export=1, method='POST')
+
+    def response(self, status, body=b'', location=None):
+        response = mock.Mock(status=status)
+        response.getheader.side_effect = lambda name, default=None: {
+            'Location': location}.get(name, default)
+        response.read = io.BytesIO(body).read
+        return response
+
+    def test_redirects(self):
+        conns = {}
+        responses = {
+            '/start': self.response(302, location='http://cdn/dump.xml'),
+            '/dump.xml': self.response(200, DUMP),
+        }
+
+        def conn(host):
+            conns[host] = mock.Mock()
+            conns[host].getresponse.side_effect = lambda: responses[
+                conns[host].request.call_args[0][1]]
+            return conns[host]
+        self.export.conn = conn
+        items = list(self.export.items('http://host/start'))
+        self.assertEqual(4, len(items))
+        self.assertEqual('http://cdn/dump.xml', self.export.url)
+        conns['cdn'].request.assert_called_once_with('GET', '/dump.xml')
+
+    def test_relative_redirect(self):
+        self.export.conn = mock.Mock()
+        self.export.conn.return_value.getresponse.side_effect = [
+            self.response(302, location='/dump.xml'),
+            self.response(200, DUMP)]
+        items = list(self.export.items('http://host/start'))
+        self.assertEqual(4, len(items))
+        self.assertEqual('http://host/dump.xml', self.export.url)
+        self.export.conn.assert_called_with('host')
+
+    def test_download_error(self):
+        self.export.conn = mock.Mock()
+        self.export.conn.return_value.getresponse.return_value = \
+            self.response(403)
+        with self.assertRaises(ExportError) as context:
+            self.export.open('http://host/dump.xml.gz')
+        self.assertEqual(403, context.exception.code)
+
+
+class TestForumExportServer(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeDisqusServer(posts=250, threads=12, export_polls=3)
+        self.server.start()
+        self.export = ForumExport(self.server.client(), 'fake',
+                                  interval=0.001, chunk_size=1024)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_items(self):
+        items = list(self.export.items())
+        self.assertEqual(3, self.export.polls)
+        posts = [item for kind, item in items if kind == 'post']
+        threads = [item for kind, item in items if kind == 'thread']
+        self.assertEqual(250, len(posts))
+        self.assertEqual(12, len(threads))
+        expected = self.server.items['posts'][3]
+        self.assertEqual(expected['id'], posts[3]['id'])
+        self.assertEqual(expected['thread'], posts[3]['thread'])
+        self.assertEqual(expected['parent'], posts[3]['parent'])
+        self.assertEqual(expected['message'], posts[3]['message'])
+        self.assertEqual(expected['createdAt'], posts[3]['createdAt'])
+
+    def test_save(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'dump.xml.gz')
+        size = self.export.save(path)
+        self.assertEqual(size, os.path.getsize(path))
+        with gzip.open(path) as dump:
+            self.assertEqual(make_dump(self.server.items['threads'],
+                                       self.server.items['posts']),
+                             dump.read())
+        with gzip.open(path) as dump:
+            kinds = [kind for kind, item in parse_dump(dump)]
+        self.assertEqual(len(self.server.items['posts']), kinds.count('post'))
@@ -0,0 +1,99 @@
+from disqusapi import Result
+from disqusapi.exceptions import APIError, RateLimitError, ServerError
+from disqusapi.paginator import Paginator
+from disqusapi.retry import RetryPolicy
+from disqusapi.tests import unittest
+from disqusapi.tests.fakeserver import FakeDisqusServer
+
+
+class TestFakeDisqusServer(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeDisqusServer(posts=30, threads=5, ratelimit=100)
+        self.server.start()
+        self.api = self.server.client()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_list(self):
+        result = self.api.posts.list(forum='fake', limit=10)
+        self.assertIsInstance(result, Result)
+        self.assertEqual(
+            [str(number) for number in range(30, 20, -1)],
+            [post['id'] for post in result])
+        self.assertTrue(result.cursor['more'])
+        self.assertEqual(('GET', '/api/3.0/posts/list.json'),
+                         self.server.requests[0][:2])
+
+    def test_paginator(self):
+        posts = list(Paginator(self.api.posts.list, forum='fake', limit=7))
+        self.assertEqual(30, len(posts))
+        self.assertEqual(5, len(self.server.requests))
+
+    def test_since(self):
+        posts = self.api.posts.list(
+            forum='fake', order='asc', since='2014-01-01T00:29:00')
+        self.assertEqual(['29', '30'], [post['id'] for post in posts])
+
+    def test_threads(self):
+        threads = self.api.threads.list(forum='fake', thread=['1', '3'])
+        self.assertEqual(['3', '1'], [thread['id'] for thread in threads])
+        self.assertEqual(
+            30, sum(thread['posts'] for thread in self.server.items[
+                'threads']))
+
+    def test_details(self):
+        self.assertEqual('7', self.api.posts.details(post='7')['id'])
+        with self.assertRaises(APIError) as context:
+            self.api.posts.details(post='31')
+        self.assertEqual(2, context.exception.code)
+
+    def test_unknown_endpoint(self):
+        with self.assertRaises(APIError) as context:
+            self.api.forums.listThreads(forum='fake')
+        self.assertEqual(1, context.exception.code)
+
+    def test_ratelimit(self):
+        self.server.ratelimit = 1
+        self.api.posts.list(forum='fake')
+        with self.assertRaises(RateLimitError) as context:
+            self.api.posts.list(forum='fake')
+        self.assertEqual(0, context.exception.remaining)
+        self.assertGreater(context.exception.reset, 0)
+
+    def test_fail(self):
+        self.server.fail(body='<html>Bad Gateway</html>', status=502)
+        with self.assertRaises(ServerError):
+            self.api.posts.list(forum='fake')
+        self.assertEqual(25, len(self.api.posts.list(forum='fake')))
+
+    def test_fail_retried(self):
+        self.server.fail(times=2)
+        api = self.server.client(retry=RetryPolicy(
+            backoff=0, sleep=lambda seconds: None))
+        self.assertEqual(25, len(api.posts.list(forum='fake')))
+        self.assertEqual(3, len(self.server.requests))
+
+    def test_compress(self):
+        api = self.server.client(pool_size=1, compress=True, stream=True)
+        posts = list(Paginator(api.posts.list, forum='fake', limit=20))
+        self.assertEqual(30, len(posts))
+
+    def test_pool(self):
+        api = self.server.client(pool_size=2)
+        for _ in range(3):
+            api.posts.list(forum='fake')
+        pool = api.make_request.pool
+        self.assertEqual((2, 1), (pool.hits, pool.misses))
+
+    def test_stream_stopped_early(self):
+        api = self.server.client(pool_size=2, stream=True)
+        pool = api.make_request.pool
+        for _ in range(3):
+            paginator = Paginator(api.posts.list, forum='fake', limit=25)
+            self.assertEqual(5, len(list(paginator(limit=5))))
+        # Dropped with the rest of their response unread
+        self.assertEqual((0, 3, 0), (pool.hits, pool.misses, len(pool)))
+        posts = list(Paginator(api.posts.list, forum='fake', limit=25))
+        self.assertEqual(30, len(posts))
+        self.assertEqual((1, 4, 1), (pool.hits, pool.misses, len(pool)))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from disqusapi.jsonlib import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    PREFERENCE,
+    JSONBackend,
+    get_backend)
+from disqusapi.tests import unittest
+
+
+class TestBackends(unittest.TestCase):
+    def test_round_trip(self):
+        value = {'id': '1', 'message': u'caf\xe9 ☃', 'likes': 3,
+                 'points': -1.5, 'parent': None, 'media': [True, False]}
+        for name, backend in BACKENDS.items():
+            encoded = backend.dumps(value)
+            self.assertIsInstance(encoded, bytes, name)
+            self.assertEqual(value, backend.loads(encoded), name)
+            self.assertEqual(value, backend.loads(encoded.decode('utf-8')),
+                             name)
+
+    def test_invalid(self):
+        for name, backend in BACKENDS.items():
+            with self.assertRaises(ValueError):
+                backend.loads(b'{"response": ')
+
+    def test_default_fastest(self):
+        installed = [name for name in PREFERENCE if name in BACKENDS]
+        self.assertIs(BACKENDS[installed[0]], DEFAULT_BACKEND)
+        self.assertIs(DEFAULT_BACKEND, get_backend())
+
+    def test_get_backend(self):
+        self.assertIs(BACKENDS['json'], get_backend('json'))
+        backend = JSONBackend('mine', None, None)
+        self.assertIs(backend, get_backend(backend))
+        with self.assertRaises(ValueError):
+            get_backend('missing')
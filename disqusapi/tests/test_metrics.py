@@ -0,0 +1,173 @@
+import logging
+
+from mock import Mock
+
+from disqusapi.metrics import (
+    Call,
+    Histogram,
+    Instrumentation,
+    LatencyHistograms,
+    LoggingExporter,
+    Throughput,
+    prometheus_text)
+from disqusapi.tests import unittest
+
+
+class Clock(object):
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def tick(self, seconds=1.0):
+        self.now += seconds
+
+
+def finished_call(path='a/b', elapsed=0.1, error=None):
+    call = Call('GET', path)
+    call.elapsed = elapsed
+    call.error = error
+    return call
+
+
+class TestCall(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.call = Call('GET', 'a/b', self.clock)
+
+    def test_time(self):
+        def phase(value):
+            self.clock.tick(2)
+            return value
+        self.assertEqual(1, self.call.time('read', phase, 1))
+        self.call.time('read', phase, 1)
+        self.assertEqual(4, self.call.timings['read'])
+
+    def test_time_error(self):
+        def phase():
+            self.clock.tick(1)
+            raise ValueError
+        with self.assertRaises(ValueError):
+            self.call.time('decode', phase)
+        self.assertEqual(1, self.call.timings['decode'])
+
+    def test_send(self):
+        conn = Mock()
+        conn.sock = None
+        conn.connect.side_effect = lambda: self.clock.tick(1)
+        conn.request.side_effect = lambda *args: self.clock.tick(2)
+
+        def getresponse():
+            self.clock.tick(3)
+            return 'response'
+        conn.getresponse.side_effect = getresponse
+        self.assertEqual(
+            'response', self.call.send(conn, 'GET', '/a', '', {}))
+        conn.request.assert_called_with('GET', '/a', '', {})
+        self.assertEqual(
+            (1, 2, 3), (self.call.timings['connect'],
+                        self.call.timings['send'],
+                        self.call.timings['first_byte']))
+
+    def test_send_connected(self):
+        conn = Mock()
+        self.call.send(conn, 'GET', '/a', '', {})
+        self.assertFalse(conn.connect.called)
+
+    def test_retries(self):
+        self.assertEqual(0, self.call.retries)
+        self.call.attempts = 3
+        self.assertEqual(2, self.call.retries)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_hooks(self):
+        clock = Clock()
+        before, after = Mock(), Mock()
+        sut = Instrumentation([before], [after], clock)
+        call = sut.start('GET', 'a/b')
+        before.assert_called_with(call)
+        self.assertFalse(after.called)
+        clock.tick(5)
+        sut.finish(call)
+        after.assert_called_with(call)
+        self.assertEqual(5, call.elapsed)
+
+
+class TestHistogram(unittest.TestCase):
+    def test_empty(self):
+        self.assertIsNone(Histogram().percentile(50))
+
+    def test_percentiles(self):
+        sut = Histogram()
+        for value in range(1, 101):
+            sut.add(value / 100.0)
+        self.assertEqual((100, 50.5), (sut.count, round(sut.total, 6)))
+        for percent in (50, 95, 99):
+            expected = percent / 100.0
+            self.assertLessEqual(expected, sut.percentile(percent))
+            self.assertGreater(expected * 1.1, sut.percentile(percent))
+        self.assertEqual(1, sut.percentile(100))
+
+    def test_tiny_values(self):
+        sut = Histogram()
+        sut.add(0)
+        self.assertEqual(0, sut.percentile(50))
+
+
+class TestLatencyHistograms(unittest.TestCase):
+    def test_per_endpoint(self):
+        sut = LatencyHistograms()
+        sut(finished_call('a/b', 0.1))
+        sut(finished_call('a/c', 1))
+        self.assertAlmostEqual(0.1, sut.percentiles('a/b')[99], 1)
+        self.assertAlmostEqual(1, sut.percentiles('a/c')[50], 1)
+        self.assertEqual(['a/b', 'a/c'], sorted(sut.summary()))
+
+    def test_unknown(self):
+        self.assertIsNone(LatencyHistograms().percentiles('a/b'))
+
+
+class TestThroughput(unittest.TestCase):
+    def test_rate(self):
+        clock = Clock()
+        sut = Throughput(window=10, clock=clock)
+        for _ in range(20):
+            sut(finished_call())
+        sut(finished_call(error=ValueError()))
+        self.assertEqual(2.1, sut.rate())
+        clock.tick(11)
+        self.assertEqual(0, sut.rate())
+        self.assertEqual((21, 1), (sut.calls, sut.errors))
+
+
+class TestLoggingExporter(unittest.TestCase):
+    def test_log(self):
+        logger = Mock()
+        LoggingExporter(logger, logging.DEBUG)(finished_call())
+        level, message = logger.log.call_args[0][:2]
+        self.assertEqual(logging.DEBUG, level)
+        self.assertIn('elapsed=', message)
+
+    def test_disabled(self):
+        logger = Mock()
+        logger.isEnabledFor.return_value = False
+        LoggingExporter(logger)(finished_call())
+        self.assertFalse(logger.log.called)
+
+
+class TestPrometheusText(unittest.TestCase):
+    def test_dump(self):
+        latency = LatencyHistograms()
+        throughput = Throughput()
+        for aggregator in (latency, throughput):
+            aggregator(finished_call('a/b', 0.5))
+        text = prometheus_text(latency, throughput)
+        self.assertIn('# TYPE disqusapi_call_seconds summary\n', text)
+        self.assertIn(
+            'disqusapi_call_seconds{endpoint="a/b",quantile="0.95"} 0.5\n',
+            text)
+        self.assertIn('disqusapi_call_seconds_count{endpoint="a/b"} 1\n',
+                      text)
+        self.assertIn('disqusapi_calls_total 1\n', text)
@@ -0,0 +1,207 @@
+from disqusapi import Result
+from disqusapi.mirror import Mirror, MirrorCache, since_date
+from disqusapi.paginator import Paginator
+from disqusapi.records import RecordFactory
+from disqusapi.tests import unittest
+from disqusapi.tests.fakeserver import FakeDisqusServer
+
+
+def post(ident, thread, minute, parent=None, forum='myforum'):
+    return {'id': str(ident), 'forum': forum, 'thread': str(thread),
+            'parent': parent, 'author': {'id': '9', 'name': 'Ann'},
+            'createdAt': '2014-01-01T00:%02d:00' % minute}
+
+
+class TestMirror(unittest.TestCase):
+    def setUp(self):
+        self.now = [1000]
+        self.mirror = Mirror(':memory:', batch_size=2,
+                             clock=lambda: self.now[0])
+        self.addCleanup(self.mirror.close)
+        self.posts = [post(1, 10, 1), post(2, 10, 2, parent=1),
+                      post(3, 11, 2), post(4, 10, 3, parent=1),
+                      post(5, 12, 4, forum='other')]
+        self.assertEqual(5, self.mirror.upsert('posts', self.posts))
+
+    def ids(self, result):
+        return [item['id'] for item in result]
+
+    def test_details(self):
+        self.assertEqual(self.posts[1], self.mirror.details('posts', '2'))
+        self.assertIsNone(self.mirror.details('posts', '6'))
+        self.assertIsNone(self.mirror.details('threads', '1'))
+
+    def test_upsert_replaces(self):
+        changed = dict(self.posts[0], message='Edited')
+        self.mirror.upsert('posts', [changed])
+        self.assertEqual('Edited', self.mirror.details('posts', 1)['message'])
+
+    def test_list(self):
+        result = self.mirror.list('posts', 'myforum')
+        self.assertEqual(['4', '3', '2', '1'], self.ids(result))
+        self.assertFalse(result.cursor['more'])
+        self.assertEqual(['1', '2', '4'], self.ids(self.mirror.list(
+            'posts', thread='10', order='asc')))
+        self.assertEqual(['4', '3'], self.ids(self.mirror.list(
+            'posts', 'myforum', since='2014-01-01T00:02:00', limit=2)))
+
+    def test_cursor(self):
+        first = self.mirror.list('posts', 'myforum', limit=3)
+        self.assertEqual(['4', '3', '2'], self.ids(first))
+        self.assertTrue(first.cursor['more'])
+        second = self.mirror.list('posts', 'myforum', limit=3,
+                                  cursor=first.cursor['id'])
+        self.assertEqual(['1'], self.ids(second))
+        self.assertFalse(second.cursor['more'])
+        self.assertTrue(second.cursor['hasPrev'])
+
+    def test_children(self):
+        self.assertEqual(['2', '4'], self.ids(self.mirror.children(1)))
+        self.assertEqual([], self.mirror.children(4))
+
+    def test_since_date(self):
+        self.assertEqual('2014-01-01T00:00:00', since_date(1388534400))
+        self.assertEqual('2014-01-01', since_date('2014-01-01'))
+
+
+class TestMirrorCache(unittest.TestCase):
+    def setUp(self):
+        self.now = [1000]
+        self.mirror = Mirror(':memory:', clock=lambda: self.now[0])
+        self.addCleanup(self.mirror.close)
+        self.mirror.upsert('threads', [
+            {'id': '10', 'forum': 'myforum', 'author': '9',
+             'createdAt': '2014-01-01T00:00:00'}])
+        self.mirror.upsert('posts', [post(1, 10, 1), post(2, 10, 2)])
+        self.mirror.execute(
+            "INSERT INTO refreshes VALUES ('posts', 'myforum', 990)")
+        self.mirror.execute(
+            "INSERT INTO refreshes VALUES ('threads', 'myforum', 990)")
+        self.cache = MirrorCache(self.mirror, max_age=60)
+
+    def test_list(self):
+        result = self.cache.get('posts/list', [
+            ('forum', 'myforum'), ('api_secret', 'secret'), ('limit', '1')])
+        self.assertEqual(['2'], [item['id'] for item in result])
+        self.assertEqual({'hits': 1, 'misses': 0}, self.cache.stats())
+
+    def test_thread_forum(self):
+        result = self.cache.get('threads/listPosts', [('thread', '10')])
+        self.assertEqual(2, len(result))
+
+    def test_details(self):
+        result = self.cache.get('threads/details', [('thread', '10')])
+        self.assertIsInstance(result, dict)
+        self.assertEqual('9', result.get('author'))
+        self.assertIsNone(self.cache.get('threads/details',
+                                         [('thread:ident', 'x')]))
+        self.assertIsNone(self.cache.get('posts/details', [('post', '3')]))
+
+    def test_unsupported(self):
+        for path, params in [
+                ('posts/list', [('forum', 'myforum'), ('include', 'spam')]),
+                ('posts/list', [('forum', 'a'), ('forum', 'b')]),
+                ('posts/list', [('forum', 'myforum'), ('limit', '500')]),
+                ('posts/list', [('forum', 'myforum'), ('cursor', '1:0:0')]),
+                ('posts/list', [('thread', '99')]),
+                ('posts/list', []),
+                ('users/details', [('user', '9')])]:
+            self.assertIsNone(self.cache.get(path, params), (path, params))
+
+    def test_stale(self):
+        self.now[0] = 1040
+        first = self.cache.get('posts/list', [('forum', 'myforum'),
+                                              ('limit', '1')])
+        self.assertIsNotNone(first)
+        self.now[0] = 1100
+        self.assertIsNone(self.cache.get('posts/list',
+                                         [('forum', 'myforum')]))
+        # Pages after the first one keep following the mirror
+        second = self.cache.get('posts/list', [
+            ('forum', 'myforum'), ('limit', '1'),
+            ('cursor', first.cursor['id'])])
+        self.assertEqual(['1'], [item['id'] for item in second])
+
+    def test_set_upserts(self):
+        self.cache.set('posts/list', [('forum', 'myforum')],
+                       Result([post(3, 10, 3)]))
+        self.cache.set('posts/details', [('post', '4')], post(4, 10, 4))
+        self.cache.set('users/details', [], Result({'id': '9'}))
+        self.assertEqual(4, len(self.cache.get('posts/list',
+                                               [('forum', 'myforum')])))
+
+    def test_set_other_filters(self):
+        spam = dict(post(3, 10, 3), isSpam=True)
+        self.cache.set('posts/list', [('forum', 'myforum'),
+                                      ('include', 'spam')],
+                       Result([spam, post(4, 10, 4)]))
+        self.cache.set('posts/details', [('post', '3')], spam)
+        self.cache.set('posts/details', [('post', '5'), ('related', 'x')],
+                       post(5, 10, 5))
+        self.assertEqual(2, len(self.cache.get('posts/list',
+                                               [('forum', 'myforum')])))
+
+    def test_invalidate(self):
+        self.cache.invalidate('posts/remove')
+        self.assertIsNone(self.mirror.age('posts', 'myforum'))
+        self.assertEqual(10, self.mirror.age('threads', 'myforum'))
+
+
+class TestMirrorServer(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeDisqusServer(posts=120, threads=8)
+        self.server.start()
+        self.api = self.server.client()
+        self.mirror = Mirror(':memory:')
+        self.addCleanup(self.mirror.close)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_refresh(self):
+        self.assertEqual({'threads': 8, 'posts': 120},
+                         self.mirror.refresh(self.api, 'fake'))
+        new = dict(self.server.items['posts'][-1], id='121',
+                   createdAt='2015-01-01T00:00:00')
+        self.server.items['posts'].append(new)
+        self.assertEqual({'threads': 0, 'posts': 1},
+                         self.mirror.refresh(self.api, 'fake'))
+        self.assertEqual(new, self.mirror.details('posts', 121))
+
+    def test_refresh_records(self):
+        api = self.server.client(records=RecordFactory())
+        self.assertEqual({'threads': 8, 'posts': 120},
+                         self.mirror.refresh(api, 'fake'))
+        self.assertEqual(self.server.items['threads'][2],
+                         self.mirror.details('threads', 3))
+
+    def test_write_through_records(self):
+        api = self.server.client(records=RecordFactory(),
+                                 cache=MirrorCache(self.mirror))
+        api.posts.list(forum='fake', limit=10)
+        self.assertEqual(10, len(self.mirror.list('posts', 'fake')))
+
+    def test_read_through(self):
+        self.mirror.refresh(self.api, 'fake')
+        api = self.server.client(cache=MirrorCache(self.mirror))
+        calls = len(self.server.requests)
+        posts = list(Paginator(api.posts.list, forum='fake', limit=50))
+        self.assertEqual(
+            [item['id'] for item in self.server.items['posts'][::-1]],
+            [item['id'] for item in posts])
+        thread = api.threads.details(thread='3')
+        self.assertEqual(self.server.items['threads'][2], thread)
+        self.assertEqual(thread['title'], thread.get('title'))
+        self.assertEqual(calls, len(self.server.requests))
+        # Not mirrored: asked to the API, and not upserted
+        api.posts.list(forum='fake', include='spam')
+        self.assertEqual(calls + 1, len(self.server.requests))
+        self.assertEqual(120, len(list(Paginator(
+            api.posts.list, forum='fake', limit=100))))
+
+    def test_reset(self):
+        self.mirror.refresh(self.api, 'fake')
+        self.mirror.reset('fake')
+        self.assertEqual(0, len(self.mirror.list('posts', 'fake')))
+        self.assertEqual({'threads': 8, 'posts': 120},
+                         self.mirror.refresh(self.api, 'fake'))
@@ -0,0 +1,178 @@
+import threading
+import time
+
+import mock
+
+from disqusapi import Result
+from disqusapi.exceptions import (
+    APIError,
+    InvalidAccessToken,
+    RateLimitError)
+from disqusapi.moderation import ModerationQueue
+from disqusapi.tests import unittest
+from disqusapi.tests.fakeserver import FakeDisqusServer
+
+
+class FakePosts(object):
+    """posts.* endpoints acting on every post but the bad ones"""
+    def __init__(self, bad=(), error=APIError, code=2):
+        self.bad = set(bad)
+        self.error = error
+        self.code = code
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, action):
+        def call(post):
+            with self._lock:
+                self.calls.append((action, sorted(post, key=int)))
+            if self.bad.intersection(post):
+                raise self.error(self.code, 'Invalid argument')
+            return [{'id': ident} for ident in post]
+        return call
+
+
+class TestModerationQueue(unittest.TestCase):
+    def setUp(self):
+        self.now = [0]
+        self.api = mock.Mock()
+        self.api.posts = FakePosts(bad=['13'])
+        self.reported = []
+        self.queue = ModerationQueue(
+            self.api, batch_size=4, max_age=10, workers=2,
+            callback=self.reported.append, clock=lambda: self.now[0])
+        self.addCleanup(self.queue.close)
+
+    def outcomes(self, results):
+        return sorted((result.action, result.post, result.forum, result.ok)
+                      for result in results)
+
+    def test_groups(self):
+        self.queue.spam([1, 2], forum='a')
+        self.queue.spam('3', forum='b')
+        self.queue.remove([4, 2], forum='a')
+        self.assertEqual(5, len(self.queue))
+        self.queue.flush()
+        self.assertEqual(0, len(self.queue))
+        self.assertEqual(
+            [('remove', ['2', '4']), ('spam', ['1', '2']), ('spam', ['3'])],
+            sorted(self.api.posts.calls))
+        self.assertEqual(5, len(self.reported))
+
+    def test_batch_size(self):
+        self.queue.approve(range(1, 10), forum='a')
+        self.queue.flush()
+        self.assertEqual([4, 4, 1], sorted(
+            [len(posts) for _, posts in self.api.posts.calls], reverse=True))
+        self.assertEqual(3, self.queue.calls)
+
+    def test_single_post_actions(self):
+        self.queue.highlight([1, 2])
+        self.queue.flush()
+        self.assertEqual(2, len(self.api.posts.calls))
+
+    def test_duplicates(self):
+        self.queue.spam([1, 1, '1'])
+        self.assertEqual(1, len(self.queue))
+
+    def test_age(self):
+        self.queue.spam([1], forum='a')
+        self.now[0] = 5
+        self.queue.spam([2], forum='b')
+        self.queue.poll()
+        self.assertEqual(2, len(self.queue))
+        self.now[0] = 10
+        self.queue.poll()
+        self.queue._jobs.join()
+        self.assertEqual([('spam', ['1'])], self.api.posts.calls)
+        self.assertEqual(1, len(self.queue))
+
+    def test_split_failed(self):
+        self.queue.remove([11, 12, 13, 14])
+        results = self.queue.close()
+        self.assertEqual([('remove', '11', None, True),
+                          ('remove', '12', None, True),
+                          ('remove', '13', None, False),
+                          ('remove', '14', None, True)],
+                         self.outcomes(results))
+        failed = [result for result in results if not result.ok][0]
+        self.assertIsInstance(failed.error, APIError)
+        # The whole batch, its halves, and the half of the failed one
+        self.assertEqual(5, len(self.api.posts.calls))
+
+    def test_no_split(self):
+        self.queue.split_failed = False
+        self.queue.remove([11, 12, 13])
+        self.assertEqual(
+            [], [result for result in self.queue.close() if result.ok])
+        self.assertEqual(1, len(self.api.posts.calls))
+
+    def test_rate_limited(self):
+        self.api.posts = FakePosts(bad=['1'], error=RateLimitError)
+        self.queue.spam([1, 2, 3])
+        results = self.queue.close()
+        self.assertFalse(any(result.ok for result in results))
+        self.assertIsInstance(results[0].error, RateLimitError)
+        self.assertEqual(1, len(self.api.posts.calls))
+
+    def test_auth_errors_not_split(self):
+        for error, code in [(InvalidAccessToken, 18), (APIError, 12)]:
+            self.api.posts = FakePosts(bad=['1'], error=error, code=code)
+            self.queue.spam([1, 2, 3])
+            self.queue.flush()
+            self.assertEqual(1, len(self.api.posts.calls))
+
+    def test_age_flush_idle(self):
+        queue = ModerationQueue(self.api, max_age=0.05)
+        self.addCleanup(queue.close)
+        queue.spam(['1', '2'])
+        for _ in range(100):
+            if not len(queue) and queue.results:
+                break
+            time.sleep(0.01)
+        self.assertEqual(0, len(queue))
+        self.assertEqual(2, len(queue.results))
+
+    def test_missing_from_response(self):
+        self.api.posts = mock.Mock()
+        self.api.posts.approve.return_value = [{'id': '1'}]
+        self.queue.approve([1, 2])
+        self.assertEqual([('approve', '1', None, True),
+                          ('approve', '2', None, False)],
+                         self.outcomes(self.queue.close()))
+
+    def test_none_in_response(self):
+        self.api.posts = mock.Mock()
+        self.api.posts.approve.return_value = Result([])
+        self.queue.approve([1, 2])
+        self.assertEqual([('approve', '1', None, False),
+                          ('approve', '2', None, False)],
+                         self.outcomes(self.queue.close()))
+
+    def test_unknown_action(self):
+        with self.assertRaises(ValueError):
+            self.queue.add('delete', [1])
+        with self.assertRaises(AttributeError):
+            self.queue.delete
+
+    def test_context_manager(self):
+        with ModerationQueue(self.api) as queue:
+            queue.spam([1, 2])
+        self.assertEqual(2, len(queue.results))
+
+
+class TestModerationQueueServer(unittest.TestCase):
+    def test_spam_wave(self):
+        with FakeDisqusServer(posts=300) as server:
+            queue = ModerationQueue(server.client(pool_size=4), workers=4)
+            queue.spam([str(ident) for ident in range(1, 251)] + ['999'],
+                       forum='fake')
+            results = queue.close()
+            self.assertEqual(251, len(results))
+            self.assertEqual(['999'], [result.post for result in results
+                                       if not result.ok])
+            self.assertEqual(250, sum(
+                post['isSpam'] for post in server.items['posts']))
+            posts = [params for method, path, params in server.requests
+                     if path.endswith('/posts/spam.json')]
+            self.assertLess(len(posts), 20)
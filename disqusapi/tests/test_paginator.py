@@ -1,11 +1,21 @@
+import time
+
+from mock import Mock
+
 from disqusapi.tests import unittest
-from disqusapi import Result
-from disqusapi.exceptions import RateLimitError
+from disqusapi import Resource, Result
+from disqusapi.checkpoint import MemoryCheckpointStore
+from disqusapi.exceptions import RateLimitError, ServerError
 from disqusapi.paginator import (
     ignore_limit,
+    in_background,
+    wait_for_reset,
+    iter_pages,
     use_cursor,
     limit_amount,
+    MultiPaginator,
     Paginator)
+from disqusapi.retry import RetryPolicy
 
 
 class TestIgnoreLimit(unittest.TestCase):
@@ -26,6 +36,46 @@ class TestIgnoreLimit(unittest.TestCase):
             ignore_limit(endpoint)()
 
 
+class TestRetrying(unittest.TestCase):
+    def test_resumes_cursor(self):
+        cursors = []
+
+        def endpoint(cursor=0):
+            cursors.append(cursor)
+            if cursor == 1 and cursors.count(1) == 1:
+                raise ServerError(502, 'Bad Gateway')
+            return paged_endpoint([[1], [2], [3]])(cursor)
+        retry = RetryPolicy(sleep=lambda seconds: None)
+        self.assertEqual(
+            [1, 2, 3], list(Paginator(endpoint)(retry=retry)))
+        self.assertEqual([0, 1, 1, 2], cursors)
+
+
+class TestWaitForReset(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.calls = 0
+
+    def endpoint(self, reset=None):
+        def endpoint():
+            self.calls += 1
+            if self.calls == 1:
+                error = RateLimitError(14, 'error')
+                error.reset = reset
+                raise error
+            return self.calls
+        return wait_for_reset(
+            endpoint, clock=lambda: 100, sleep=self.sleeps.append)
+
+    def test_waits_reset(self):
+        self.assertEqual(2, self.endpoint(reset=130)())
+        self.assertEqual([30], self.sleeps)
+
+    def test_default_wait(self):
+        self.assertEqual(2, self.endpoint()())
+        self.assertEqual([60], self.sleeps)
+
+
 class TestUseCursor(unittest.TestCase):
     def test_no_pages(self):
         def endpoint():
@@ -40,6 +90,14 @@ class TestUseCursor(unittest.TestCase):
                 return Result([cursor])
         self.assertEqual([1, 2, 3], list(use_cursor(endpoint)()))
 
+    def test_closes_page(self):
+        page = Result([1, 2])
+        page.close = Mock()
+        results = use_cursor(lambda: page)()
+        self.assertEqual(1, next(results))
+        results.close()
+        page.close.assert_called_with()
+
 
 class TestLimitAmount(unittest.TestCase):
     def test_limited(self):
@@ -55,6 +113,18 @@ class TestLimitAmount(unittest.TestCase):
 
         self.assertEqual([0, 1], list(limit_amount(endpoint, 10)()))
 
+    def test_closes_results(self):
+        closed = []
+
+        def endpoint():
+            try:
+                for number in range(100):
+                    yield number
+            finally:
+                closed.append(True)
+        self.assertEqual([0, 1], list(limit_amount(endpoint, 2)()))
+        self.assertEqual([True], closed)
+
 
 class TestPaginator(unittest.TestCase):
     def test_simple(self):
@@ -74,3 +144,165 @@ class TestPaginator(unittest.TestCase):
             else:
                 return Result([1, 2], dict(more=True, id=3))
         self.assertEqual([1, 2], list(Paginator(endpoint)(silence_limit=True)))
+
+
+def paged_endpoint(pages):
+    """Endpoint serving ``pages`` (lists of items) through the cursor"""
+    def endpoint(cursor=0, **kwargs):
+        more = cursor + 1 < len(pages)
+        return Result(pages[cursor], dict(more=more, id=cursor + 1))
+    return endpoint
+
+
+class TestIterPages(unittest.TestCase):
+    def test_pages(self):
+        pages = list(iter_pages(paged_endpoint([[1], [2, 3]])))
+        self.assertEqual([[1], [2, 3]], [page.response for page in pages])
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_prefetch(self):
+        endpoint = paged_endpoint([[1, 2], [3], [4, 5]])
+        self.assertEqual(
+            [1, 2, 3, 4, 5],
+            list(Paginator(endpoint)(prefetch=2)))
+
+    def test_prefetch_limit(self):
+        endpoint = paged_endpoint([[1, 2], [3], [4, 5]])
+        self.assertEqual([1, 2, 3], list(Paginator(endpoint)(
+            limit=3, prefetch=1)))
+
+    def test_prefetch_error(self):
+        def endpoint(cursor=None):
+            if cursor is not None:
+                raise ValueError('error')
+            return Result([1, 2], dict(more=True, id=3))
+        results = Paginator(endpoint)(prefetch=1)
+        self.assertEqual(1, next(results))
+        self.assertEqual(2, next(results))
+        with self.assertRaises(ValueError):
+            next(results)
+
+
+class TestInBackground(unittest.TestCase):
+    def test_merge(self):
+        sources = [range(3), range(10, 13), range(20, 23)]
+        self.assertEqual(
+            [0, 1, 2, 10, 11, 12, 20, 21, 22],
+            sorted(in_background(sources, 2, 1)))
+
+    def test_stop(self):
+        results = in_background([iter(int, 1)], 1, 1)
+        self.assertEqual(0, next(results))
+        results.close()
+
+    def test_stop_closes_pending(self):
+        pages = [Mock() for _ in range(5)]
+        results = in_background([pages], 1, 2)
+        self.assertIs(pages[0], next(results))
+        results.close()
+        # Queued pages are closed at once, the one put() gives up on soon
+        for _ in range(100):
+            if all(page.close.called for page in pages[1:4]):
+                break
+            time.sleep(0.01)
+        self.assertFalse(pages[0].close.called)
+        for page in pages[1:4]:
+            page.close.assert_called_with()
+        self.assertFalse(pages[4].close.called)
+
+
+class TestMultiPaginator(unittest.TestCase):
+    def setUp(self):
+        pages = {'a': [[1, 2], [3]], 'b': [[4], [5, 6]]}
+
+        def endpoint(forum, order, cursor=0):
+            self.orders.add(order)
+            return paged_endpoint(pages[forum])(cursor)
+        self.orders = set()
+        self.sut = MultiPaginator(
+            endpoint, [{'forum': 'a'}, {'forum': 'b'}], workers=2,
+            order='asc')
+
+    def test_merge(self):
+        self.assertEqual([1, 2, 3, 4, 5, 6], sorted(self.sut))
+        self.assertEqual(set(['asc']), self.orders)
+
+    def test_limit(self):
+        self.assertEqual(4, len(list(self.sut(limit=4))))
+
+    def test_prefetch(self):
+        self.assertEqual(
+            [1, 2, 3, 4, 5, 6], sorted(self.sut(prefetch=1)))
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.store = MemoryCheckpointStore()
+        self.pages = [[{'id': '1'}, {'id': '2'}], [{'id': '3'}],
+                      [{'id': '4'}, {'id': '5'}]]
+        self.calls = []
+
+        def endpoint(forum, cursor=0):
+            self.calls.append(cursor)
+            return paged_endpoint(self.pages)(cursor)
+        self.sut = Paginator(endpoint, forum='disqus')
+
+    def ids(self, results):
+        return [result['id'] for result in results]
+
+    def test_key(self):
+        self.assertEqual('endpoint?forum=disqus', self.sut.checkpoint_key())
+
+    def test_key_resource(self):
+        sut = Paginator(Resource(None, {}, 'list', ('posts',)), forum='a')
+        self.assertEqual('posts/list?forum=a', sut.checkpoint_key())
+
+    def test_complete_walk_clears(self):
+        self.assertEqual(
+            ['1', '2', '3', '4', '5'],
+            self.ids(self.sut(checkpoint=self.store)))
+        self.assertEqual({}, self.store.states)
+
+    def test_saved(self):
+        results = self.sut(checkpoint=self.store)
+        self.assertEqual(['1', '2', '3'], self.ids(
+            next(results) for _ in range(3)))
+        self.assertEqual(
+            {'cursor': 1, 'count': 2, 'query': 'forum=disqus',
+             'seen': ['1', '2']},
+            self.store.load('endpoint?forum=disqus'))
+
+    def test_every(self):
+        results = self.sut(checkpoint=self.store, checkpoint_every=2)
+        self.assertEqual(4, len([next(results) for _ in range(4)]))
+        self.assertEqual(2, self.store.load('endpoint?forum=disqus')['cursor'])
+
+    def test_resume(self):
+        list(self.sut(checkpoint=self.store, limit=3))
+        self.calls = []
+        self.assertEqual(
+            ['3', '4', '5'], self.ids(self.sut.resume(self.store)))
+        self.assertEqual([1, 2], self.calls)
+
+    def test_resume_skips_seen(self):
+        list(self.sut(checkpoint=self.store, limit=3))
+        # A new result pushed the last seen one to the next page
+        self.pages[1] = [{'id': '2'}, {'id': '3'}]
+        self.assertEqual(
+            ['3', '4', '5'], self.ids(self.sut.resume(self.store)))
+
+    def test_resume_nothing(self):
+        with self.assertRaises(ValueError):
+            self.sut.resume(self.store)
+
+    def test_other_params_start_over(self):
+        self.store.save('key', {'cursor': 2, 'count': 4, 'query': 'forum=b',
+                                'seen': []})
+        self.assertEqual(5, len(list(self.sut(
+            checkpoint=self.store, checkpoint_key='key'))))
+
+    def test_prefetch(self):
+        self.assertEqual(
+            ['1', '2', '3', '4', '5'],
+            self.ids(self.sut(checkpoint=self.store, prefetch=1)))
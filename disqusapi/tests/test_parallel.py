@@ -0,0 +1,133 @@
+import functools
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import simplejson
+
+from disqusapi.columnar import POSTS, pyarrow
+from disqusapi.parallel import ParallelExport, SharedRateLimiter
+from disqusapi.tests import fakeserver, unittest
+
+
+def even_ids(item):
+    return item if int(item['id']) % 2 == 0 else None
+
+
+def broken_client(**options):
+    raise RuntimeError('No credentials')
+
+
+def report(limiter):
+    limiter.update(7, 2 ** 40)
+
+
+class TestSharedRateLimiter(unittest.TestCase):
+    def test_unlimited(self):
+        sut = SharedRateLimiter()
+        self.assertIsNone(sut.remaining)
+        sut.acquire()
+        self.assertEqual(0, sut.waited)
+
+    def test_paced(self):
+        sleeps = []
+        sut = SharedRateLimiter(burst=1, clock=lambda: 0,
+                                sleep=sleeps.append)
+        # 10 calls in 10 seconds, one a second past the burst
+        sut.update(10, 10)
+        sut.acquire()
+        sut.acquire()
+        self.assertEqual([1], sleeps)
+        self.assertEqual(8, sut.remaining)
+
+    def test_shared_between_processes(self):
+        sut = SharedRateLimiter()
+        process = multiprocessing.Process(target=report, args=(sut,))
+        process.start()
+        process.join()
+        self.assertEqual((7, 2 ** 40), (sut.remaining, sut.reset))
+
+
+class TestParallelExport(unittest.TestCase):
+    def setUp(self):
+        self.server = fakeserver.FakeDisqusServer(posts=60, threads=5)
+        self.server.start()
+        self.directory = tempfile.mkdtemp()
+        self.client = functools.partial(
+            fakeserver.client, self.server.address, pool_size=1)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def export(self, **options):
+        options.setdefault('params', dict(limit=20))
+        return ParallelExport(self.client, options.pop('endpoint',
+                              'posts/list'), self.directory, **options)
+
+    def lines(self, path):
+        with open(path) as source:
+            return [simplejson.loads(line) for line in source]
+
+    def test_run(self):
+        reports = []
+        stats = self.export(processes=2, progress_every=25).run(
+            ['one', 'two', 'three'], reports.append)
+        self.assertEqual(['one', 'three', 'two'], sorted(stats))
+        for shard in ('one', 'two', 'three'):
+            path = os.path.join(self.directory, '%s.jsonl' % shard)
+            self.assertEqual(path, stats[shard]['path'])
+            self.assertEqual(60, stats[shard]['items'])
+            self.assertTrue(stats[shard]['done'])
+            self.assertIsNone(stats[shard]['error'])
+            self.assertEqual(60, len(self.lines(path)))
+            self.assertEqual(
+                [False, False, True],
+                [item['done'] for item in reports if item['shard'] == shard])
+        forums = set(dict(params)['forum']
+                     for _, _, params in self.server.requests)
+        self.assertEqual(set(['one', 'two', 'three']), forums)
+
+    def test_run_here(self):
+        stats = self.export(processes=0, transform=even_ids).run(['one'])
+        self.assertEqual(30, stats['one']['items'])
+        ids = [int(item['id']) for item in self.lines(stats['one']['path'])]
+        self.assertEqual(list(range(60, 0, -2)), ids)
+
+    def test_error(self):
+        stats = self.export(
+            processes=0, endpoint='forums/listThreads').run(['one'])
+        self.assertEqual('APIError: Endpoint not valid',
+                         stats['one']['error'])
+        path = stats['one']['path']
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(os.path.exists(path + '.part'))
+
+    def test_client_error(self):
+        sut = ParallelExport(broken_client, 'posts/list', self.directory,
+                             processes=2)
+        stats = sut.run(['one', 'two'])
+        self.assertEqual(['one', 'two'], sorted(stats))
+        for shard in ('one', 'two'):
+            self.assertTrue(stats[shard]['done'])
+            self.assertEqual('RuntimeError: No credentials',
+                             stats[shard]['error'])
+
+    def test_path(self):
+        self.assertEqual(
+            os.path.join(self.directory, 'a_b.jsonl'),
+            self.export().path('a/b'))
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            self.export(format='csv')
+        with self.assertRaises(ValueError):
+            self.export(format='parquet')
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        stats = self.export(
+            processes=0, format='parquet', schema=POSTS).run(['one'])
+        table = pyarrow.parquet.read_table(stats['one']['path'])
+        self.assertEqual(60, table.num_rows)
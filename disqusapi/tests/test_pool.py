@@ -0,0 +1,139 @@
+import errno
+import socket
+
+from mock import Mock
+
+from disqusapi.compat import RemoteDisconnected
+from disqusapi.pool import ConnectionPool, is_dropped
+from disqusapi.tests import unittest
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.conn = Mock(side_effect=lambda host: Mock())
+        self.clock = FakeClock()
+        self.sut = ConnectionPool(
+            'host', self.conn, size=2, max_idle=10, clock=self.clock)
+
+    def response(self, conn, body='body', will_close=False):
+        response = conn.getresponse.return_value
+        response.read.return_value = body
+        response.will_close = will_close
+        return response
+
+    def test_get_new(self):
+        self.sut.get()
+        self.conn.assert_called_with('host')
+        self.assertEqual((0, 1), (self.sut.hits, self.sut.misses))
+
+    def test_get_reused(self):
+        conn = self.sut.get()
+        self.sut.put(conn)
+        self.assertIs(conn, self.sut.get())
+        self.assertEqual((1, 1), (self.sut.hits, self.sut.misses))
+
+    def test_put_full(self):
+        conns = [self.sut.get() for _ in range(3)]
+        for conn in conns:
+            self.sut.put(conn)
+        self.assertEqual(2, len(self.sut))
+        conns[2].close.assert_called_with()
+
+    def test_idle_eviction(self):
+        conn = self.sut.get()
+        self.sut.put(conn)
+        self.clock.now = 11
+        self.assertIsNot(conn, self.sut.get())
+        conn.close.assert_called_with()
+
+    def test_clear(self):
+        conn = self.sut.get()
+        self.sut.put(conn)
+        self.sut.clear()
+        self.assertEqual(0, len(self.sut))
+        conn.close.assert_called_with()
+
+    def test_urlopen(self):
+        conn = self.sut.get()
+        response = self.response(conn)
+        self.sut.put(conn)
+        self.assertEqual(
+            (response, 'body'),
+            self.sut.urlopen('GET', '/path', '', {}))
+        conn.request.assert_called_with('GET', '/path', '', {})
+        self.assertEqual(1, len(self.sut))
+
+    def test_urlopen_will_close(self):
+        conn = self.sut.get()
+        self.response(conn, will_close=True)
+        self.sut.put(conn)
+        self.sut.urlopen('GET', '/path', '', {})
+        self.assertEqual(0, len(self.sut))
+        conn.close.assert_called_with()
+
+    def test_release_unread(self):
+        conn = self.sut.get()
+        response = self.response(conn)
+        response.isclosed.return_value = False
+        self.sut.release(conn, response)
+        self.assertEqual(0, len(self.sut))
+        conn.close.assert_called_with()
+
+    def test_urlopen_stale_reconnects(self):
+        stale = self.sut.get()
+        stale.request.side_effect = socket.error(errno.EPIPE, 'Broken pipe')
+        self.sut.put(stale)
+        response, body = self.sut.urlopen('GET', '/path', '', {})
+        self.assertEqual(2, self.conn.call_count)
+        stale.close.assert_called_with()
+
+    def test_urlopen_disconnected_reconnects(self):
+        stale = self.sut.get()
+        stale.getresponse.side_effect = RemoteDisconnected('closed')
+        self.sut.put(stale)
+        self.sut.urlopen('GET', '/path', '', {})
+        self.assertEqual(2, self.conn.call_count)
+
+    def test_urlopen_timeout_not_resent(self):
+        stale = self.sut.get()
+        stale.getresponse.side_effect = socket.timeout('timed out')
+        self.sut.put(stale)
+        with self.assertRaises(socket.timeout):
+            self.sut.urlopen('GET', '/path', '', {})
+        self.assertEqual(1, self.conn.call_count)
+        stale.request.assert_called_once_with('GET', '/path', '', {})
+
+    def test_urlopen_post_not_resent(self):
+        stale = self.sut.get()
+        stale.getresponse.side_effect = RemoteDisconnected('closed')
+        self.sut.put(stale)
+        with self.assertRaises(RemoteDisconnected):
+            self.sut.urlopen('POST', '/path', 'post=1', {})
+        self.assertEqual(1, self.conn.call_count)
+
+    def test_dropped_not_reused(self):
+        server, client = socket.socketpair()
+        self.addCleanup(client.close)
+        conn = self.sut.get()
+        conn.sock = client
+        self.sut.put(conn)
+        self.assertFalse(is_dropped(conn))
+        server.close()
+        self.assertTrue(is_dropped(conn))
+        self.assertIsNot(conn, self.sut.get())
+        conn.close.assert_called_with()
+
+    def test_urlopen_fresh_error_raises(self):
+        self.conn.side_effect = None
+        self.conn.return_value.request.side_effect = socket.error('refused')
+        with self.assertRaises(socket.error):
+            self.sut.urlopen('GET', '/path', '', {})
+        self.assertEqual(1, self.conn.call_count)
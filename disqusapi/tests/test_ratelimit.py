@@ -0,0 +1,97 @@
+from mock import Mock
+
+from disqusapi.ratelimit import RateLimiter, parse_headers
+from disqusapi.tests import unittest
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+class TestParseHeaders(unittest.TestCase):
+    def test_headers(self):
+        headers = {'X-Ratelimit-Remaining': '10',
+                   'X-Ratelimit-Reset': '3600'}
+        response = Mock()
+        response.getheader.side_effect = headers.get
+        self.assertEqual((10, 3600), parse_headers(response))
+
+    def test_missing(self):
+        response = Mock()
+        response.getheader.return_value = None
+        self.assertEqual((None, None), parse_headers(response))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sut = RateLimiter(
+            burst=2, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_unknown_budget(self):
+        for _ in range(10):
+            self.sut.acquire()
+        self.assertEqual([], self.clock.sleeps)
+
+    def test_burst(self):
+        self.sut.update(100, 100)
+        self.sut.acquire()
+        self.sut.acquire()
+        self.assertEqual([], self.clock.sleeps)
+        self.assertEqual(98, self.sut.remaining)
+
+    def test_paced(self):
+        # 10 calls in 100 seconds, one every 10 seconds past the burst
+        self.sut.update(10, 100)
+        for _ in range(3):
+            self.sut.acquire()
+        self.assertEqual(1, len(self.clock.sleeps))
+        self.assertAlmostEqual(10, self.clock.sleeps[0])
+
+    def test_refill(self):
+        self.sut.update(10, 100)
+        for _ in range(2):
+            self.sut.acquire()
+        self.clock.now = 20
+        self.sut.acquire()
+        self.assertEqual([], self.clock.sleeps)
+
+    def test_exhausted_waits_reset(self):
+        self.sut.update(0, 100)
+        self.clock.now = 40
+        self.sut.acquire()
+        self.assertEqual([60], self.clock.sleeps)
+
+    def test_reserve(self):
+        sut = RateLimiter(reserve=5, clock=self.clock, sleep=self.clock.sleep)
+        sut.update(5, 100)
+        sut.acquire()
+        self.assertEqual([100], self.clock.sleeps)
+
+    def test_reset_passed(self):
+        self.sut.update(0, 100)
+        self.clock.now = 100
+        self.sut.acquire()
+        self.assertEqual([], self.clock.sleeps)
+
+    def test_update_keeps_lowest(self):
+        self.sut.update(10, 100)
+        self.sut.update(12, 100)
+        self.assertEqual(10, self.sut.remaining)
+
+    def test_update_new_window(self):
+        self.sut.update(1, 100)
+        self.sut.update(1000, 200)
+        self.assertEqual((1000, 200), (self.sut.remaining, self.sut.reset))
+
+    def test_update_missing(self):
+        self.sut.update(None, None)
+        self.assertIsNone(self.sut.remaining)
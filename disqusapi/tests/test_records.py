@@ -0,0 +1,143 @@
+import pickle
+
+import mock
+
+from disqusapi.records import (
+    Category,
+    Forum,
+    Post,
+    RecordFactory,
+    Thread,
+    User,
+    endpoint_class)
+from disqusapi.tests import unittest
+
+
+def post(ident, author=None, **extra):
+    data = {'id': ident, 'message': 'hey', 'forum': 'disqus',
+            'author': author or {'id': '1', 'username': 'bob'}}
+    data.update(extra)
+    return data
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.sut = Post({'id': '1', 'message': 'hey', 'custom': 2})
+
+    def test_no_dict(self):
+        self.assertFalse(hasattr(self.sut, '__dict__'))
+
+    def test_attribute(self):
+        self.assertEqual('hey', self.sut.message)
+
+    def test_attribute_extra(self):
+        self.assertEqual(2, self.sut.custom)
+
+    def test_attribute_missing(self):
+        with self.assertRaises(AttributeError):
+            self.sut.likes
+
+    def test_getitem(self):
+        self.assertEqual('hey', self.sut['message'])
+        self.assertEqual(2, self.sut['custom'])
+
+    def test_getitem_missing(self):
+        with self.assertRaises(KeyError):
+            self.sut['likes']
+
+    def test_getitem_not_a_key(self):
+        with self.assertRaises(KeyError):
+            self.sut['keys']
+
+    def test_get(self):
+        self.assertEqual('hey', self.sut.get('message'))
+        self.assertEqual(0, self.sut.get('likes', 0))
+
+    def test_contains(self):
+        self.assertTrue('message' in self.sut)
+        self.assertTrue('custom' in self.sut)
+        self.assertFalse('likes' in self.sut)
+
+    def test_keys(self):
+        self.assertEqual(['id', 'message', 'custom'], self.sut.keys())
+        self.assertEqual(3, len(self.sut))
+
+    def test_eq_dict(self):
+        self.assertEqual({'id': '1', 'message': 'hey', 'custom': 2}, self.sut)
+
+    def test_eq_record(self):
+        self.assertEqual(Post({'id': '1'}), Post({'id': '1'}))
+        self.assertNotEqual(Post({'id': '1'}), Post({'id': '2'}))
+        self.assertNotEqual(Post({'id': '1'}), Thread({'id': '1'}))
+
+    def test_interned(self):
+        value = ''.join(['dis', 'qus'])
+        self.assertIs(
+            Post({'forum': value}).forum, Post({'forum': 'disqus'}).forum)
+
+    def test_repr(self):
+        self.assertEqual("<Post: '1'>", repr(Post({'id': '1'})))
+
+    def test_pickle(self):
+        self.assertEqual(self.sut, pickle.loads(pickle.dumps(self.sut, 2)))
+
+
+class TestEndpointClass(unittest.TestCase):
+    def test_classes(self):
+        self.assertIs(Post, endpoint_class('posts/list'))
+        self.assertIs(Post, endpoint_class('posts/listPopular'))
+        self.assertIs(Post, endpoint_class('threads/listPosts'))
+        self.assertIs(Thread, endpoint_class('forums/listThreads'))
+        self.assertIs(Thread, endpoint_class('trends/listThreads'))
+        self.assertIs(User, endpoint_class('users/details'))
+        self.assertIs(User, endpoint_class('forums/listMostLikedUsers'))
+        self.assertIs(Forum, endpoint_class('users/listMostActiveForums'))
+        self.assertIs(Category, endpoint_class('forums/listCategories'))
+
+    def test_unknown(self):
+        self.assertIsNone(endpoint_class('users/listActivity'))
+        self.assertIsNone(endpoint_class('threads/vote'))
+        self.assertIsNone(endpoint_class('reactions/list'))
+
+
+class TestRecordFactory(unittest.TestCase):
+    def setUp(self):
+        self.sut = RecordFactory()
+
+    def test_record(self):
+        record = self.sut('posts/list', post('1'))
+        self.assertIsInstance(record, Post)
+        self.assertIsInstance(record.author, User)
+        self.assertEqual('bob', record.author.username)
+
+    def test_plain_values(self):
+        self.assertEqual(1, self.sut('posts/list', 1))
+        self.assertEqual({'a': 1}, self.sut('reactions/list', {'a': 1}))
+
+    def test_nested_shared(self):
+        one = self.sut('posts/list', post('1'))
+        two = self.sut('posts/list', post('2'))
+        self.assertIs(one.author, two.author)
+        self.assertEqual(1, self.sut.shared)
+
+    def test_nested_shared_not_built(self):
+        self.sut('posts/list', post('1'))
+        with mock.patch.object(User, '__init__') as init:
+            self.sut('posts/list', post('2'))
+        self.assertFalse(init.called)
+
+    def test_nested_changed(self):
+        one = self.sut('posts/list', post('1'))
+        two = self.sut('posts/list', post('2', {'id': '1', 'username': 'al'}))
+        self.assertIsNot(one.author, two.author)
+        self.assertEqual('al', two.author.username)
+
+    def test_nested_related(self):
+        record = self.sut('posts/list', post('1', thread={'id': '5'}))
+        self.assertIsInstance(record.thread, Thread)
+
+    def test_max_shared(self):
+        sut = RecordFactory(max_shared=1)
+        sut('posts/list', post('1'))
+        sut('posts/list', post('2', {'id': '2'}))
+        self.assertEqual(1, len(sut._shared))
@@ -0,0 +1,97 @@
+import socket
+
+from disqusapi.exceptions import APIError, ServerError
+from disqusapi.retry import RetryPolicy
+from disqusapi.tests import unittest
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Failing(object):
+    """Callable failing with the given errors before returning 'ok'"""
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def policy(self, **kwargs):
+        return RetryPolicy(
+            clock=self.clock, sleep=self.clock.sleep, random=lambda: 1,
+            **kwargs)
+
+    def test_success(self):
+        func = Failing()
+        self.assertEqual('ok', self.policy().call(func))
+        self.assertEqual(1, func.calls)
+
+    def test_arguments(self):
+        def func(a, b=None):
+            return a, b
+        self.assertEqual((1, 2), self.policy().call(func, 1, b=2))
+
+    def test_retry_socket_error(self):
+        func = Failing(socket.error('reset'), socket.timeout('timeout'))
+        sut = self.policy()
+        self.assertEqual('ok', sut.call(func))
+        self.assertEqual([0.5, 1], self.clock.sleeps)
+        self.assertEqual(2, sut.retries)
+
+    def test_retry_server_error(self):
+        func = Failing(ServerError(502, '<html>'))
+        self.assertEqual('ok', self.policy().call(func))
+
+    def test_retry_code(self):
+        func = Failing(APIError(15, 'unavailable'))
+        self.assertEqual('ok', self.policy().call(func))
+
+    def test_not_retryable(self):
+        func = Failing(APIError(2, 'bad argument'))
+        with self.assertRaises(APIError):
+            self.policy().call(func)
+        self.assertEqual(1, func.calls)
+
+    def test_attempts(self):
+        func = Failing(*[socket.error('reset')] * 3)
+        with self.assertRaises(socket.error):
+            self.policy(attempts=3).call(func)
+        self.assertEqual(3, func.calls)
+
+    def test_max_backoff(self):
+        sut = self.policy(backoff=1, max_backoff=5)
+        self.assertEqual([1, 2, 4, 5], [sut.delay(i) for i in range(4)])
+
+    def test_jitter(self):
+        sut = RetryPolicy(backoff=1, random=lambda: 0.25)
+        self.assertEqual(0.5, sut.delay(1))
+
+    def test_deadline(self):
+        func = Failing(*[socket.error('reset')] * 3)
+        with self.assertRaises(socket.error):
+            self.policy(backoff=1, deadline=2).call(func)
+        self.assertEqual(2, func.calls)
+
+    def test_allows(self):
+        self.assertTrue(self.policy().allows('GET'))
+        self.assertFalse(self.policy().allows('POST'))
+        self.assertTrue(self.policy(retry_post=True).allows('POST'))
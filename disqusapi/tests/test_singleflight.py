@@ -0,0 +1,69 @@
+import threading
+import time
+
+from disqusapi.singleflight import SingleFlight
+from disqusapi.tests import unittest
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.sut = SingleFlight()
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def slow(self, value):
+        self.calls.append(value)
+        self.started.set()
+        self.release.wait(5)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def run_followers(self, key, value, count):
+        results = []
+
+        def follower():
+            try:
+                results.append(self.sut.do(key, self.slow, value))
+            except Exception as error:
+                results.append(error)
+        threads = [threading.Thread(target=follower) for _ in range(count)]
+        threads[0].start()
+        self.started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.time() + 5
+        while self.sut.coalesced < count - 1 and time.time() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+        return results
+
+    def test_call(self):
+        self.release.set()
+        self.assertEqual(1, self.sut.do('key', self.slow, 1))
+        self.assertEqual(0, len(self.sut))
+
+    def test_coalesced(self):
+        self.assertEqual([1] * 4, self.run_followers('key', 1, 4))
+        self.assertEqual([1], self.calls)
+        self.assertEqual((1, 3), (self.sut.calls, self.sut.coalesced))
+
+    def test_error_shared(self):
+        error = ValueError('bad')
+        self.assertEqual([error] * 3, self.run_followers('key', error, 3))
+        self.assertEqual(1, len(self.calls))
+
+    def test_sequential_not_coalesced(self):
+        self.release.set()
+        self.sut.do('key', self.slow, 1)
+        self.sut.do('key', self.slow, 2)
+        self.assertEqual([1, 2], self.calls)
+
+    def test_different_keys(self):
+        self.release.set()
+        self.sut.do('a', self.slow, 1)
+        self.sut.do('b', self.slow, 2)
+        self.assertEqual(2, self.sut.calls)
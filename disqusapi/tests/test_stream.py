@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import io
+
+from disqusapi.stream import EnvelopeParser, StreamResult
+from disqusapi.tests import unittest
+
+
+def parser(body, chunk_size=3):
+    return EnvelopeParser(
+        io.BytesIO(body.encode('utf-8')).read, chunk_size=chunk_size)
+
+
+class TestEnvelopeParser(unittest.TestCase):
+    def test_list(self):
+        sut = parser(
+            '{"cursor": {"id": "1:0:0", "more": true}, "code": 0, '
+            '"response": [{"id": "1", "message": "hey"}, {"id": "2"}]}')
+        self.assertTrue(sut.start())
+        self.assertEqual(
+            {'cursor': {'id': '1:0:0', 'more': True}, 'code': 0},
+            sut.envelope)
+        self.assertEqual(
+            [{'id': '1', 'message': 'hey'}, {'id': '2'}], list(sut.items()))
+
+    def test_numbers_across_chunks(self):
+        sut = parser('{"response": [12345, 67890], "code": 0}', 2)
+        self.assertTrue(sut.start())
+        self.assertEqual([12345, 67890], list(sut.items()))
+        self.assertEqual({'code': 0}, sut.envelope)
+
+    def test_keys_after_response(self):
+        sut = parser('{"response": [1], "cursor": {"more": false}}')
+        sut.start()
+        items = sut.items()
+        self.assertEqual(1, next(items))
+        self.assertNotIn('cursor', sut.envelope)
+        self.assertEqual([], list(items))
+        self.assertEqual({'more': False}, sut.envelope['cursor'])
+
+    def test_empty_list(self):
+        sut = parser('{"code": 0, "response": [ ]}')
+        sut.start()
+        self.assertEqual([], list(sut.items()))
+
+    def test_object(self):
+        sut = parser('{"code": 0, "response": {"id": 1}}')
+        self.assertFalse(sut.start())
+        self.assertEqual({'code': 0, 'response': {'id': 1}}, sut.envelope)
+
+    def test_empty_envelope(self):
+        self.assertFalse(parser('{}').start())
+
+    def test_unicode(self):
+        sut = parser(u'{"response": ["áéíóú"]}', 1)
+        sut.start()
+        self.assertEqual([u'áéíóú'], list(sut.items()))
+
+    def test_whitespace(self):
+        sut = parser('\n{ "response" : [ 1 ,\n 2 ] ,\n "code" : 0 }\n')
+        sut.start()
+        self.assertEqual([1, 2], list(sut.items()))
+        self.assertEqual({'code': 0}, sut.envelope)
+
+    def test_invalid(self):
+        sut = parser('{"response": [1 2]}')
+        sut.start()
+        with self.assertRaises(ValueError):
+            list(sut.items())
+
+    def test_truncated(self):
+        sut = parser('{"response": [{"id": ')
+        sut.start()
+        with self.assertRaises(ValueError):
+            list(sut.items())
+
+
+class TestStreamResult(unittest.TestCase):
+    def setUp(self):
+        self.released = []
+        sut = parser('{"response": [1, 2, 3], "cursor": {"more": false}}')
+        sut.start()
+        self.sut = StreamResult(sut, lambda: self.released.append(True))
+
+    def test_iter(self):
+        self.assertEqual([1, 2, 3], list(self.sut))
+        self.assertEqual([True], self.released)
+
+    def test_stopped_early(self):
+        for item in self.sut:
+            break
+        self.assertEqual([True], self.released)
+        self.sut.close()
+        self.assertEqual([True], self.released)
+
+    def test_response(self):
+        self.assertEqual([1, 2, 3], self.sut.response)
+        self.assertEqual(3, len(self.sut))
+        self.assertEqual(2, self.sut[1])
+        self.assertEqual([1, 2, 3], list(self.sut))
+
+    def test_cursor_after_items(self):
+        self.assertEqual({'more': False}, self.sut.cursor)
+        self.assertEqual([1, 2, 3], list(self.sut))
+
+    def test_cursor_before_items(self):
+        sut = parser('{"cursor": {"more": true}, "response": [1, 2]}')
+        sut.start()
+        result = StreamResult(sut)
+        self.assertEqual({'more': True}, result.cursor)
+        self.assertEqual([1, 2], list(result))
+
+    def test_code(self):
+        sut = parser('{"code": 0, "response": []}')
+        sut.start()
+        self.assertEqual(0, StreamResult(sut).code)
+
@@ -0,0 +1,109 @@
+from disqusapi import DisqusAPI, Result
+from disqusapi.checkpoint import MemoryCheckpointStore
+from disqusapi.sync import IncrementalSync, position
+from disqusapi.tests import unittest
+
+
+def item(ident, day):
+    return {'id': str(ident), 'createdAt': '2014-01-%02dT00:00:00' % day}
+
+
+class FakeForum(object):
+    """Answers list calls from a list of items, two per page"""
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def __call__(self, method, path, kwargs):
+        self.calls.append(dict(kwargs))
+        items = sorted(self.items, key=lambda i: position(i, 'createdAt'),
+                       reverse=kwargs['order'] == 'desc')
+        if 'since' in kwargs:
+            items = [i for i in items if i['createdAt'] >= kwargs['since']]
+        start = kwargs.get('cursor', 0)
+        more = start + 2 < len(items)
+        return Result(items[start:start + 2], dict(more=more, id=start + 2))
+
+
+class TestPosition(unittest.TestCase):
+    def test_numeric_ids(self):
+        self.assertLess(position(item(9, 1), 'createdAt'),
+                        position(item(10, 1), 'createdAt'))
+
+    def test_missing_date(self):
+        self.assertEqual(('', 1), position({'id': '1'}, 'createdAt'))
+
+
+class TestIncrementalSync(unittest.TestCase):
+    def setUp(self):
+        self.forum = FakeForum([item(1, 1), item(2, 2), item(3, 3)])
+        self.api = DisqusAPI('secret')
+        self.api.make_request = self.forum
+        self.store = MemoryCheckpointStore()
+        self.sut = IncrementalSync(self.api, self.store, save_every=2,
+                                   newest_first=['users/listActivity'])
+
+    def ids(self, items):
+        return [i['id'] for i in items]
+
+    def test_first_run(self):
+        self.assertEqual(
+            ['1', '2', '3'], self.ids(self.sut('posts/list', 'disqus')))
+        self.assertEqual(
+            ('2014-01-03T00:00:00', 3), self.sut.mark('posts/list', 'disqus'))
+        self.assertEqual('asc', self.forum.calls[0]['order'])
+        self.assertNotIn('since', self.forum.calls[0])
+
+    def test_incremental(self):
+        list(self.sut('posts/list', 'disqus'))
+        self.forum.items.extend([item(4, 3), item(5, 4)])
+        self.forum.calls = []
+        self.assertEqual(
+            ['4', '5'], self.ids(self.sut('posts/list', 'disqus')))
+        self.assertEqual('2014-01-03T00:00:00', self.forum.calls[0]['since'])
+
+    def test_nothing_new(self):
+        list(self.sut('posts/list', 'disqus'))
+        self.assertEqual([], list(self.sut('posts/list', 'disqus')))
+
+    def test_saves_while_walking(self):
+        items = self.sut('posts/list', 'disqus')
+        next(items)
+        next(items)
+        # The mark moves once the consumer is done with the item
+        self.assertIsNone(self.sut.mark('posts/list', 'disqus'))
+        next(items)
+        self.assertEqual(
+            ('2014-01-02T00:00:00', 2), self.sut.mark('posts/list', 'disqus'))
+
+    def test_per_forum(self):
+        list(self.sut('posts/list', 'disqus'))
+        self.assertIsNone(self.sut.mark('posts/list', 'other'))
+
+    def test_newest_first_stops_early(self):
+        list(self.sut('users/listActivity', 'disqus'))
+        self.forum.items.append(item(4, 5))
+        self.forum.calls = []
+        self.assertEqual(
+            ['4'], self.ids(self.sut('users/listActivity', 'disqus')))
+        self.assertEqual(1, len(self.forum.calls))
+        self.assertEqual('desc', self.forum.calls[0]['order'])
+        self.assertEqual(
+            ('2014-01-05T00:00:00', 4),
+            self.sut.mark('users/listActivity', 'disqus'))
+
+    def test_not_date_ordered(self):
+        with self.assertRaises(ValueError):
+            self.sut('threads/listHot', 'disqus')
+        self.assertEqual([], self.forum.calls)
+
+    def test_run(self):
+        upserts = []
+        self.assertEqual(
+            3, self.sut.run('posts/list', 'disqus', upserts.append))
+        self.assertEqual(3, len(upserts))
+
+    def test_reset(self):
+        list(self.sut('posts/list', 'disqus'))
+        self.sut.reset('posts/list', 'disqus')
+        self.assertEqual(3, len(list(self.sut('posts/list', 'disqus'))))
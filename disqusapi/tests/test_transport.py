@@ -0,0 +1,108 @@
+from mock import Mock
+
+from disqusapi.batch import BatchLookup
+from disqusapi.compat import HTTPException
+from disqusapi.metrics import Call
+from disqusapi.tests import unittest
+from disqusapi.tests.fakeserver import FakeDisqusServer
+from disqusapi.transport import (
+    ConnectionTransport,
+    HTTP2Transport,
+    PoolTransport,
+    Transport,
+    httpx)
+
+
+class TestTransport(unittest.TestCase):
+    def test_open(self):
+        with self.assertRaises(NotImplementedError):
+            Transport().open('GET', '/', '', {})
+
+
+class TestConnectionTransport(unittest.TestCase):
+    def setUp(self):
+        self.conn = Mock()
+        self.sut = ConnectionTransport('disqus.com', self.conn)
+
+    def test_open(self):
+        response, release = self.sut.open('GET', '/a', '', {'a': 'b'})
+        self.conn.assert_called_with('disqus.com')
+        self.conn.return_value.request.assert_called_with(
+            'GET', '/a', '', {'a': 'b'})
+        self.assertIs(self.conn.return_value.getresponse.return_value,
+                      response)
+        release()
+        self.conn.return_value.close.assert_called_with()
+
+    def test_open_call(self):
+        call = Mock()
+        response, _ = self.sut.open('GET', '/a', '', {}, call)
+        call.send.assert_called_with(
+            self.conn.return_value, 'GET', '/a', '', {})
+        self.assertIs(call.send.return_value, response)
+
+
+class TestPoolTransport(unittest.TestCase):
+    def test_open(self):
+        pool = Mock()
+        pool.open.return_value = ('conn', 'response')
+        sut = PoolTransport(pool)
+        response, release = sut.open('GET', '/a', '', {})
+        self.assertEqual('response', response)
+        release()
+        pool.release.assert_called_with('conn', 'response')
+        sut.close()
+        pool.clear.assert_called_with()
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHTTP2Transport(unittest.TestCase):
+    def mocked(self, handler):
+        return HTTP2Transport(
+            client=httpx.Client(transport=httpx.MockTransport(handler)))
+
+    def test_request(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, stream=httpx.ByteStream(b'0123456789'),
+                                  headers={'X-Ratelimit-Remaining': '5'})
+        sut = self.mocked(handler)
+        response, release = sut.open(
+            'POST', '/api/3.0/a.json', 'b=1', {'User-Agent': 'test'})
+        request = requests[0]
+        self.assertEqual(('POST', 'https://disqus.com/api/3.0/a.json'),
+                         (request.method, str(request.url)))
+        self.assertEqual(b'b=1', request.content)
+        self.assertEqual('identity', request.headers['Accept-Encoding'])
+        self.assertEqual('application/x-www-form-urlencoded',
+                         request.headers['Content-Type'])
+        self.assertEqual(200, response.status)
+        self.assertEqual('5', response.getheader('X-Ratelimit-Remaining'))
+        self.assertEqual(b'012', response.read(3))
+        self.assertEqual(b'3456789', response.read())
+        self.assertEqual(b'', response.read(3))
+        release()
+
+    def test_timed(self):
+        sut = self.mocked(lambda request: httpx.Response(200))
+        call = Call('GET', 'a')
+        sut.open('GET', '/a', '', {}, call)
+        self.assertGreater(call.timings['first_byte'], 0)
+
+    def test_error(self):
+        def handler(request):
+            raise httpx.ConnectError('refused')
+        with self.assertRaises(HTTPException):
+            self.mocked(handler).open('GET', '/a', '', {})
+
+    def test_fake_server(self):
+        with FakeDisqusServer(posts=50) as server:
+            transport = HTTP2Transport(server.address, scheme='http')
+            api = server.client(transport=transport, compress=True)
+            self.assertEqual(
+                25, len(api.posts.list(forum='fake', limit=25)))
+            posts = BatchLookup(api, workers=8).posts(range(1, 21))
+            self.assertEqual(20, len(posts))
+            api.make_request.transport.close()
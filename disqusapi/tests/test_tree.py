@@ -0,0 +1,81 @@
+from disqusapi.tests import unittest
+from disqusapi.tree import ThreadTree
+
+
+def post(ident, parent=None, date=None):
+    return {'id': str(ident), 'parent': parent,
+            'createdAt': date or '2014-01-01T00:%02d:00' % ident}
+
+
+class TestThreadTree(unittest.TestCase):
+    def setUp(self):
+        # 1 > 2 > 4, 1 > 3 and 5, newest first as posts.list gives them
+        self.tree = ThreadTree([post(5), post(4, 2), post(3, 1), post(2, 1),
+                                post(1)])
+
+    def walk(self, **kwargs):
+        return [(depth, int(item['id']))
+                for depth, item in self.tree.walk(**kwargs)]
+
+    def test_walk(self):
+        self.assertEqual([(0, 5), (0, 1), (1, 3), (1, 2), (2, 4)],
+                         self.walk())
+        self.assertEqual(['5', '1', '3', '2', '4'],
+                         [item['id'] for item in self.tree])
+
+    def test_sorted(self):
+        oldest = self.walk(key=lambda item: item['createdAt'])
+        self.assertEqual([(0, 1), (1, 2), (2, 4), (1, 3), (0, 5)], oldest)
+        newest = self.walk(key=lambda item: item['createdAt'], reverse=True)
+        self.assertEqual([(0, 5), (0, 1), (1, 3), (1, 2), (2, 4)], newest)
+
+    def test_lookups(self):
+        self.assertEqual(5, len(self.tree))
+        self.assertIn(4, self.tree)
+        self.assertNotIn('6', self.tree)
+        self.assertEqual(['3', '2'],
+                         [item['id'] for item in self.tree.children('1')])
+        self.assertEqual('2', self.tree.parent(4)['id'])
+        self.assertIsNone(self.tree.parent(1))
+        self.assertEqual(2, self.tree.depth(4))
+        self.assertEqual(['5', '1'],
+                         [item['id'] for item in self.tree.roots])
+        self.assertIsNone(self.tree.get(6))
+
+    def test_orphans(self):
+        tree = ThreadTree([post(3, 2), post(4, 2), post(5, 3)])
+        self.assertEqual(['3', '4'], [item['id'] for item in tree.orphans])
+        self.assertEqual([(0, 3), (1, 5), (0, 4)],
+                         [(depth, int(item['id']))
+                          for depth, item in tree.walk()])
+        self.assertEqual([], list(tree.walk(orphans=False)))
+        tree.extend([post(2, 1), post(1)])
+        self.assertEqual([], tree.orphans)
+        self.assertEqual([(0, 1), (1, 2), (2, 3), (3, 5), (2, 4)],
+                         [(depth, int(item['id']))
+                          for depth, item in tree.walk()])
+        self.assertEqual(3, tree.depth(5))
+
+    def test_incremental(self):
+        self.tree.extend([post(6, 4), post(7, 5)])
+        self.assertEqual([(0, 5), (1, 7), (0, 1), (1, 3), (1, 2), (2, 4),
+                          (3, 6)], self.walk())
+
+    def test_replace(self):
+        self.tree.add(dict(post(2, 1), message='Edited'))
+        self.assertEqual(5, len(self.tree))
+        self.assertEqual('Edited', self.tree.get(2)['message'])
+        self.assertEqual(['4'],
+                         [item['id'] for item in self.tree.children(2)])
+
+    def test_broken_parents(self):
+        tree = ThreadTree([post(1, 1), post(2, 3), post(3, 2)])
+        self.assertEqual([(0, 1), (0, 2), (1, 3)],
+                         [(depth, int(item['id']))
+                          for depth, item in tree.walk()])
+
+    def test_deep(self):
+        tree = ThreadTree(post(ident, ident - 1 or None)
+                          for ident in range(1, 5001))
+        self.assertEqual(list(range(5000)),
+                         [depth for depth, item in tree.walk()])
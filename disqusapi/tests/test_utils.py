@@ -0,0 +1,107 @@
+import binascii
+import hashlib
+import hmac
+import re
+
+from disqusapi.tests import unittest
+from disqusapi.utils import (
+    MacSigner,
+    get_body_hash,
+    get_mac_signature,
+    get_normalized_params,
+    get_normalized_request_string)
+
+URL = 'https://disqus.com/api/3.0/posts/list.json'
+PARAMS = [('limit', '100'), ('forum', 'disqus'), ('thread', '2'),
+          ('thread', '1')]
+
+
+class TestNormalizedParams(unittest.TestCase):
+    def test_sorted(self):
+        self.assertEqual('forum=disqus&limit=100&thread=1&thread=2',
+                         get_normalized_params(PARAMS))
+
+
+class TestRequestString(unittest.TestCase):
+    def test_params(self):
+        self.assertEqual(
+            'nonce\nGET\n/api/3.0/posts/list.json?forum=disqus&limit=100'
+            '&thread=1&thread=2\ndisqus.com\n443\n%s\n\n'
+            % get_body_hash(PARAMS),
+            get_normalized_request_string('get', URL, 'nonce', PARAMS))
+
+    def test_query(self):
+        request = get_normalized_request_string(
+            'GET', URL + '?b=1&a=2', 'nonce', [], body_hash='hash')
+        self.assertEqual(
+            'nonce\nGET\n/api/3.0/posts/list.json?b=1&a=2\ndisqus.com\n443'
+            '\nhash\n\n', request)
+
+    def test_port(self):
+        request = get_normalized_request_string(
+            'POST', 'http://localhost:8000/a', 'nonce', [], ext='ext')
+        self.assertEqual('8000', request.split('\n')[4])
+        self.assertEqual('ext', request.split('\n')[6])
+
+    def test_body_hash(self):
+        expected = binascii.b2a_base64(hashlib.sha1(
+            b'forum=disqus&limit=100&thread=1&thread=2').digest())[:-1]
+        self.assertEqual(expected.decode('ascii'), get_body_hash(PARAMS))
+
+    def test_signature(self):
+        expected = binascii.b2a_base64(
+            hmac.new(b'secret', b'request', hashlib.sha1).digest())[:-1]
+        self.assertEqual(expected.decode('ascii'),
+                         get_mac_signature('secret', 'request'))
+
+
+class TestMacSigner(unittest.TestCase):
+    def setUp(self):
+        self.sut = MacSigner('secret', key_id='token', clock=lambda: 1000,
+                             random=lambda size: b'\x01' * size)
+
+    def test_request_string(self):
+        for url, params in ((URL, PARAMS), (URL + '?b=1&a=2', PARAMS),
+                            ('http://localhost:8000/a', []),
+                            ('http://example.com/a', [('a', 1)])):
+            self.assertEqual(
+                get_normalized_request_string('GET', url, 'n', params),
+                self.sut.request_string('GET', url, 'n', params))
+
+    def test_sign(self):
+        request = get_normalized_request_string('POST', URL, 'n', PARAMS)
+        self.assertEqual(get_mac_signature('secret', request),
+                         self.sut.sign('POST', URL, 'n', PARAMS))
+        # The precomputed state is not consumed
+        self.assertEqual(get_mac_signature('secret', request),
+                         self.sut.sign('POST', URL, 'n', PARAMS))
+
+    def test_sign_many(self):
+        requests = [('GET', URL, 'n%d' % number, PARAMS)
+                    for number in range(3)]
+        self.assertEqual(
+            [self.sut.sign(*request) for request in requests],
+            self.sut.sign_many(requests))
+
+    def test_url_cache(self):
+        sut = MacSigner('secret', max_urls=2)
+        for number in range(3):
+            sut.sign('GET', 'https://disqus.com/%d?a=%d' % (number, number),
+                     'n', [])
+        self.assertEqual(1, len(sut._urls))
+
+    def test_nonce(self):
+        self.assertEqual('1000:0101010101010101', self.sut.nonce())
+
+    def test_authorization(self):
+        header = self.sut.authorization('POST', URL, PARAMS)
+        match = re.match(
+            r'MAC id="token", nonce="([^"]+)", bodyhash="([^"]+)", '
+            r'mac="([^"]+)"$', header)
+        nonce, body_hash, mac = match.groups()
+        self.assertEqual(get_body_hash(PARAMS), body_hash)
+        self.assertEqual(self.sut.sign('POST', URL, nonce, PARAMS), mac)
+
+    def test_authorization_ext(self):
+        self.assertIn(', ext="x", mac=',
+                      self.sut.authorization('GET', URL, [], ext='x'))
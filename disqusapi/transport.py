@@ -0,0 +1,145 @@
+"""Transports sending the requests of DisqusRequest"""
+import functools
+
+from disqusapi.compat import HTTPException, HTTPSConnection
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+try:
+    import h2
+except ImportError:  # pragma: no cover
+    h2 = None
+
+
+class Transport(object):
+    """
+    Transport interface.
+
+    ``open`` sends a request and returns its response and a callable to call
+    once the response is read. Responses have a ``status``, a
+    ``getheader(name)`` and a ``read(size=-1)`` method; ``call`` (a
+    disqusapi.metrics.Call, when instrumented) times the request.
+    """
+    def open(self, method, path, data, headers, call=None):
+        raise NotImplementedError('Implement in your subclass')
+
+    def close(self):
+        """Close the connections kept open"""
+
+
+class ConnectionTransport(Transport):
+    """A new connection for every request"""
+    def __init__(self, host, conn=HTTPSConnection):
+        self.host = host
+        self.conn = conn
+
+    def open(self, method, path, data, headers, call=None):
+        conn = self.conn(self.host)
+        if call is not None:
+            return call.send(conn, method, path, data, headers), conn.close
+        conn.request(method, path, data, headers)
+        return conn.getresponse(), conn.close
+
+
+class PoolTransport(Transport):
+    """Keep-alive connections of a disqusapi.pool.ConnectionPool"""
+    def __init__(self, pool):
+        self.pool = pool
+
+    def open(self, method, path, data, headers, call=None):
+        pool = self.pool
+        conn, response = pool.open(method, path, data, headers, call)
+        return response, lambda: pool.release(conn, response)
+
+    def close(self):
+        self.pool.clear()
+
+
+class HTTP2Transport(Transport):
+    """
+    Multiplexes concurrent requests over a single HTTP/2 connection.
+
+    >>> api = DisqusAPI('secret_key', transport=HTTP2Transport())
+    >>> users = BatchLookup(api, workers=32).users(ids)
+
+    Threads share the transport, their requests are sent as streams of the
+    same connection. It needs httpx, and h2 for HTTP/2 (``pip install
+    disqus-python[http2]``); servers without HTTP/2, or without h2 installed,
+    get up to ``max_connections`` HTTP/1.1 keep-alive connections instead.
+
+    Network errors are raised as HTTPException, so RetryPolicy retries them.
+    Connecting and sending are not timed apart, instrumented calls get their
+    whole wait for the response as ``first_byte``.
+    """
+    def __init__(self, host='disqus.com', scheme='https', max_connections=10,
+                 timeout=30, client=None):
+        if httpx is None:
+            raise ImportError('HTTP2Transport requires httpx')
+        self.base_url = '%s://%s' % (scheme, host)
+        if client is None:
+            client = httpx.Client(
+                http2=h2 is not None, timeout=timeout,
+                limits=httpx.Limits(max_connections=max_connections))
+        self.client = client
+
+    def open(self, method, path, data, headers, call=None):
+        headers = dict(headers)
+        # Responses are decoded by DisqusRequest, compressed only if asked
+        headers.setdefault('Accept-Encoding', 'identity')
+        if data:
+            headers.setdefault(
+                'Content-Type', 'application/x-www-form-urlencoded')
+        request = self.client.build_request(
+            method, self.base_url + path, headers=headers,
+            content=data or None)
+        send = functools.partial(self.client.send, request, stream=True)
+        try:
+            if call is None:
+                response = send()
+            else:
+                response = call.time('first_byte', send)
+        except httpx.TransportError as error:
+            raise _http_exception(error)
+        return HTTPXResponse(response), response.close
+
+    def close(self):
+        self.client.close()
+
+
+class HTTPXResponse(object):
+    """An httpx streamed response read like an http.client one"""
+    def __init__(self, response):
+        self.status = response.status_code
+        self.response = response
+        self._chunks = response.iter_raw()
+        self._buffer = b''
+
+    @property
+    def http_version(self):
+        return self.response.http_version
+
+    def getheader(self, name, default=None):
+        return self.response.headers.get(name, default)
+
+    def read(self, size=-1):
+        try:
+            if size is None or size < 0:
+                data = self._buffer + b''.join(self._chunks)
+                self._buffer = b''
+                return data
+            while len(self._buffer) < size:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+        except httpx.TransportError as error:
+            raise _http_exception(error)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _http_exception(error):
+    return HTTPException('%s: %s' % (type(error).__name__, error))
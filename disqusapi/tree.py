@@ -0,0 +1,196 @@
+"""
+Reply trees of thread posts
+
+>>> tree = ThreadTree(Paginator(api.threads.listPosts, thread='1234'))
+>>> for depth, post in tree.walk(key=lambda post: post['createdAt']):
+...     print('  ' * depth + post['message'])
+>>> tree.extend(new_posts)
+
+Posts are linked to their parent as they are added, in constant time, so a
+tree of n posts is built in O(n) whatever the order they come in. Posts whose
+parent has not been added yet are orphans: they are linked when it comes.
+"""
+from array import array
+
+NONE = -1
+
+
+def _key(ident):
+    """Post ids are strings, parent ids numbers"""
+    try:
+        return int(ident)
+    except (TypeError, ValueError):
+        return ident
+
+
+class ThreadTree(object):
+    """
+    Posts of a thread linked to their replies.
+
+    Nodes are indexes in arrays: the posts, their parent, first and last
+    child and next sibling, children being kept in the order they were
+    added. Adding a post already in the tree replaces it (an edit) without
+    moving it.
+    """
+    def __init__(self, posts=()):
+        self.posts = []
+        self._index = {}
+        self._parent = array('l')
+        self._first_child = array('l')
+        self._last_child = array('l')
+        self._next_sibling = array('l')
+        # Roots are the children of a virtual node
+        self._first_root = NONE
+        self._last_root = NONE
+        # Parent id: indexes of the posts waiting for it
+        self._orphans = {}
+        self.extend(posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __contains__(self, ident):
+        return _key(ident) in self._index
+
+    def __iter__(self):
+        for depth, post in self.walk():
+            yield post
+
+    def extend(self, posts):
+        """Add posts (any iterable, a Paginator for instance)"""
+        add = self.add
+        for post in posts:
+            add(post)
+
+    def add(self, post):
+        ident = _key(post['id'])
+        index = self._index.get(ident)
+        if index is not None:
+            self.posts[index] = post
+            return index
+        index = len(self.posts)
+        self._index[ident] = index
+        self.posts.append(post)
+        self._parent.append(NONE)
+        self._first_child.append(NONE)
+        self._last_child.append(NONE)
+        self._next_sibling.append(NONE)
+
+        parent_id = _key(post.get('parent'))
+        if parent_id is None or parent_id == ident:
+            self._link_root(index)
+        else:
+            parent = self._index.get(parent_id)
+            if parent is None:
+                self._orphans.setdefault(parent_id, []).append(index)
+            else:
+                self._link(parent, index)
+        for child in self._orphans.pop(ident, ()):
+            if self._ancestor(child, index):
+                # Broken data, replying to its own reply
+                self._link_root(child)
+            else:
+                self._link(index, child)
+        return index
+
+    def _ancestor(self, ancestor, index):
+        parent = self._parent
+        while index != NONE:
+            if index == ancestor:
+                return True
+            index = parent[index]
+        return False
+
+    def _link(self, parent, child):
+        self._parent[child] = parent
+        last = self._last_child[parent]
+        if last == NONE:
+            self._first_child[parent] = child
+        else:
+            self._next_sibling[last] = child
+        self._last_child[parent] = child
+
+    def _link_root(self, index):
+        if self._last_root == NONE:
+            self._first_root = index
+        else:
+            self._next_sibling[self._last_root] = index
+        self._last_root = index
+
+    def _siblings(self, index):
+        next_sibling = self._next_sibling
+        indexes = []
+        while index != NONE:
+            indexes.append(index)
+            index = next_sibling[index]
+        return indexes
+
+    def get(self, ident):
+        """A post by id, None when not in the tree"""
+        index = self._index.get(_key(ident))
+        return None if index is None else self.posts[index]
+
+    def parent(self, ident):
+        """Parent of a post, None for roots and orphans"""
+        index = self._parent[self._index[_key(ident)]]
+        return None if index == NONE else self.posts[index]
+
+    def children(self, ident):
+        """Direct replies to a post, in the order they were added"""
+        first = self._first_child[self._index[_key(ident)]]
+        return [self.posts[index] for index in self._siblings(first)]
+
+    def depth(self, ident):
+        """Ancestors of a post in the tree (0 for roots and orphans)"""
+        parent = self._parent
+        index = parent[self._index[_key(ident)]]
+        depth = 0
+        while index != NONE:
+            depth += 1
+            index = parent[index]
+        return depth
+
+    @property
+    def roots(self):
+        return [self.posts[index]
+                for index in self._siblings(self._first_root)]
+
+    @property
+    def orphans(self):
+        """Posts whose parent is not in the tree (yet)"""
+        return [self.posts[index]
+                for indexes in self._orphans.values() for index in indexes]
+
+    def walk(self, key=None, reverse=False, orphans=True):
+        """
+        Yield (depth, post) depth first, replies after their parent.
+
+        Siblings come in the order they were added, or sorted by ``key``
+        (a function of the post). Orphans are walked as roots (after the
+        other roots, unless sorted) or skipped if ``orphans`` is False.
+        """
+        posts = self.posts
+        first_child = self._first_child
+        siblings = self._siblings
+        roots = siblings(self._first_root)
+        if orphans:
+            for indexes in self._orphans.values():
+                roots.extend(indexes)
+        if key is not None:
+            roots.sort(key=lambda index: key(posts[index]), reverse=reverse)
+        elif reverse:
+            roots.reverse()
+        stack = [(0, index) for index in reversed(roots)]
+        while stack:
+            depth, index = stack.pop()
+            yield depth, posts[index]
+            children = siblings(first_child[index])
+            if not children:
+                continue
+            if key is not None:
+                children.sort(key=lambda child: key(posts[child]),
+                              reverse=reverse)
+            elif reverse:
+                children.reverse()
+            depth += 1
+            stack.extend((depth, child) for child in reversed(children))
@@ -1,6 +1,8 @@
 import binascii
 import hashlib
 import hmac
+import os
+import time
 
 from disqusapi.compat import urlencode, urlparse
 
@@ -52,14 +54,129 @@ def get_body_hash(params):
 
     http://tools.ietf.org/html/draft-ietf-oauth-v2-http-mac-00#section-3.2
     """
-    norm_params = get_normalized_params(params)
-
-    return binascii.b2a_base64(hashlib.sha1(norm_params).digest())[:-1]
+    return _hash_normalized(get_normalized_params(params))
 
 
 def get_mac_signature(api_secret, norm_request_string):
     """
     Returns HMAC-SHA1 (api secret, normalized request string)
     """
-    hashed = hmac.new(str(api_secret), norm_request_string, hashlib.sha1)
-    return binascii.b2a_base64(hashed.digest())[:-1]
+    hashed = hmac.new(
+        _to_bytes(api_secret), _to_bytes(norm_request_string), hashlib.sha1)
+    return _base64(hashed.digest())
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return (u'%s' % (value,)).encode('utf-8')
+
+
+def _base64(digest):
+    encoded = binascii.b2a_base64(digest)[:-1]
+    return encoded if isinstance(encoded, str) else encoded.decode('ascii')
+
+
+def _hash_normalized(norm_params):
+    return _base64(hashlib.sha1(_to_bytes(norm_params)).digest())
+
+
+class MacSigner(object):
+    """
+    Signs requests with a key, following the OAuth2 MAC spec.
+
+    >>> signer = MacSigner(mac_key, key_id=access_token)
+    >>> signer.sign('GET', url, nonce, params)
+    >>> signer.authorization('GET', url, params)
+    'MAC id="...", nonce="...", bodyhash="...", mac="..."'
+
+    Signatures are the same as get_normalized_request_string and
+    get_mac_signature give, but the HMAC state of the key is computed once
+    and copied for each message, the last ``max_urls`` parsed urls (without
+    their query) are kept, and params are sorted and encoded once for both
+    the url and the body hash.
+    """
+    def __init__(self, key, key_id=None, max_urls=1000, clock=time.time,
+                 random=os.urandom):
+        self.key_id = key_id
+        self.max_urls = max_urls
+        self._hmac = hmac.new(_to_bytes(key), digestmod=hashlib.sha1)
+        self._urls = {}
+        self._clock = clock
+        self._random = random
+
+    def _parse(self, url):
+        """Path, host and port of url, and its query"""
+        base, _, query = url.partition('?')
+        parsed = self._urls.get(base)
+        if parsed is None:
+            urlparts = urlparse(base)
+            port = urlparts.port
+            if not port:
+                assert urlparts.scheme in ('http', 'https')
+                port = 80 if urlparts.scheme == 'http' else 443
+            parsed = (urlparts.path, urlparts.hostname, port)
+            if len(self._urls) >= self.max_urls:
+                self._urls.clear()
+            self._urls[base] = parsed
+        return parsed, query
+
+    def request_string(self, method, url, nonce, params, ext='',
+                       body_hash=None):
+        """Normalized request string, see get_normalized_request_string"""
+        return self._request_string(
+            method, url, nonce, params, ext, body_hash, None)
+
+    def _request_string(self, method, url, nonce, params, ext, body_hash,
+                        norm_params):
+        (path, host, port), query = self._parse(url)
+        if query:
+            norm_url = '%s?%s' % (path, query)
+        elif params:
+            if norm_params is None:
+                norm_params = get_normalized_params(params)
+            norm_url = '%s?%s' % (path, norm_params)
+        else:
+            norm_url = path
+
+        if not body_hash:
+            if norm_params is None:
+                norm_params = get_normalized_params(params)
+            body_hash = _hash_normalized(norm_params)
+
+        return '%s\n%s\n%s\n%s\n%s\n%s\n%s\n' % (
+            nonce, method.upper(), norm_url, host, port, body_hash, ext)
+
+    def signature(self, request_string):
+        """HMAC-SHA1 of a normalized request string, in base64"""
+        mac = self._hmac.copy()
+        mac.update(_to_bytes(request_string))
+        return _base64(mac.digest())
+
+    def sign(self, method, url, nonce, params, ext='', body_hash=None):
+        return self.signature(self.request_string(
+            method, url, nonce, params, ext, body_hash))
+
+    def sign_many(self, requests):
+        """Signatures of (method, url, nonce, params) tuples"""
+        request_string = self.request_string
+        signature = self.signature
+        return [signature(request_string(*request)) for request in requests]
+
+    def nonce(self):
+        """Unique nonce: the current time and random characters"""
+        return '%d:%s' % (
+            self._clock(), binascii.hexlify(self._random(8)).decode('ascii'))
+
+    def authorization(self, method, url, params, ext=''):
+        """Authorization header value for a request"""
+        nonce = self.nonce()
+        norm_params = get_normalized_params(params)
+        body_hash = _hash_normalized(norm_params)
+        mac = self.signature(self._request_string(
+            method, url, nonce, params, ext, body_hash, norm_params))
+        header = 'MAC id="%s", nonce="%s", bodyhash="%s"' % (
+            self.key_id, nonce, body_hash)
+        if ext:
+            header += ', ext="%s"' % ext
+        return '%s, mac="%s"' % (header, mac)
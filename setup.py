@@ -13,6 +13,10 @@ setup(
     zip_safe=False,
     test_suite='nose.collector',
     install_requires=['simplejson'],
+    extras_require={
+        'arrow': ['pyarrow', 'numpy'],
+        'http2': ['httpx[http2]'],
+    },
     setup_requires=[
         'nose>=1.0',
     ],